@@ -0,0 +1,62 @@
+"""compressed attempt logs
+
+Revision ID: 3c9e0d41b7a2
+Revises: 81749eb3028d
+Create Date: 2026-10-19 11:02:17.604719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard as zstd
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e0d41b7a2'
+down_revision: Union[str, None] = '81749eb3028d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    op.create_table(
+        'log_dictionaries',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('dictionary', sa.LargeBinary, nullable=False),
+        sa.Column('created', sa.dialects.postgresql.TIMESTAMP, nullable=False, server_default=sa.func.now()),
+    )
+    op.add_column('attempts', sa.Column('complete_log_zstd', sa.LargeBinary, nullable=True))
+    op.add_column('attempts', sa.Column('log_dictionary_id', sa.Integer,
+                                        sa.ForeignKey('log_dictionaries.id'), nullable=True))
+
+    # Existing logs are left as they are; they stay readable from complete_log.
+    # train_log_dictionary --recompress moves them over once compression is in use.
+
+
+def downgrade() -> None:
+    # Decompress logs back into complete_log in batches, committing each one,
+    # so a big table isn't rewritten in a single transaction.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        dictionaries = {id: zstd.ZstdCompressionDict(bytes(d)) for id, d in
+                        conn.execute(sa.text("SELECT id, dictionary FROM log_dictionaries"))}
+
+        while True:
+            rows = conn.execute(sa.text(
+                "SELECT id, complete_log_zstd, log_dictionary_id FROM attempts WHERE complete_log_zstd IS NOT NULL LIMIT :n"),
+                {"n": BATCH_SIZE}).fetchall()
+
+            if not rows:
+                break
+
+            conn.execute(sa.text(
+                "UPDATE attempts SET complete_log = :log, complete_log_zstd = NULL, log_dictionary_id = NULL WHERE id = :id"),
+                [{"id": id, "log": zstd.ZstdDecompressor(dict_data=dictionaries.get(d)).decompress(bytes(z)).decode()}
+                 for id, z, d in rows])
+
+    op.drop_column('attempts', 'log_dictionary_id')
+    op.drop_column('attempts', 'complete_log_zstd')
+    op.drop_table('log_dictionaries')
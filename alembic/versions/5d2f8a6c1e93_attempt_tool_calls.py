@@ -0,0 +1,36 @@
+"""attempt tool calls
+
+Revision ID: 5d2f8a6c1e93
+Revises: 3c9e0d41b7a2
+Create Date: 2026-10-19 11:48:53.271904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a6c1e93'
+down_revision: Union[str, None] = '3c9e0d41b7a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attempt_tool_calls',
+        sa.Column('attempt_id', UUID(as_uuid=True), sa.ForeignKey('attempts.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('seq', sa.Integer, nullable=False),  # order of the call within the attempt, from 1
+        sa.Column('args', JSONB, nullable=False),
+        sa.Column('output', JSONB, nullable=True),
+        sa.Column('error', sa.Boolean, nullable=False),
+        sa.Column('latency', sa.Float, nullable=True),  # seconds
+        sa.PrimaryKeyConstraint('attempt_id', 'seq'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('attempt_tool_calls')
@@ -0,0 +1,45 @@
+"""add analytics indexes
+
+Revision ID: 81749eb3028d
+Revises: ee7a4f17393e
+Create Date: 2026-10-19 10:12:41.318052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81749eb3028d'
+down_revision: Union[str, None] = 'ee7a4f17393e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so the tables stay writable while a big db is indexed,
+    # which can't happen inside a transaction
+    with op.get_context().autocommit_block():
+        # resume, pass@k and summarize_attempts all filter attempts by run,
+        # then group by function
+        op.create_index('ix_attempts_run_id_function_name', 'attempts', ['run_id', 'function_name'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+        # label selection uses labels && ARRAY[...]
+        op.create_index('ix_runs_labels', 'runs', ['labels'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+        op.create_index('ix_runs_datetime_start', 'runs', ['datetime_start'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_runs_datetime_start', table_name='runs',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_runs_labels', table_name='runs',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_attempts_run_id_function_name', table_name='attempts',
+                      postgresql_concurrently=True, if_exists=True)
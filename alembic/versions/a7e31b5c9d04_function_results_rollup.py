@@ -0,0 +1,46 @@
+"""function results rollup
+
+Revision ID: a7e31b5c9d04
+Revises: 5d2f8a6c1e93
+Create Date: 2026-10-19 12:31:06.845130
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e31b5c9d04'
+down_revision: Union[str, None] = '5d2f8a6c1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # one row per problem per run, kept up to date by complete_run
+    op.create_table(
+        'function_results',
+        sa.Column('run_id', UUID(as_uuid=True), sa.ForeignKey('runs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('function_name', sa.String, nullable=False),
+        sa.Column('success', sa.Integer, nullable=False),
+        sa.Column('failure', sa.Integer, nullable=False),
+        sa.PrimaryKeyConstraint('run_id', 'function_name'),
+    )
+
+    # backfill from the runs which already have their function names
+    op.execute("""
+        INSERT INTO function_results (run_id, function_name, success, failure)
+        SELECT run_id, function_name,
+               count(*) FILTER (WHERE lower(result) = 'true'),
+               count(*) FILTER (WHERE lower(result) <> 'true')
+        FROM attempts
+        WHERE function_name IS NOT NULL
+        GROUP BY run_id, function_name
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('function_results')
@@ -0,0 +1,125 @@
+"""partition attempts by month
+
+Revision ID: c2e8f5a3b7d1
+Revises: a7e31b5c9d04
+Create Date: 2026-10-19 13:20:44.913207
+
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8f5a3b7d1'
+down_revision: Union[str, None] = 'a7e31b5c9d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("id, run_id, function_name, result, time_taken, api_calls, tool_calls, "
+           "complete_log, meta, complete_log_zstd, log_dictionary_id")
+
+
+def upgrade() -> None:
+    # the view and the tool calls' foreign key refer to the old table
+    op.execute("DROP VIEW attempts_view")
+
+    # A unique key on a partitioned table must include the partition key, so
+    # attempts.id alone can no longer be referenced. Tool calls are only ever
+    # inserted along with their attempt.
+    op.drop_constraint('attempt_tool_calls_attempt_id_fkey', 'attempt_tool_calls', type_='foreignkey')
+
+    op.rename_table('attempts', 'attempts_unpartitioned')
+    op.execute("ALTER INDEX attempts_pkey RENAME TO attempts_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_attempts_run_id_function_name RENAME TO ix_attempts_unpartitioned_run_id_function_name")
+
+    # run_started is the parent run's datetime_start, so all of a run's
+    # attempts are in one partition and old months can be detached whole
+    op.execute(f"""
+        CREATE TABLE attempts (
+            id uuid NOT NULL,
+            run_id uuid NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+            function_name varchar,
+            result varchar NOT NULL,
+            time_taken float8,
+            api_calls integer,
+            tool_calls integer,
+            complete_log text,
+            meta jsonb,
+            complete_log_zstd bytea,
+            log_dictionary_id integer REFERENCES log_dictionaries (id),
+            run_started timestamp NOT NULL,
+            PRIMARY KEY (id, run_started)
+        ) PARTITION BY RANGE (run_started)
+    """)
+    op.create_index('ix_attempts_run_id_function_name', 'attempts', ['run_id', 'function_name'])
+
+    conn = op.get_bind()
+    months = [row[0] for row in conn.execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', datetime_start) FROM runs UNION SELECT date_trunc('month', now()::timestamp) ORDER BY 1"))]
+
+    # One month at a time, reporting each month's count. It all runs in the
+    # migration's transaction, so nothing is committed until every month is copied.
+    for month in months:
+        name = f"attempts_{month:%Y_%m}"
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        op.execute(f"CREATE TABLE {name} PARTITION OF attempts "
+                   f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')")
+
+        copied = conn.execute(sa.text(f"""
+            INSERT INTO attempts ({COLUMNS}, run_started)
+            SELECT {', '.join('a.' + c for c in COLUMNS.split(', '))}, r.datetime_start
+            FROM attempts_unpartitioned a JOIN runs r ON r.id = a.run_id
+            WHERE r.datetime_start >= :start AND r.datetime_start < :start + interval '1 month'
+        """), {"start": month}).rowcount
+
+        print(f"{name}: {copied} attempts")
+
+    op.drop_table('attempts_unpartitioned')
+
+    op.execute("""
+        CREATE VIEW attempts_view AS
+        SELECT run_id, function_name, result
+        FROM attempts
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW attempts_view")
+    op.rename_table('attempts', 'attempts_partitioned')
+    op.execute("ALTER INDEX attempts_pkey RENAME TO attempts_partitioned_pkey")
+    op.execute("ALTER INDEX ix_attempts_run_id_function_name RENAME TO ix_attempts_partitioned_run_id_function_name")
+
+    op.execute("""
+        CREATE TABLE attempts (
+            id uuid PRIMARY KEY,
+            run_id uuid NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+            function_name varchar,
+            result varchar NOT NULL,
+            time_taken float8,
+            api_calls integer,
+            tool_calls integer,
+            complete_log text,
+            meta jsonb,
+            complete_log_zstd bytea,
+            log_dictionary_id integer REFERENCES log_dictionaries (id)
+        )
+    """)
+    op.execute(f"INSERT INTO attempts ({COLUMNS}) SELECT {COLUMNS} FROM attempts_partitioned")
+    op.create_index('ix_attempts_run_id_function_name', 'attempts', ['run_id', 'function_name'])
+
+    # dropping the parent drops its partitions
+    op.drop_table('attempts_partitioned')
+
+    # the tool calls of any detached partitions have no attempt to refer to now
+    op.execute("DELETE FROM attempt_tool_calls WHERE attempt_id NOT IN (SELECT id FROM attempts)")
+    op.create_foreign_key('attempt_tool_calls_attempt_id_fkey', 'attempt_tool_calls', 'attempts',
+                          ['attempt_id'], ['id'], ondelete='CASCADE')
+
+    op.execute("""
+        CREATE VIEW attempts_view AS
+        SELECT run_id, function_name, result
+        FROM attempts
+    """)
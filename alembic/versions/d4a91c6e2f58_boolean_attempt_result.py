@@ -0,0 +1,52 @@
+"""boolean attempt result
+
+Revision ID: d4a91c6e2f58
+Revises: c2e8f5a3b7d1
+Create Date: 2026-10-19 14:05:12.377482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a91c6e2f58'
+down_revision: Union[str, None] = 'c2e8f5a3b7d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the view depends on the column's type
+    op.execute("DROP VIEW attempts_view")
+
+    # rewrites every partition; anything but 'true' was always counted as a failure
+    op.alter_column('attempts', 'result',
+                    type_=sa.Boolean,
+                    existing_type=sa.String,
+                    existing_nullable=False,
+                    postgresql_using="lower(result) = 'true'")
+
+    op.execute("""
+        CREATE VIEW attempts_view AS
+        SELECT run_id, function_name, result
+        FROM attempts
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW attempts_view")
+
+    op.alter_column('attempts', 'result',
+                    type_=sa.String,
+                    existing_type=sa.Boolean,
+                    existing_nullable=False,
+                    postgresql_using="result::text")
+
+    op.execute("""
+        CREATE VIEW attempts_view AS
+        SELECT run_id, function_name, result
+        FROM attempts
+    """)
@@ -0,0 +1,89 @@
+"""
+Compare the old string-concatenating AccumulatingPrinter with the chunked one
+in sherlockbench_client.main, on a synthetic 5 MB thinking transcript.
+
+    python benchmarks/bench_printer.py --size-mb 5
+
+Printed output goes to /dev/null, so this times the log accumulation and
+wrapping rather than the terminal.
+"""
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import textwrap
+import time
+
+from sherlockbench_client.main import AccumulatingPrinter
+
+WORDS = ["the", "function", "returns", "input", "output", "maybe", "test", "value", "so", "if",
+         "x", "=", "3", "->", "9", "hypothesis", "squares", "negative", "let's", "check"]
+
+class LegacyPrinter:
+    """The previous implementation: one growing str, wrap width looked up per call."""
+    def __init__(self):
+        self.megastring = ""
+
+    def print(self, *args):
+        concatenated_string = " ".join(str(arg) for arg in args)
+        print(concatenated_string)
+        self.megastring += concatenated_string + "\n"
+
+    def indented_print(self, *args):
+        concatenated_string = " ".join(str(arg) for arg in args)
+        terminal_width = shutil.get_terminal_size((80, 20)).columns
+        wrap_width = max(terminal_width - 5, 10)
+        wrapped_lines = [textwrap.fill(line, width=wrap_width, subsequent_indent="  ", initial_indent="  ")
+                         for line in concatenated_string.splitlines()]
+        indented_string = "\n".join(wrapped_lines)
+        print(indented_string)
+        self.megastring += indented_string + "\n"
+
+    def retrieve(self):
+        return self.megastring
+
+def transcript(size):
+    """Lines of a thinking transcript, mostly short, adding up to about size characters."""
+    rng = random.Random(0)
+    lines = []
+    total = 0
+
+    while total < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40)))
+        lines.append(line)
+        total += len(line) + 1
+
+    return lines
+
+def timed(label, printer, lines):
+    start = time.perf_counter()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i, line in enumerate(lines):
+            if i % 4 == 0:
+                printer.print("### SYSTEM:", line)
+            else:
+                printer.indented_print(line)
+
+        log = printer.retrieve()
+
+    elapsed = time.perf_counter() - start
+    print(f"{label:>8}: {elapsed:8.3f}s  ({len(log) / 1024 ** 2:.1f} MB logged)")
+
+    return log
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AccumulatingPrinter on a long transcript.")
+    parser.add_argument("--size-mb", type=float, default=5)
+    args = parser.parse_args()
+
+    lines = transcript(int(args.size_mb * 1024 ** 2))
+
+    legacy = timed("legacy", LegacyPrinter(), lines)
+    chunked = timed("chunked", AccumulatingPrinter(), lines)
+
+    assert legacy == chunked, "the logs differ"
+
+if __name__ == "__main__":
+    main()
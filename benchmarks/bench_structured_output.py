@@ -0,0 +1,81 @@
+"""
+Compare the old verification parsing with sherlockbench_client.structured_output.
+
+    python benchmarks/bench_structured_output.py
+
+Uses the corpus in benchmarks/data/malformed_responses.jsonl. Each line has a
+response and the expected_output it should yield ("__error__" when nothing
+sensible can be recovered). Add responses captured from real runs to it.
+"""
+import json
+import timeit
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from sherlockbench_client.structured_output import parse_prediction, make_json_schema, StructuredOutputError, TYPE_MAPPING
+
+CORPUS = Path(__file__).parent / "data" / "malformed_responses.jsonl"
+
+def last_brace_block(s):
+    """The extractor previously used by the anthropic client."""
+    stack = []
+    pairs = []
+    for i, c in enumerate(s):
+        if c == '{':
+            stack.append(i)
+        elif c == '}':
+            if stack:
+                start = stack.pop()
+                pairs.append((start, i))
+    if pairs:
+        start, end = pairs[-1]
+        return s[start:end+1]
+    return ''
+
+def legacy_parse(text):
+    value = json.loads(last_brace_block(text))
+    return value["thoughts"], value["expected_output"]
+
+def uncached_schema(output_type):
+    """make_schema as it was: a new pydantic class for every verification."""
+    class Prediction(BaseModel):
+        thoughts: str
+        expected_output: TYPE_MAPPING.get(output_type)
+
+    return Prediction
+
+def score(parse, corpus):
+    correct = 0
+    for case in corpus:
+        try:
+            result = parse(case["response"])[1]
+        except (ValueError, KeyError, TypeError, StructuredOutputError):
+            result = "__error__"
+        correct += result == case["expected_output"]
+    return correct
+
+def main():
+    corpus = [json.loads(line) for line in CORPUS.read_text().splitlines()]
+    # a long response with a lot of prose before the JSON, like a thinking model's
+    long_response = ("Considering the examples {a} and {b}. " * 2000) + '{"thoughts": "sum", "expected_output": 3}'
+
+    print(f"corpus: {len(corpus)} responses")
+    print()
+    print("{:<24} {:>10} {:>16} {:>20}".format("parser", "correct", "corpus µs/pass", "long response µs"))
+
+    for name, parse in [("last_brace_block", legacy_parse), ("structured_output", parse_prediction)]:
+        correct = score(parse, corpus)
+        corpus_time = timeit.timeit(lambda: score(parse, corpus), number=200) / 200
+        long_time = timeit.timeit(lambda: parse(long_response), number=50) / 50
+        print("{:<24} {:>10} {:>16.1f} {:>20.1f}".format(name, f"{correct}/{len(corpus)}",
+                                                      corpus_time * 1e6, long_time * 1e6))
+
+    print()
+    n = 200
+    uncached = timeit.timeit(lambda: uncached_schema("integer").model_json_schema(), number=n) / n
+    cached = timeit.timeit(lambda: make_json_schema("integer"), number=n) / n
+    print(f"schema per verification: uncached {uncached * 1e6:.1f} µs, cached {cached * 1e6:.1f} µs")
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ from functools import partial
 
 import anthropic
 
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
+from sherlockbench_client import destructure, post, api_keys, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
 from sherlockbench_client import run_with_error_handling, set_current_attempt
 
 from .investigate_decide_verify import investigate_decide_verify
@@ -35,26 +35,31 @@ def create_completion(client, model, **kwargs):
             **kwargs
         )
 
-def run_benchmark(executor, config, db_conn, cursor, run_id, attempts, start_time):
+def run_benchmark(executor, config, storage, run_id, attempts, start_time):
     """
     Run the Anthropic benchmark with the given parameters.
     This function is called by run_with_error_handling.
     """
-    client = anthropic.Anthropic(api_key=config['api-keys']['anthropic'])
-
     postfn = lambda *args: post(config["base-url"], run_id, *args)
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def completionfn_for_key(api_key):
+        client = anthropic.Anthropic(api_key=api_key)
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            return create_completion(client, config['model'], **kwargs)
 
-        return create_completion(client, config['model'], **kwargs)
+        return completionfn
 
     completionfn = LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                                  llmfn=completionfn,
-                                  backoff_exceptions=[(anthropic._exceptions.OverloadedError, 600)])
+                                  llmfn=[completionfn_for_key(key) for key in api_keys(config, "anthropic")],
+                                  backoff_exceptions=[(anthropic.RateLimitError, 60),
+                                                      (anthropic._exceptions.OverloadedError, 600)],
+                                  hedging=config.get("hedging"))
 
-    executor_p = partial(executor, postfn, completionfn, config, run_id, cursor)
+    executor_p = partial(executor, postfn, completionfn, config, run_id, storage)
 
     for i, attempt in enumerate(attempts, 1):
         print_progress_with_estimate(i, len(attempts), start_time)
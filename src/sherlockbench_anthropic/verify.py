@@ -1,28 +1,8 @@
 from anthropic.types import TextBlock, ToolUseBlock
 import json
-from sherlockbench_client import destructure
+from sherlockbench_client import destructure, parse_prediction, StructuredOutputError
 from pprint import pprint
 
-def last_brace_block(s: str) -> str:
-    """
-    Returns the last complete brace-enclosed block from the input string,
-    including any nested braces. Unmatched braces are ignored.
-    If no complete block exists, returns an empty string.
-    """
-    stack = []
-    pairs = []
-    for i, c in enumerate(s):
-        if c == '{':
-            stack.append(i)
-        elif c == '}':
-            if stack:
-                start = stack.pop()
-                pairs.append((start, i))
-    if pairs:
-        start, end = pairs[-1]
-        return s[start:end+1]
-    return ''
-
 def verify(config, postfn, completionfn, messages, printer, attempt_id, v_formatter, make_verification_message):
     # for each verification
     while (v_data := postfn("next-verification", {"attempt-id": attempt_id})):
@@ -37,7 +17,7 @@ def verify(config, postfn, completionfn, messages, printer, attempt_id, v_format
         # Anthropic 'Requests which include `tool_use` or `tool_result` blocks must define tools.'
         vmessages = [messages[-1]] + [make_verification_message(verification_formatted)]
 
-        # claude sometimes gives invalid json. retry a few times
+        # claude sometimes gives JSON we can't repair. only then is another call worthwhile
         attempts = 0
 
         # to prevent UnboundLocalError later
@@ -52,15 +32,12 @@ def verify(config, postfn, completionfn, messages, printer, attempt_id, v_format
             try:
                 # Claude often includes loads of other text in addition to
                 # the JSON
-                cleaned_response = last_brace_block(response)
-                
-                thoughts, expected_output = destructure(json.loads(cleaned_response), "thoughts", "expected_output")
+                thoughts, expected_output = parse_prediction(response)
                 break
 
-            except json.JSONDecodeError as e:
+            except StructuredOutputError as e:
                 attempts += 1
                 print(f"Attempt {attempts} failed: {e}")
-                print(cleaned_response)
 
         printer.print("\n--- LLM ---")
         printer.indented_print(thoughts, "\n")
@@ -1,4 +1,9 @@
-from .main import destructure, post, AccumulatingPrinter, make_schema, LLMRateLimiter, value_list_to_map, print_progress_with_estimate, load_config, load_provider_config, make_completionfn
+from .main import destructure, post, api_keys, load_endpoints, Lane, AccumulatingPrinter, make_schema, LLMRateLimiter, value_list_to_map, print_progress_with_estimate, load_config, load_provider_config, make_completionfn, get_decision_completionfn, decision_call_count, AttemptUsage
+from .structured_output import make_json_schema, parse_prediction, StructuredOutputError
+from .compaction import compact_for_verification
+from .db import ConnectionPool, get_pool, release_pool, close_pools
+from .storage import Storage, PostgresStorage, open_storage
+from .events import EventStream, read_events
 from . import queries as q
 from .run_api import run_with_error_handling, set_current_attempt, is_valid_uuid
 
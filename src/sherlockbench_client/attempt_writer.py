@@ -0,0 +1,259 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from filelock import FileLock, Timeout
+
+from . import events
+
+_CLOSE = object()
+
+DEFAULT_SPOOL_DIR = "resources/spool"
+
+class AttemptWriteError(Exception):
+    """Some attempt rows reached only the spool, not the db."""
+
+def writer_config(config):
+    """The optional `attempt-writer` config: spool-dir, batch-size, flush-interval, max-queue."""
+    return config.get("attempt-writer") or {}
+
+def spool_path(spool_dir, run_id):
+    return Path(spool_dir) / f"attempts-{run_id}.jsonl"
+
+def new_spool_path(spool_dir, run_id):
+    """
+    A spool path for the run which isn't in use. The spool of an earlier
+    run with the same id, e.g. one whose replay failed, is left for replay.
+    """
+    path = spool_path(spool_dir, run_id)
+    n = 1
+    while path.exists():
+        path = Path(spool_dir) / f"attempts-{run_id}.{n}.jsonl"
+        n += 1
+
+    return path
+
+def spool_lock(path):
+    """The lock held on a spool by its writer, or while it is replayed."""
+    return FileLock(f"{path}.lock")
+
+def read_spool(path):
+    """Read a spool file. A line cut short by a crash is ignored."""
+    rows = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+
+    return rows
+
+def load_logs(rows):
+    """
+    Rows with the logs of those spooled as a "log_file" read in. A missing
+    file gives a null log: it is removed only once its row is in the db.
+    """
+    loaded = []
+    for row in rows:
+        if "log_file" in row:
+            try:
+                row = row | {"complete_log": Path(row["log_file"]).read_text()}
+            except FileNotFoundError:
+                row = row | {"complete_log": None}
+
+        loaded.append(row)
+
+    return loaded
+
+def remove_logs(rows):
+    """Remove the log files of stored rows, unless they are to be kept."""
+    for row in rows:
+        if row.get("remove_log_file"):
+            Path(row["log_file"]).unlink(missing_ok=True)
+
+def replay_spools(storage, config):
+    """
+    Insert the attempts from any spool files left behind by a crashed run.
+    Attempt ids are primary keys, so rows which did reach the db are skipped.
+    A spool still locked by a live writer, e.g. a concurrent run, is left alone.
+    """
+    spool_dir = writer_config(config).get("spool-dir", DEFAULT_SPOOL_DIR)
+
+    for path in sorted(Path(spool_dir).glob("attempts-*.jsonl")):
+        lock = spool_lock(path)
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            continue
+
+        try:
+            # it may have been replayed since we listed the dir
+            if not path.exists():
+                continue
+
+            rows = read_spool(path)
+            if rows:
+                try:
+                    storage.insert_attempts(load_logs(rows))
+                except storage.errors as e:
+                    print(f"\n### SYSTEM ERROR: replaying {path} failed, it is kept for the next run: {e}")
+                    continue
+
+                remove_logs(rows)
+
+            print(f"\n### SYSTEM: replayed {len(rows)} spooled attempts from {path}")
+            path.unlink(missing_ok=True)
+        finally:
+            lock.release()
+
+class AttemptWriter:
+    """
+    Write-behind for attempt rows, so an attempt never waits on the db.
+
+    Each row is appended to an fsync'd local spool file before it is queued,
+    then a background thread inserts queued rows into the storage in
+    multi-row batches. A row's log may be left in a "log_file", which is
+    read only as its batch is inserted, so at most a batch of logs is held
+    in memory. The spool is removed once everything is committed; if
+    the process dies first, replay_spools() picks it up on the next run. The
+    writer holds a lock on the spool for as long as it is open, so a run
+    started alongside doesn't replay it.
+    """
+
+    def __init__(self, storage, spool_file, batch_size=50, flush_interval=1.0, max_queue=1000):
+        self.storage = storage
+        self.spool_file = Path(spool_file)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.spool_lock = threading.Lock()
+        self.failed = False
+        self.closed = False
+        self.submitted = 0
+        self.written = 0
+
+        self.spool_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = spool_lock(self.spool_file)
+        self.lock.acquire()
+
+        # never append to a spool left behind: its rows aren't counted in
+        # submitted, so close() would remove it with them still unwritten
+        try:
+            self.spool = open(self.spool_file, "x")
+        except FileExistsError:
+            self.lock.release()
+            raise
+
+        self.thread = threading.Thread(target=self.run, name="attempt-writer", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def for_run(cls, config, run_id, storage):
+        options = writer_config(config)
+        spool_dir = options.get("spool-dir", DEFAULT_SPOOL_DIR)
+
+        return cls(storage,
+                   new_spool_path(spool_dir, run_id),
+                   batch_size=options.get("batch-size", 50),
+                   flush_interval=options.get("flush-interval", 1.0),
+                   max_queue=options.get("max-queue", 1000))
+
+    def submit(self, attempt_data):
+        """Spool and queue an attempt row. Blocks only if the queue is full."""
+        with self.spool_lock:
+            self.spool.write(json.dumps(attempt_data) + "\n")
+            self.spool.flush()
+            os.fsync(self.spool.fileno())
+            self.submitted += 1
+
+        self.queue.put(attempt_data)
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size and batch[-1] is not _CLOSE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def write_batch(self, rows):
+        loaded = load_logs(rows)
+
+        max_retries = 3
+        for retry in range(max_retries):
+            try:
+                start = time.perf_counter()
+                self.storage.insert_attempts(loaded)
+            except self.storage.errors as e:
+                print(f"\n### SYSTEM ERROR: writing {len(rows)} attempts failed (retry {retry+1}/{max_retries}): {e}")
+                time.sleep(2 ** retry)
+                continue
+
+            self.written += len(rows)
+            remove_logs(rows)
+            events.emit("db_write", rows=len(rows), latency=time.perf_counter() - start, background=True)
+            return
+
+        # the rows are still in the spool, to be replayed on the next run
+        self.failed = True
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            rows = [row for row in batch if row is not _CLOSE]
+
+            try:
+                if rows:
+                    self.write_batch(rows)
+            except Exception as e:
+                # whatever went wrong, the writer must keep draining the queue or flush() never returns
+                print(f"\n### SYSTEM ERROR: writing {len(rows)} attempts failed: {e!r}")
+                self.failed = True
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            if _CLOSE in batch:
+                return
+
+    def flush(self):
+        """Wait until every submitted attempt has been written."""
+        self.queue.join()
+
+    def close(self):
+        """
+        Flush, stop the writer and remove the spool if everything reached the db.
+        Returns False if some attempts are only in the spool.
+        """
+        if self.closed:
+            return not self.failed
+
+        self.closed = True
+        self.queue.put(_CLOSE)
+        self.thread.join()
+
+        # the spool goes only once every row in it is known to be in the db,
+        # and is unlinked before its lock is released
+        if self.written != self.submitted:
+            self.failed = True
+
+        if self.failed:
+            print(f"\n### SYSTEM ERROR: some attempts could not be written. They are kept in {self.spool_file}")
+        else:
+            self.spool_file.unlink(missing_ok=True)
+
+        self.spool.close()
+        self.lock.release()
+
+        return not self.failed
@@ -0,0 +1,150 @@
+import json
+import re
+
+# Rough chars-per-token ratio. We only need a consistent estimate to compare
+# transcripts before and after compaction, not an exact tokenizer.
+CHARS_PER_TOKEN = 4
+
+def tool_call_fields(call):
+    """Return (id, arguments_json) for a tool call, whether it is an SDK object or a dict."""
+    if isinstance(call, dict):
+        return call["id"], call["function"]["arguments"]
+
+    return call.id, call.function.arguments
+
+def message_text(message):
+    """Everything in an OpenAI-style message that is sent to the model, as one string."""
+    parts = [str(message.get("content") or "")]
+
+    for call in message.get("tool_calls") or []:
+        parts.append(tool_call_fields(call)[1])
+
+    return "".join(parts)
+
+def estimate_tokens(messages):
+    return sum(len(message_text(m)) for m in messages) // CHARS_PER_TOKEN
+
+def remove_think_blocks(text):
+    """Strip inline <think>...</think> reasoning from a message."""
+    if text is None:
+        return text
+
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
+def drop_thinking(messages):
+    return [m | {"content": remove_think_blocks(m.get("content"))} if m["role"] == "assistant" else m
+            for m in messages]
+
+def format_example(arguments_json, output_json):
+    try:
+        arguments = json.loads(arguments_json)
+        args = [arguments[key] for key in sorted(arguments.keys())]
+        args_str = ", ".join(json.dumps(a) for a in args)
+    except (json.JSONDecodeError, AttributeError):
+        args_str = arguments_json
+
+    return f"({args_str}) → {output_json}"
+
+def collapse_tool_calls(messages):
+    """
+    Replace every assistant tool-call message and its tool results with a
+    single user message holding a compact table of the examples. The
+    assistant's commentary in-between tool calls is dropped.
+    """
+    compacted = []
+    examples = []
+    pending = {}  # tool_call_id -> arguments json
+    table_index = None
+
+    for message in messages:
+        if message["role"] == "assistant" and message.get("tool_calls"):
+            if table_index is None:
+                table_index = len(compacted)
+
+            for call in message["tool_calls"]:
+                call_id, arguments_json = tool_call_fields(call)
+                pending[call_id] = arguments_json
+
+        elif message["role"] == "tool":
+            arguments_json = pending.pop(message["tool_call_id"], "?")
+            examples.append(format_example(arguments_json, message["content"]))
+
+        else:
+            compacted.append(message)
+
+    if table_index is not None:
+        table = "\n".join(examples)
+        compacted.insert(table_index, {"role": "user", "content":
+                                       f"These are the results of your tests of the mystery function:\n\n{table}"})
+
+    return compacted
+
+def cap_tokens(messages, max_tokens):
+    """
+    Drop the oldest exchanges until the estimated size fits max_tokens. The
+    opening prompts and the final answer are always kept, and an assistant
+    tool call is only ever dropped together with its tool results.
+    """
+    head = [m for m in messages[:2] if m["role"] != "assistant"]
+    tail = messages[-1:]
+    middle = messages[len(head):-1]
+
+    # group each assistant message with the tool results that follow it
+    groups = []
+    for message in middle:
+        if message["role"] == "tool" and groups:
+            groups[-1].append(message)
+        else:
+            groups.append([message])
+
+    while groups and estimate_tokens(head + [m for g in groups for m in g] + tail) > max_tokens:
+        groups.pop(0)
+
+    return head + [m for g in groups for m in g] + tail
+
+def compact_transcript(policy, messages):
+    """
+    Apply a compaction policy to an OpenAI-style investigation transcript.
+
+    Args:
+        policy: dict with optional keys "drop-thinking" (bool), "tool-table" (bool)
+                and "max-tokens" (int)
+        messages: the investigation transcript
+
+    Returns:
+        list: a new, compacted list of messages. The input is not modified.
+    """
+    if policy.get("drop-thinking"):
+        messages = drop_thinking(messages)
+
+    if policy.get("tool-table"):
+        messages = collapse_tool_calls(messages)
+
+    if policy.get("max-tokens"):
+        messages = cap_tokens(messages, policy["max-tokens"])
+
+    return messages
+
+def compact_for_verification(config, messages, printer):
+    """
+    Compact the transcript according to the `verification-compaction` config
+    key, logging the estimated size before and after.
+
+    Returns:
+        tuple: (messages, meta) where meta records the policy and token counts
+               so accuracy can be compared between policies. meta is None if
+               no compaction is configured.
+    """
+    policy = config.get("verification-compaction")
+    if not policy:
+        return messages, None
+
+    tokens_before = estimate_tokens(messages)
+    messages = compact_transcript(policy, messages)
+    tokens_after = estimate_tokens(messages)
+
+    printer.print(f"\n### SYSTEM: compacted transcript for verification from ~{tokens_before} to ~{tokens_after} tokens")
+
+    return messages, {"compaction": {"policy": policy,
+                                     "tokens_before": tokens_before,
+                                     "tokens_after": tokens_after}}
@@ -0,0 +1,145 @@
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from . import events
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_estimate(estimate):
+    if estimate is None:
+        return "--:--:--"
+
+    expected, low, high = estimate
+    if low is None:
+        return format_duration(expected)
+
+    return f"{format_duration(expected)} (90% {format_duration(low)}-{format_duration(high)})"
+
+class Dashboard:
+    """
+    A single status view for headless runs, redrawn in place every
+    refresh_interval seconds from the run's events: attempts in flight by
+    phase, completed attempts and pass rate, LLM calls per second, throttled
+    keys and the estimated time remaining.
+
+    Given an EtaEstimator, the estimate comes from it, spread over the
+    attempts in flight, and is shown with its confidence band.
+    """
+
+    # calls per second are averaged over this many seconds
+    RATE_WINDOW = 60
+
+    # when output goes to a file the view is appended rather than redrawn, so less often
+    NON_TTY_REFRESH_INTERVAL = 30
+
+    def __init__(self, total_attempts, refresh_interval=1.0, out=None, estimator=None):
+        self.total_attempts = total_attempts
+        self.estimator = estimator
+        self.refresh_interval = refresh_interval
+        self.out = out or sys.stdout
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+
+        self.phases = {}  # attempt id -> current phase, for attempts in flight
+        self.completed = 0
+        self.passed = 0
+        self.calls = deque()  # times of recent LLM requests
+        self.throttled = {}  # lane -> monotonic time its backoff ends
+
+        self.drawn_lines = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def handle(self, event):
+        with self.lock:
+            attempt_id = event["attempt_id"]
+
+            if event["type"] == "attempt_start":
+                self.phases[attempt_id] = "starting"
+
+            elif event["type"] == "llm_request":
+                self.calls.append(event["t"])
+                if attempt_id in self.phases:
+                    self.phases[attempt_id] = event.get("phase") or "llm"
+
+            elif event["type"] == "backoff":
+                self.throttled[event["lane"]] = event["t"] + event["seconds"]
+
+            elif event["type"] == "attempt_done":
+                self.phases.pop(attempt_id, None)
+                self.completed += 1
+                self.passed += bool(event.get("result"))
+
+    def estimated_remaining(self, now):
+        """(expected, low, high) seconds remaining; low and high are None without an estimator."""
+        if self.estimator is not None:
+            return self.estimator.estimate()
+
+        if not self.completed:
+            return None
+
+        return (now - self.start_time) / self.completed * (self.total_attempts - self.completed), None, None
+
+    def render(self):
+        now = time.monotonic()
+
+        with self.lock:
+            while self.calls and self.calls[0] < now - self.RATE_WINDOW:
+                self.calls.popleft()
+
+            window = min(self.RATE_WINDOW, max(now - self.start_time, 1))
+            in_flight = Counter(self.phases.values())
+            throttled = {lane: until - now for lane, until in self.throttled.items() if until > now}
+            estimate = self.estimated_remaining(now)
+            pass_rate = f"{self.passed / self.completed:.0%}" if self.completed else "-"
+
+            return [
+                f"### SYSTEM: {self.completed}/{self.total_attempts} attempts complete, "
+                f"{self.passed} passed ({pass_rate})",
+                "in flight: " + (", ".join(f"{phase} {n}" for phase, n in sorted(in_flight.items())) or "none"),
+                f"LLM calls/sec: {len(self.calls) / window:.2f}",
+                "throttled: " + (", ".join(f"{lane} ({seconds:.0f}s)" for lane, seconds in sorted(throttled.items()))
+                                 or "none"),
+                f"elapsed {format_duration(now - self.start_time)}, est. {format_estimate(estimate)} remaining",
+            ]
+
+    def draw(self):
+        lines = self.render()
+
+        # move back up over the previous view and clear it
+        if self.drawn_lines and self.out.isatty():
+            self.out.write(f"\x1b[{self.drawn_lines}F\x1b[J")
+
+        self.out.write("\n".join(lines) + "\n")
+        self.out.flush()
+        self.drawn_lines = len(lines)
+
+    def run(self):
+        while not self.stopped.wait(self.refresh_interval):
+            self.draw()
+
+    def start(self):
+        if not self.out.isatty():
+            self.refresh_interval = max(self.refresh_interval, self.NON_TTY_REFRESH_INTERVAL)
+
+        events.subscribe(self.handle)
+        self.draw()
+
+        self.thread = threading.Thread(target=self.run, name="dashboard", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop refreshing, leaving the final view on screen."""
+        if self.stopped.is_set():
+            return
+
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        events.unsubscribe(self.handle)
+        self.draw()
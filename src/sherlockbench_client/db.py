@@ -0,0 +1,200 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extensions import connection as PsycopgConnection
+from psycopg2.pool import ThreadedConnectionPool
+
+# errors which mean the connection itself is gone rather than the query being bad
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+class PreparingConnection(PsycopgConnection):
+    """A connection which remembers the statements prepared on it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+class PreparedStatement:
+    """
+    A statement which is prepared server-side the first time it is used on a
+    connection and executed by name after that, so Postgres plans it once per
+    connection. Values always travel as parameters, never spliced into the SQL.
+
+    sql uses %s placeholders, one per entry in param_types. On connections
+    which didn't come from a ConnectionPool it is simply executed.
+    """
+
+    def __init__(self, name, sql, *param_types):
+        self.name = name
+        self.param_types = param_types
+        self.params = ", ".join(f"%s::{t}" for t in param_types)
+
+        positional = iter(f"${i}" for i in range(1, len(param_types) + 1))
+        self.plain_sql = sql % tuple(f"%s::{t}" for t in param_types)
+        self.prepare_sql = f"PREPARE {name} ({', '.join(param_types)}) AS " + sql % tuple(positional)
+
+    def execute(self, cursor, params):
+        prepared = getattr(cursor.connection, "prepared", None)
+
+        if prepared is None:
+            cursor.execute(self.plain_sql, params)
+            return
+
+        if self.name not in prepared:
+            cursor.execute(self.prepare_sql)
+            prepared.add(self.name)
+
+        cursor.execute(f"EXECUTE {self.name} ({self.params})", params)
+
+class ConnectionPool:
+    """
+    A thread-safe pool of Postgres connections.
+
+    Connections are checked out with `connection()` or `cursor()` and
+    returned when the block exits: committed if it succeeded, rolled back if
+    not, and discarded if the connection was lost so that the next checkout
+    opens a fresh one. A connection which has sat idle for longer than
+    health_check_interval seconds is pinged before it is handed out.
+    """
+
+    def __init__(self, postgres_url, minconn=1, maxconn=10, health_check_interval=30):
+        self.pool = ThreadedConnectionPool(minconn, maxconn, postgres_url,
+                                           connection_factory=PreparingConnection)
+        self.health_check_interval = health_check_interval
+        # ThreadedConnectionPool raises when exhausted; we'd rather wait
+        self.available = threading.BoundedSemaphore(maxconn)
+        self.last_used = {}
+
+    def healthy(self, conn):
+        if conn.closed:
+            return False
+
+        # a connection we haven't used yet was only just opened
+        last_used = self.last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    def getconn(self):
+        max_retries = 3
+        for retry in range(max_retries):
+            conn = self.pool.getconn()
+
+            if self.healthy(conn):
+                return conn
+
+            print("\n### SYSTEM: discarding a dropped db connection")
+            self.discard(conn)
+
+        # one more without a health check, so a down server raises here
+        return self.pool.getconn()
+
+    def discard(self, conn):
+        self.last_used.pop(id(conn), None)
+        self.pool.putconn(conn, close=True)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with block."""
+        with self.available:
+            conn = self.getconn()
+            broken = False
+
+            try:
+                yield conn
+                conn.commit()
+            except CONNECTION_ERRORS:
+                broken = True
+                raise
+            except BaseException:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                if broken or conn.closed:
+                    self.discard(conn)
+                else:
+                    self.last_used[id(conn)] = time.monotonic()
+                    self.pool.putconn(conn)
+
+    @contextmanager
+    def cursor(self):
+        """A cursor on a pooled connection, for the duration of a with block."""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+
+    def run(self, fn, *args, retries=1):
+        """
+        Call fn(cursor, *args), retrying on a fresh connection if the
+        connection drops mid-query. fn must be safe to repeat.
+        """
+        for retry in range(retries + 1):
+            try:
+                with self.cursor() as cursor:
+                    return fn(cursor, *args)
+            except CONNECTION_ERRORS:
+                if retry == retries:
+                    raise
+
+                print("\n### SYSTEM: db connection lost, retrying on a new connection")
+
+    def close(self):
+        self.pool.closeall()
+
+_pools = {}
+_pool_users = {}  # url -> how many holders get_pool has handed its pool to
+_pools_lock = threading.Lock()
+
+def get_pool(config):
+    """
+    The connection pool for config["postgres-url"], created on first use and
+    shared by everything in the process. The optional `db-pool` config key
+    sets min-connections, max-connections and health-check-interval.
+
+    A holder which is done before the process is can give the pool back with
+    release_pool(); otherwise close_pools() closes it at exit.
+    """
+    url = config["postgres-url"]
+
+    with _pools_lock:
+        if url not in _pools:
+            options = config.get("db-pool") or {}
+            _pools[url] = ConnectionPool(url,
+                                         minconn=options.get("min-connections", 1),
+                                         maxconn=options.get("max-connections", 10),
+                                         health_check_interval=options.get("health-check-interval", 30))
+
+        _pool_users[url] = _pool_users.get(url, 0) + 1
+        return _pools[url]
+
+def release_pool(pool):
+    """Give back a pool from get_pool. It is closed once no holder is left."""
+    with _pools_lock:
+        for url, shared in _pools.items():
+            if shared is pool:
+                _pool_users[url] -= 1
+                if _pool_users[url] > 0:
+                    return
+
+                del _pools[url], _pool_users[url]
+                break
+
+    pool.close()
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+        _pools.clear()
+        _pool_users.clear()
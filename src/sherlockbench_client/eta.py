@@ -0,0 +1,95 @@
+import math
+import statistics
+import threading
+
+class EtaEstimator:
+    """
+    Estimates the time remaining in a run, with a confidence band.
+
+    The model's attempt durations from earlier runs (see
+    Storage.duration_history) serve as a prior worth PRIOR_WEIGHT attempts,
+    so the estimate is sensible from the first attempt on. The durations of
+    this run's attempts take over as they finish. Attempts are assumed to be
+    spread evenly over the workers running them, by default as many as there
+    are attempts in flight.
+    """
+
+    # how many of this run's attempts the history is worth
+    PRIOR_WEIGHT = 5
+
+    # z-score of the confidence band; 1.645 gives 90%
+    Z = 1.645
+
+    def __init__(self, total_attempts, history=None):
+        """history is (count, mean, stddev) of earlier attempt durations, or None."""
+        self.total_attempts = total_attempts
+        self.history = history if history and history[0] > 1 else None
+        self.durations = []
+        self.in_flight = set()  # ids of the attempts started but not done
+        self.lock = threading.Lock()
+
+    def record(self, duration):
+        with self.lock:
+            self.durations.append(duration)
+
+    def handle(self, event):
+        """Event listener: follows the attempts in flight and records each one's time_taken as it finishes."""
+        with self.lock:
+            if event["type"] == "attempt_start":
+                self.in_flight.add(event["attempt_id"])
+            elif event["type"] == "attempt_done":
+                self.in_flight.discard(event["attempt_id"])
+            elif event["type"] == "run_failed":
+                self.in_flight.clear()
+
+        if event["type"] == "attempt_done" and event.get("time_taken") is not None:
+            self.record(event["time_taken"])
+
+    def distribution(self):
+        """(mean, variance) of an attempt's duration and how many attempts they're based on, or None."""
+        with self.lock:
+            durations = list(self.durations)
+
+        n = len(durations)
+        live_mean = statistics.fmean(durations) if n else 0
+        live_variance = statistics.variance(durations) if n > 1 else 0
+
+        if self.history:
+            count, history_mean, history_stddev = self.history
+            k = min(self.PRIOR_WEIGHT, count)
+
+            # pooled, as if the history were k attempts of this run
+            live_dof = max(n - 1, 0)
+            mean = (k * history_mean + n * live_mean) / (k + n)
+            variance = ((k - 1) * history_stddev ** 2 + live_dof * live_variance) / (k - 1 + live_dof)
+            return mean, variance, k + n
+
+        if n == 0:
+            return None
+
+        # one attempt says little about the spread, so assume it's as large as the mean
+        return live_mean, live_variance if n > 1 else live_mean ** 2, n
+
+    def estimate(self, workers=None):
+        """
+        (expected, low, high) seconds remaining for the attempts which haven't
+        finished, or None before there is anything to go on. workers defaults
+        to the number of attempts in flight.
+        """
+        distribution = self.distribution()
+        if distribution is None:
+            return None
+
+        mean, variance, weight = distribution
+        remaining = max(self.total_attempts - len(self.durations), 0)
+        if workers is None:
+            with self.lock:
+                workers = len(self.in_flight)
+
+        workers = max(workers, 1)
+
+        # the spread of the durations themselves, plus the uncertainty in the mean
+        stddev = math.sqrt(remaining * variance + remaining ** 2 * variance / weight) / workers
+        expected = remaining * mean / workers
+
+        return expected, max(expected - self.Z * stddev, 0), expected + self.Z * stddev
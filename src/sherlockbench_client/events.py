@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_EVENTS_DIR = "resources/events"
+
+EVENT_TYPES = ("run_start", "attempt_start", "llm_request", "llm_response", "tool_call", "verification", "backoff",
+               "attempt_done", "db_write", "server_request", "run_failed")
+
+def make_event(event_type, attempt_id=None, **fields):
+    return {"type": event_type, "t": time.monotonic(), "attempt_id": attempt_id} | fields
+
+class EventStream:
+    """
+    Typed events from a run, one compact JSON object per line, for analytics
+    and replay tools which would otherwise have to parse complete_log.
+
+    Every event has a "type" from EVENT_TYPES, "t" (seconds on the monotonic
+    clock) and "attempt_id" (None for run-wide events). The run_start event
+    also records the wall clock time, so that t can be converted.
+    """
+
+    def __init__(self, path, run_id):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.file = open(self.path, "a")
+
+        self.emit("run_start", run_id=str(run_id), wall_time=time.time())
+
+    @classmethod
+    def for_run(cls, config, run_id):
+        """The stream for a run, in the optional `events` config's dir."""
+        options = config.get("events") or {}
+        events_dir = options.get("dir", DEFAULT_EVENTS_DIR)
+
+        return cls(Path(events_dir) / f"{run_id}.jsonl", run_id)
+
+    def emit(self, event_type, attempt_id=None, **fields):
+        self.write(make_event(event_type, attempt_id, **fields))
+
+    def write(self, event):
+        line = json.dumps(event, separators=(",", ":"), default=str)
+
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(line + "\n")
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def read_events(path):
+    """The events in a stream file. A line cut short by a crash is ignored."""
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                pass
+
+# When set, emit() writes to this EventStream
+_event_stream = None
+
+def use_event_stream(stream):
+    """Send events to an EventStream, or pass None to stop."""
+    global _event_stream
+    _event_stream = stream
+
+# functions called with every event, e.g. the headless dashboard
+_listeners = []
+
+def subscribe(listener):
+    _listeners.append(listener)
+
+def unsubscribe(listener):
+    _listeners.remove(listener)
+
+def emit(event_type, attempt_id=None, **fields):
+    """Emit an event to the current run's stream and listeners, if there are any."""
+    stream = _event_stream
+    if stream is None and not _listeners:
+        return
+
+    event = make_event(event_type, attempt_id, **fields)
+
+    if stream is not None:
+        stream.write(event)
+
+    # a broken listener must not break the run, so it is logged and detached
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception as e:
+            print(f"\n### SYSTEM ERROR: event listener {listener!r} failed on {event_type} and was unsubscribed: {e!r}")
+            if listener in _listeners:
+                _listeners.remove(listener)
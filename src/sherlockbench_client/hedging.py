@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, TimeoutError, wait, FIRST_COMPLETED
+
+class LatencyTracker:
+    """A window of recent successful call latencies for each phase."""
+
+    def __init__(self, window=50):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, phase, seconds):
+        with self.lock:
+            self.latencies[phase].append(seconds)
+
+    def percentile(self, phase, percent, min_samples):
+        """The given percentile of recent latencies, or None until there are min_samples of them."""
+        with self.lock:
+            samples = sorted(self.latencies[phase])
+
+        if len(samples) < min_samples:
+            return None
+
+        return samples[int(percent / 100 * (len(samples) - 1))]
+
+def spawn(fn, *args):
+    """
+    Run fn on a new daemon thread and return a Future for its result. There
+    is no bounded pool: a request which hangs must not hold up later calls.
+    """
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="hedge", daemon=True).start()
+    return future
+
+class Hedger:
+    """
+    Issue a duplicate request when a call runs past the recent latency
+    percentile for its phase, and take whichever returns first.
+
+    Configured with the model's `hedging` config:
+        percentile:         latency percentile that triggers a hedge (default 95)
+        min-samples:        calls per phase to observe before hedging (default 10)
+        max-extra-fraction: hedges allowed as a fraction of all calls (default 0.1)
+        window:             recent latencies kept per phase (default 50)
+    """
+
+    def __init__(self, hedging_config):
+        self.percent = hedging_config.get("percentile", 95)
+        self.min_samples = hedging_config.get("min-samples", 10)
+        self.max_extra_fraction = hedging_config.get("max-extra-fraction", 0.1)
+        self.tracker = LatencyTracker(hedging_config.get("window", 50))
+        self.lock = threading.Lock()
+        self.call_count = 0
+        self.hedge_count = 0
+
+    def timed(self, phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.tracker.record(phase, time.perf_counter() - start)
+        return result
+
+    def reserve_hedge(self):
+        """Spend from the hedging budget, if there is any left."""
+        with self.lock:
+            if self.hedge_count + 1 > self.max_extra_fraction * self.call_count:
+                return False
+
+            self.hedge_count += 1
+            return True
+
+    def call(self, phase, fn, hedge_fn, on_abandoned, prepare_hedge=None):
+        """
+        Call fn, hedging with hedge_fn if it runs long.
+
+        :param fn: the request
+        :param hedge_fn: the duplicate request
+        :param on_abandoned: called with the result of a request which lost the race
+        :param prepare_hedge: called before the duplicate request is timed, e.g. to wait
+                              for the rate limit. Its result is passed to hedge_fn.
+        """
+        with self.lock:
+            self.call_count += 1
+
+        threshold = self.tracker.percentile(phase, self.percent, self.min_samples)
+
+        # until we have seen enough calls there is nothing to compare against
+        if threshold is None:
+            return self.timed(phase, fn)
+
+        primary = spawn(self.timed, phase, fn)
+
+        try:
+            return primary.result(timeout=threshold)
+        except TimeoutError:
+            pass
+
+        if not self.reserve_hedge():
+            return primary.result()
+
+        def run_hedge():
+            # only the request itself is timed, not any wait for the rate limit
+            if prepare_hedge is None:
+                return self.timed(phase, hedge_fn)
+
+            prepared = prepare_hedge()
+            return self.timed(phase, lambda: hedge_fn(prepared))
+
+        hedge = spawn(run_hedge)
+
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    # an SDK call can't be cancelled, so the loser is left to finish on its own thread
+                    for loser in pending:
+                        loser.add_done_callback(lambda f: f.exception() is None and on_abandoned(f.result()))
+
+                    return future.result()
+
+                first_error = first_error or future.exception()
+
+        raise first_error
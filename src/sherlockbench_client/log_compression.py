@@ -0,0 +1,81 @@
+import threading
+
+import zstandard as zstd
+from psycopg2 import Binary
+
+DEFAULT_LEVEL = 9
+
+# zstd's default dictionary size. The logs are highly repetitive (prompts,
+# ### SYSTEM: lines, tool call boilerplate) so this is plenty.
+DICTIONARY_SIZE = 112 * 1024
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """Train a zstd dictionary from a list of attempt logs."""
+    return zstd.train_dictionary(size, [s.encode() for s in samples]).as_bytes()
+
+class LogCodec:
+    """
+    Compresses attempt logs for the complete_log_zstd column, using the
+    shared dictionary from the log_dictionaries table when there is one.
+    """
+
+    def __init__(self, dictionary_id=None, dictionary=None, level=DEFAULT_LEVEL):
+        self.dictionary_id = dictionary_id
+        dict_data = zstd.ZstdCompressionDict(dictionary) if dictionary else None
+        self.compressor = zstd.ZstdCompressor(level=level, dict_data=dict_data)
+        # a ZstdCompressor can't be used from two threads at once
+        self.lock = threading.Lock()
+
+    def compress(self, text):
+        with self.lock:
+            return self.compressor.compress(text.encode())
+
+    def compress_row(self, row):
+        """An attempt row with its complete_log moved into complete_log_zstd."""
+        if row.get("complete_log") is None:
+            return row
+
+        return row | {"complete_log": None,
+                      "complete_log_zstd": Binary(self.compress(row["complete_log"])),
+                      "log_dictionary_id": self.dictionary_id}
+
+def latest_codec(cursor, level=DEFAULT_LEVEL):
+    """A LogCodec using the most recently trained dictionary."""
+    cursor.execute("SELECT id, dictionary FROM log_dictionaries ORDER BY id DESC LIMIT 1")
+    result = cursor.fetchone()
+
+    if not result:
+        return LogCodec(level=level)
+
+    dictionary_id, dictionary = result
+    return LogCodec(dictionary_id, bytes(dictionary), level)
+
+# dictionaries never change once stored, so they are cached for the process
+_dictionaries = {}
+
+def load_dictionary(cursor, dictionary_id):
+    if dictionary_id not in _dictionaries:
+        cursor.execute("SELECT dictionary FROM log_dictionaries WHERE id = %s", (dictionary_id,))
+        _dictionaries[dictionary_id] = zstd.ZstdCompressionDict(bytes(cursor.fetchone()[0]))
+
+    return _dictionaries[dictionary_id]
+
+def decompress_log(data, dictionary=None):
+    return zstd.ZstdDecompressor(dict_data=dictionary).decompress(bytes(data)).decode()
+
+def read_log(cursor, complete_log, complete_log_zstd, log_dictionary_id):
+    """
+    The text of an attempt's log, whichever way it was stored.
+
+    Args:
+        cursor: Database cursor, to fetch the dictionary if needed
+        complete_log, complete_log_zstd, log_dictionary_id: the attempt's columns
+
+    Returns:
+        str: the log, or None if the attempt has none
+    """
+    if complete_log_zstd is None:
+        return complete_log
+
+    dictionary = load_dictionary(cursor, log_dictionary_id) if log_dictionary_id is not None else None
+    return decompress_log(complete_log_zstd, dictionary)
@@ -5,11 +5,19 @@ import copy
 import requests
 import shutil
 import textwrap
+import threading
+import httpx
+from pathlib import Path
+from functools import partial
+from contextlib import contextmanager, nullcontext
 from requests import HTTPError
-from pydantic import BaseModel
-from typing import Callable
 from datetime import datetime
-from openai import OpenAI, APITimeoutError, InternalServerError, BadRequestError
+from openai import OpenAI, DefaultHttpxClient, APITimeoutError, InternalServerError, BadRequestError, RateLimitError
+
+from .structured_output import make_schema
+from .hedging import Hedger
+from . import events
+from .dashboard import format_duration, format_estimate
 
 def load_config(filepath):
     with open(filepath, "r") as file:
@@ -34,6 +42,40 @@ def load_provider_config(provider, model_name):
 
     return config_non_sensitive, config
 
+def api_keys(config, provider):
+    """The API keys for a provider. credentials.yaml may hold a single key or a list of them."""
+    keys = config['api-keys'][provider]
+
+    return keys if isinstance(keys, list) else [keys]
+
+def load_endpoints(config, provider, default_base_url):
+    """
+    The endpoints to spread an OpenAI-compatible provider's traffic over.
+
+    A model's config may list `endpoints`, each with a `base-url` and optionally
+    a `weight`, a `model` name and a `rate-limit` for that endpoint, and
+    `credentials`: which entry under api-keys in credentials.yaml to use (by
+    default the provider's own). Without `endpoints` the provider's default
+    base URL is used. Each endpoint is expanded to one entry per API key.
+    """
+    endpoints = config.get("endpoints") or [{"base-url": default_base_url}]
+
+    expanded = []
+    for endpoint in endpoints:
+        keys = api_keys(config, endpoint.get("credentials", provider))
+
+        for i, key in enumerate(keys, 1):
+            name = endpoint["base-url"] if len(keys) == 1 else f"{endpoint['base-url']} (key {i}/{len(keys)})"
+
+            expanded.append({"name": name,
+                             "base-url": endpoint["base-url"],
+                             "api-key": key,
+                             "weight": endpoint.get("weight", 1),
+                             "model": endpoint.get("model", config["model"]),
+                             "rate-limit": endpoint.get("rate-limit", config["rate-limit"])})
+
+    return expanded
+
 def destructure(dictionary, *keys):
     """it boggles my mind that Python doesn't have destructuring"""
     return (dictionary[key] for key in keys)
@@ -42,7 +84,10 @@ def post(base_url, run_id, path, data):
     data["run-id"] = run_id
 
     try:
+        start = time.perf_counter()
         response = requests.post(base_url + path, json=data)
+        events.emit("server_request", data.get("attempt-id"), path=path, status=response.status_code,
+                    latency=time.perf_counter() - start)
         response.raise_for_status()
     except HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -85,163 +130,610 @@ def prompt_continue(config, key):
                 case _:
                     print("Please enter 'y' for yes or 'n' for no.")
 
-class AccumulatingPrinter:
+DEFAULT_ATTEMPT_LOG_DIR = "resources/attempt-logs"
+
+# In headless mode transcripts aren't printed; the dashboard shows progress instead
+_headless = False
+
+def set_headless(enabled):
+    global _headless
+    _headless = enabled
+
+class MemoryLogSink:
+    """Keeps the log in memory, as a list of chunks joined when it is read."""
+
     def __init__(self):
-        # Initialize the internal "megastring"
-        self.megastring = ""
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(text)
+
+    def read(self):
+        log = "".join(self.chunks)
+        self.chunks = [log]
+
+        return log
+
+    def detach(self):
+        return None
+
+    def close(self):
+        pass
+
+class FileLogSink:
+    """
+    Appends the log to a file as it is printed, so an attempt's log isn't held
+    in memory and a crash leaves the partial log behind. The file is removed
+    on close() unless keep is set.
+    """
+
+    def __init__(self, path, keep=False):
+        self.path = Path(path)
+        self.keep = keep
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # a retried attempt starts a new log; the interrupted one is kept aside
+        if self.path.exists():
+            self.path.replace(self.path.with_suffix(".interrupted.log"))
+
+        self.file = open(self.path, "w")
+
+    def write(self, text):
+        self.file.write(text)
+        self.file.flush()
+
+    def read(self):
+        return self.path.read_text()
+
+    def detach(self):
+        """Close the file and hand it over: (path, whether to remove it once stored)."""
+        self.file.close()
+        return str(self.path), not self.keep
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        self.file.close()
+        if not self.keep:
+            self.path.unlink(missing_ok=True)
+
+class AccumulatingPrinter:
+    """
+    Prints the attempt's output and keeps a copy of it as the attempt log,
+    in memory or in a file per attempt depending on the sink.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink or MemoryLogSink()
+        self.wrapper = None
+        self.echo = not _headless
+
+    @classmethod
+    def for_attempt(cls, config, attempt_id):
+        """
+        A printer streaming the attempt's log to a file. The optional
+        `attempt-logs` config sets the dir, and keep to leave the files
+        behind once the attempts are stored.
+        """
+        options = config.get("attempt-logs") or {}
+        log_dir = Path(options.get("dir", DEFAULT_ATTEMPT_LOG_DIR))
+
+        return cls(FileLogSink(log_dir / f"{attempt_id}.log", keep=options.get("keep", False)))
 
     def print(self, *args):
         """
-        Prints the concatenated string from the arguments and appends it to the megastring.
+        Prints the concatenated string from the arguments and appends it to the log.
         """
         # Concatenate arguments with spaces
         concatenated_string = " ".join(str(arg) for arg in args)
 
         # Print the concatenated string
-        print(concatenated_string)
+        if self.echo:
+            print(concatenated_string)
 
-        # Append the concatenated string to the megastring
-        self.megastring += concatenated_string + "\n"
+        self.sink.write(concatenated_string + "\n")
 
     def indented_print(self, *args):
         """
         Prints an indented and wrapped version of the concatenated string from the arguments,
-        and appends it to the megastring, preserving input newlines.
+        and appends it to the log, preserving input newlines.
         """
         # Concatenate arguments with spaces
         concatenated_string = " ".join(str(arg) for arg in args)
 
-        # Get terminal width and calculate wrap width
-        terminal_width = shutil.get_terminal_size((80, 20)).columns
-        wrap_width = max(terminal_width - 5, 10)  # Ensure wrap width isn't too narrow
-
-        # Split the string into lines to preserve existing newlines
-        lines = concatenated_string.splitlines()
-        wrapped_lines = []
-        for line in lines:
-            # Wrap each line individually and prepend indentation
-            wrapped_lines.append(textwrap.fill(line, width=wrap_width, subsequent_indent="  ", initial_indent="  "))
+        # The wrap width comes from the terminal size when the printer is first
+        # used; looking it up on every call is surprisingly expensive.
+        if self.wrapper is None:
+            terminal_width = shutil.get_terminal_size((80, 20)).columns
+            wrap_width = max(terminal_width - 5, 10)  # Ensure wrap width isn't too narrow
+            self.wrapper = textwrap.TextWrapper(width=wrap_width, subsequent_indent="  ", initial_indent="  ")
 
-        # Combine wrapped lines back into a single string
-        indented_string = "\n".join(wrapped_lines)
+        # Wrap each line individually to preserve existing newlines
+        indented_string = "\n".join(self.wrapper.fill(line) for line in concatenated_string.splitlines())
 
-        # Print the indented string
-        print(indented_string)
+        # Print the indented string. The log is the same with or without --headless.
+        if self.echo:
+            print(indented_string)
 
-        # Append the indented string to the megastring
-        self.megastring += indented_string + "\n"
+        self.sink.write(indented_string + "\n")
 
     def retrieve(self):
         """
-        Returns the accumulated megastring.
+        Returns the accumulated log.
+        """
+        return self.sink.read()
+
+    def detach_log(self):
+        """
+        Finish the log and hand over its file, for reading when the attempt is
+        stored. Returns (path, remove) or None if the log isn't in a file.
+        """
+        return self.sink.detach()
+
+    def close(self):
+        """Called once the attempt, log included, has been handed to the storage."""
+        self.sink.close()
+
+def completion_token_usage(completion):
+    """
+    Pull (input_tokens, output_tokens) out of a completion from any of the provider SDKs.
+    Missing or unknown usage information counts as zero.
+    """
+    usage = getattr(completion, "usage", None)
+
+    if usage is not None:
+        # OpenAI and the OpenAI-compatible providers
+        if hasattr(usage, "prompt_tokens"):
+            return (usage.prompt_tokens or 0, usage.completion_tokens or 0)
+
+        # Anthropic
+        if hasattr(usage, "input_tokens"):
+            return (usage.input_tokens or 0, usage.output_tokens or 0)
+
+    # Google
+    usage = getattr(completion, "usage_metadata", None)
+    if usage is not None:
+        return (usage.prompt_token_count or 0, usage.candidates_token_count or 0)
+
+    return (0, 0)
+
+class AttemptUsage:
+    """
+    Counts the LLM calls and tokens spent by one attempt, across every
+    completion function it uses, and times its phases.
+
+    Timings are nested spans measured with time.perf_counter from when the
+    attempt started: {"name", "start", "duration", **fields, "spans": [...]},
+    in seconds. The LLM rate limiter and record_tool_calls add spans for each
+    LLM call and server request; executors add them for their phases.
+    """
+
+    def __init__(self, attempt_id=None):
+        self.attempt_id = attempt_id
+        self.lock = threading.Lock()
+        self.call_count = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_calls = []
+
+        self.started = time.perf_counter()
+        self.spans = []  # top-level spans
+        self.open_spans = []  # the innermost span is last
+
+    def record_call(self):
+        with self.lock:
+            self.call_count += 1
+
+    def record_tokens(self, input_tokens, output_tokens):
+        with self.lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def begin_span(self, name, **fields):
+        span = {"name": name, "start": round(self.elapsed(), 4)} | fields
+
+        with self.lock:
+            parent = self.open_spans[-1]["spans"] if self.open_spans else self.spans
+            parent.append(span)
+
+            span["spans"] = []
+            self.open_spans.append(span)
+
+        return span
+
+    def end_span(self, name):
+        """End the innermost open span called name, and any opened inside it. A name that isn't open is ignored."""
+        with self.lock:
+            if not any(span["name"] == name for span in self.open_spans):
+                return
+
+            while self.open_spans:
+                span = self.open_spans.pop()
+                span["duration"] = round(self.elapsed() - span["start"], 4)
+
+                if not span["spans"]:
+                    del span["spans"]
+
+                if span["name"] == name:
+                    return
+
+    @contextmanager
+    def span(self, name, **fields):
+        span = self.begin_span(name, **fields)
+        try:
+            yield span
+        except BaseException as e:
+            with self.lock:
+                span["error"] = type(e).__name__
+            raise
+        finally:
+            self.end_span(name)
+
+    def span_tree(self):
+        """The whole attempt as one span, for attempts.meta."""
+        with self.lock:
+            spans = copy.deepcopy(self.spans)
+
+        return {"name": "attempt", "start": 0, "duration": round(self.elapsed(), 4), "spans": spans}
+
+    def record_tool_calls(self, postfn):
         """
-        return self.megastring
+        Wrap postfn so that the attempt's calls to the mystery function are
+        recorded, and every request to the server is timed. Each verification
+        is a span from fetching its inputs to submitting the prediction. Tool
+        calls and verifications are also emitted as events.
+        """
+
+        def recording_postfn(path, data, *args):
+            if path == "attempt-verification":
+                with self.span("server", path=path):
+                    response = postfn(path, data, *args)
+
+                self.end_span("verification")
+                events.emit("verification", self.attempt_id,
+                            prediction=data.get("prediction"), status=response.get("status"))
+                return response
+
+            if path != "test-function":
+                with self.span("server", path=path):
+                    response = postfn(path, data, *args)
+
+                if path == "next-verification" and response:
+                    self.begin_span("verification")
+
+                return response
+
+            with self.span("tool_call"):
+                start = time.perf_counter()
+                response = postfn(path, data, *args)
+                latency = time.perf_counter() - start
+
+            call = {"args": data["args"],
+                    "output": response.get("output"),
+                    "error": response.get("error"),
+                    "latency": latency}
+
+            with self.lock:
+                self.tool_calls.append(call)
+
+            events.emit("tool_call", self.attempt_id, **call)
+
+            return response
+
+        return recording_postfn
 
-def make_schema(output_type):
-    mapping = {
-        "string": str,
-        "integer": int,
-        "boolean": bool,
-        "float": float
-    }
+    def as_dict(self):
+        return {"api_calls": self.call_count,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens}
 
-    class Prediction(BaseModel):
-        """Prediction of the function output."""
+def no_span(name, **fields):
+    """Stands in for AttemptUsage.span when a call isn't credited to an attempt."""
+    return nullcontext()
 
-        thoughts: str
-        expected_output: mapping.get(output_type)
+def exception_matches(e, exception_type):
+    if isinstance(exception_type, type):
+        return isinstance(e, exception_type)
 
-    return Prediction
+    return exception_type(e)
+
+class Lane:
+    """
+    Pacing, throttling and accounting for one route to the model: an API key,
+    or an endpoint of an OpenAI-compatible provider.
+
+    :param weight: Relative share of the traffic this lane should carry.
+    :param health_check: Optional callable which raises if the lane is down.
+    """
+
+    def __init__(self, name, llmfn, rate_limit_seconds, weight=1, health_check=None):
+        self.name = name
+        self.llmfn = llmfn
+        self.rate_limit_seconds = rate_limit_seconds
+        self.weight = weight
+        self.health_check = health_check
+        self.healthy = True
+        self.next_call_time = 0.0
+        self.throttled_until = 0.0
+        self.outstanding = 0
+        self.call_count = 0
+        self.throttle_count = 0
+
+    def available_at(self):
+        return max(self.next_call_time, self.throttled_until)
+
+    def load(self):
+        return (self.outstanding + 1) / self.weight
 
 class LLMRateLimiter:
-    def __init__(self, rate_limit_seconds: int, llmfn: Callable, backoff_exceptions: list):
+    def __init__(self, rate_limit_seconds: int, llmfn, backoff_exceptions: list, hedging: dict = None,
+                 health_check_interval: int = 30, provider: str = None, model: str = None):
         """
         Initialize the RateLimiter.
 
-        :param rate_limit_seconds: The initial number of seconds for the rate limit.
+        A single instance is shared by every attempt in a run, so the pacing
+        and the counters are guarded by a lock.
+
+        :param rate_limit_seconds: The initial number of seconds for the rate limit, per API key.
+        :param llmfn: The completion function, or a list of them: one per API key, or Lane
+                      objects for weighted endpoints. Each is paced separately and is taken
+                      out of rotation while it backs off or fails its health check.
         :param backoff_exceptions: List of tuples, each containing (exception_type, backoff_seconds).
+                                   exception_type may instead be a function of the exception
+                                   which says whether it matches, e.g. to check a status code.
+        :param hedging: Optional hedging config (see Hedger). Slow calls get a duplicate request.
+        :param health_check_interval: Seconds between health checks of lanes which have one.
+        :param provider: Provider named in this limiter's events, if it isn't the run's.
+        :param model: Model named in this limiter's events, if it isn't the run's.
         """
-        self.llmfn = llmfn
+        llmfns = llmfn if isinstance(llmfn, list) else [llmfn]
+
+        self.lanes = [fn if isinstance(fn, Lane) else Lane(f"key {i}/{len(llmfns)}", fn, rate_limit_seconds)
+                      for i, fn in enumerate(llmfns, 1)]
+        self.hedger = Hedger(hedging) if hedging else None
         self.backoff_exceptions = backoff_exceptions
-        self.rate_limit_seconds = rate_limit_seconds
-        self.last_call_time = None
+        self.provider = provider
+        self.model = model
+        self.lock = threading.Lock()
         self.total_call_count = 0
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+
+        if any(lane.health_check for lane in self.lanes):
+            threading.Thread(target=self.health_check_loop, args=(health_check_interval,),
+                             daemon=True).start()
 
-    def handle_call(self, llmfn, *args, **kwargs):
+    def health_check_loop(self, interval):
+        while True:
+            time.sleep(interval)
+
+            for lane in self.lanes:
+                if lane.health_check is None:
+                    continue
+
+                try:
+                    lane.health_check()
+                    healthy = True
+                except Exception:
+                    healthy = False
+
+                if healthy != lane.healthy:
+                    print(f"\n### SYSTEM: {lane.name} is {'back up' if healthy else 'down'}")
+
+                lane.healthy = healthy
+
+    def wait_for_lane(self):
         """
-        Call the LLM while enforcing the rate limit.
+        Reserve a call slot and sleep until it arrives. Of the lanes which are
+        free now, the least loaded relative to its weight is used; otherwise
+        whichever is free soonest. Concurrent callers are handed consecutive
+        slots rather than all firing at once.
         """
+        with self.lock:
+            current_time = time.time()
+            candidates = [lane for lane in self.lanes if lane.healthy] or self.lanes
+            ready = [lane for lane in candidates if lane.available_at() <= current_time]
+
+            if ready:
+                lane = min(ready, key=Lane.load)
+            else:
+                lane = min(candidates, key=Lane.available_at)
+
+            call_time = max(current_time, lane.available_at())
+            lane.next_call_time = call_time + lane.rate_limit_seconds
+            lane.call_count += 1
+            lane.outstanding += 1
+
+        sleep_time = call_time - current_time
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+
+        return lane
+
+    def release(self, lane):
+        with self.lock:
+            lane.outstanding -= 1
+
+    def throttle(self, lane, backoff_time):
+        """Take a key out of rotation for backoff_time and slow it down."""
+        with self.lock:
+            lane.throttled_until = time.time() + backoff_time
+            lane.rate_limit_seconds += 1
+            lane.throttle_count += 1
 
-        self.total_call_count += 1
+    def record_usage(self, completion, usage=None):
+        input_tokens, output_tokens = completion_token_usage(completion)
 
-        current_time = time.time()
-        if self.last_call_time is not None:
-            elapsed_time = current_time - self.last_call_time
-            sleep_time = self.rate_limit_seconds - elapsed_time
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+        with self.lock:
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
 
-        max_retries = 3
-        for retry in range(max_retries):
+        if usage is not None:
+            usage.record_tokens(input_tokens, output_tokens)
+
+        return input_tokens, output_tokens
+
+    def count_call(self, usage):
+        with self.lock:
+            self.total_call_count += 1
+
+        if usage is not None:
+            usage.record_call()
+
+    def call_llm(self, lane, phase, usage, args, kwargs):
+        """
+        Make one request, hedged if hedging is configured. The lane is
+        released when its request finishes, so a request which lost to its
+        hedge still counts against the lane until then.
+        """
+        def request():
             try:
-                # Call the function
-                self.last_call_time = time.time()
-                return llmfn(*args, **kwargs)
+                return lane.llmfn(*args, **kwargs)
+            finally:
+                self.release(lane)
 
-            except Exception as e:
-                # Check if this exception matches any of our configured exception-backoff pairs
-                backoff_time = None
-                for exception_type, backoff_seconds in self.backoff_exceptions:
-                    if isinstance(e, exception_type):
-                        backoff_time = backoff_seconds
-                        break
+        if self.hedger is None:
+            return request()
 
-                # If no matching exception found, re-raise immediately
-                if backoff_time is None:
-                    raise
+        def prepare_hedge():
+            # a duplicate is a real call: count it and respect the pacing.
+            # With several keys it will usually go out on a different one.
+            if not _headless:
+                print(f"\n### SYSTEM: slow {phase or 'default'} call, issuing a hedged request")
 
-                print()
-                print(e)
+            self.count_call(usage)
+            return self.wait_for_lane()
 
-                self.rate_limit_seconds += 1
-                print(f"\n### SYSTEM: backing off for {backoff_time} seconds and increasing rate limit to {self.rate_limit_seconds} seconds (retry {retry+1}/{max_retries})")
+        def hedge(hedge_lane):
+            try:
+                return hedge_lane.llmfn(*args, **kwargs)
+            finally:
+                self.release(hedge_lane)
+
+        return self.hedger.call(phase or "default", request, hedge,
+                                on_abandoned=lambda completion: self.record_usage(completion, usage),
+                                prepare_hedge=prepare_hedge)
+
+    def handle_call(self, *args, usage=None, phase=None, **kwargs):
+        """
+        Call the LLM while enforcing the rate limit.
 
-                # If this was the last retry, re-raise the exception
-                if retry == max_retries - 1:
-                    raise
+        :param usage: Optional AttemptUsage which is credited with this call.
+        :param phase: Which phase of the attempt this call is for. Hedging thresholds are per-phase.
+        """
 
-                time.sleep(backoff_time)
+        self.count_call(usage)
+        attempt_id = usage.attempt_id if usage is not None else None
+        span = usage.span if usage is not None else no_span
+
+        with span("llm", phase=phase):
+            max_retries = 3
+            for retry in range(max_retries):
+                # includes any sleep for the rate limit or a backoff
+                wait_start = time.perf_counter()
+                with span("wait"):
+                    lane = self.wait_for_lane()
+
+                events.emit("llm_request", attempt_id, phase=phase, lane=lane.name, retry=retry,
+                            messages=len(kwargs.get("messages") or []), wait=time.perf_counter() - wait_start,
+                            provider=self.provider, model=self.model)
+
+                try:
+                    # Call the function
+                    start = time.monotonic()
+                    with span("request", lane=lane.name):
+                        completion = self.call_llm(lane, phase, usage, args, kwargs)
+
+                    input_tokens, output_tokens = self.record_usage(completion, usage)
+                    events.emit("llm_response", attempt_id, phase=phase, lane=lane.name,
+                                latency=time.monotonic() - start, input_tokens=input_tokens, output_tokens=output_tokens,
+                                provider=self.provider, model=self.model)
+                    return completion
+
+                except Exception as e:
+                    # Check if this exception matches any of our configured exception-backoff pairs
+                    backoff_time = None
+                    for exception_type, backoff_seconds in self.backoff_exceptions:
+                        if exception_matches(e, exception_type):
+                            backoff_time = backoff_seconds
+                            break
+
+                    # If no matching exception found, re-raise immediately
+                    if backoff_time is None:
+                        raise
+
+                    self.throttle(lane, backoff_time)
+                    events.emit("backoff", attempt_id, lane=lane.name, seconds=backoff_time, retry=retry,
+                                error=type(e).__name__)
+
+                    if not _headless:
+                        print()
+                        print(e)
+                        print(f"\n### SYSTEM: backing off {lane.name} for {backoff_time} seconds and increasing its rate limit to {lane.rate_limit_seconds} seconds (retry {retry+1}/{max_retries})")
+
+                    # If this was the last retry, re-raise the exception
+                    if retry == max_retries - 1:
+                        raise
+
+                    # the retry goes to another lane if one is free, otherwise waits out the backoff
+
+    def for_attempt(self, usage, phase=None):
+        """Return a completion function which shares this limiter but credits calls to `usage`."""
+        return partial(self.handle_call, usage=usage, phase=phase)
 
     def __call__(self, *args, **kwargs):
-        return self.handle_call(self.llmfn, *args, **kwargs)
+        return self.handle_call(*args, **kwargs)
 
 def value_list_to_map(xs):
     """take a vector and return map with alphabetical keys"""
     keys = [chr(97 + i) for i in range(len(xs))]  # Generate keys: 'a', 'b', 'c', etc.
     return dict(zip(keys, xs))
 
+# When set, print_progress_with_estimate asks this EtaEstimator for the time remaining
+_eta_estimator = None
+
+def use_eta_estimator(estimator):
+    """Estimate progress with an EtaEstimator, or pass None for the plain mean."""
+    global _eta_estimator
+    _eta_estimator = estimator
+
 def print_progress_with_estimate(current_index, total_count, start_time):
     """Print progress with estimated time remaining"""
+    if _headless:
+        return
+
     current_time = datetime.now()
     elapsed = (current_time - start_time).total_seconds()
 
-    if current_index > 1:
+    # spread over the attempts in flight, as the headless dashboard's is
+    estimate = _eta_estimator.estimate() if _eta_estimator is not None else None
+
+    if estimate is not None:
+        time_str = f" (est. {format_estimate(estimate)} remaining)"
+    elif current_index > 1:
         avg_time_per_item = elapsed / (current_index - 1)
         remaining_items = total_count - current_index + 1
-        estimated_remaining = avg_time_per_item * remaining_items
-        est_hours = int(estimated_remaining // 3600)
-        est_minutes = int((estimated_remaining % 3600) // 60)
-        est_seconds = int(estimated_remaining % 60)
-        time_str = f" (est. {est_hours:02d}:{est_minutes:02d}:{est_seconds:02d} remaining)"
+        time_str = f" (est. {format_duration(avg_time_per_item * remaining_items)} remaining)"
     else:
         time_str = ""
 
     print(f"\n### SYSTEM: Starting attempt {current_index}/{total_count}{time_str}")
 
 def make_completionfn():
+    """
+    Build the o4-mini completion function used for decision and verification.
+    Use get_decision_completionfn() rather than calling this per attempt.
+    """
     config_non_sensitive, config = load_provider_config("openai", "o4-mini")
 
-    client = OpenAI(api_key=config['api-keys']['openai'])
+    # one pooled client for the whole run; keep enough connections for concurrent attempts
+    max_connections = config.get("max-connections", 20)
+    http_client = DefaultHttpxClient(limits=httpx.Limits(max_connections=max_connections,
+                                                         max_keepalive_connections=max_connections))
 
     def create_completion(client, **kwargs):
         """closure to pre-load the model"""
@@ -250,17 +742,49 @@ def make_completionfn():
             **kwargs
         )
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def completionfn_for_key(api_key):
+        client = OpenAI(api_key=api_key,
+                        timeout=900.0,
+                        http_client=http_client)
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            if "reasoning_effort" in config:
+                kwargs["reasoning_effort"] = config['reasoning_effort']
 
-        if "reasoning_effort" in config:
-            kwargs["reasoning_effort"] = config['reasoning_effort']
+            return create_completion(client, model=config['model'], **kwargs)
 
-        return create_completion(client, model=config['model'], **kwargs)
+        return completionfn
 
     return LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                          llmfn=completionfn,
-                          backoff_exceptions=[(APITimeoutError, 300),
+                          llmfn=[completionfn_for_key(key) for key in api_keys(config, "openai")],
+                          backoff_exceptions=[(RateLimitError, 60),
+                                              (APITimeoutError, 300),
                                               (InternalServerError, 60),
-                                              (BadRequestError, 60)])
+                                              (BadRequestError, 60)],
+                          hedging=config.get("hedging"),
+                          provider="openai",
+                          model=config["model"])
+
+# The decision/verification engine is shared by every attempt in the run
+_decision_completionfn = None
+_decision_lock = threading.Lock()
+
+def get_decision_completionfn():
+    """Return the run-wide decision/verification completion function, creating it on first use."""
+    global _decision_completionfn
+
+    with _decision_lock:
+        if _decision_completionfn is None:
+            _decision_completionfn = make_completionfn()
+
+        return _decision_completionfn
+
+def decision_call_count():
+    """Number of calls made through the decision/verification engine so far this run."""
+    if _decision_completionfn is None:
+        return 0
+
+    return _decision_completionfn.total_call_count
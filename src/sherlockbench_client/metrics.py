@@ -0,0 +1,229 @@
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import events
+
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def format_labels(names, values):
+    if not names:
+        return ""
+
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values = {}  # label values -> count
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}_total{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+class Gauge:
+    """A value which goes up and down, or is read from fn at each scrape."""
+    kind = "gauge"
+
+    def __init__(self, name, help, fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield f"{self.name} {format_value(self.fn() if self.fn else self.value)}"
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.values = {}  # label values -> (bucket counts, sum)
+
+    def observe(self, labels, value):
+        counts, total = self.values.get(labels) or ([0] * len(self.buckets), 0)
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+
+        self.values[labels] = counts, total + value
+
+    def samples(self):
+        for labels, (counts, total) in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield (f"{self.name}_bucket{format_labels(self.labelnames + ('le',), labels + (format_value(bound),))}"
+                       f" {format_value(count)}")
+
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(total)}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {format_value(counts[-1])}"
+
+class MetricsExporter:
+    """
+    Serves a live run's metrics over HTTP in the Prometheus text format, for
+    scraping long-running benchmark hosts. The metrics are kept up to date
+    from the run's events; LLM calls without a provider or model of their own
+    are labelled with the run's.
+    """
+
+    def __init__(self, provider, model, host=DEFAULT_METRICS_HOST, port=9464, writer=None):
+        self.provider = provider
+        self.model = model
+        self.host = host
+        self.port = port
+        self.lock = threading.Lock()
+        self.server = None
+
+        llm_labels = ("provider", "model", "phase")
+
+        self.llm_calls = Counter("sherlockbench_llm_calls", "LLM calls which returned.", llm_labels)
+        self.llm_latency = Histogram("sherlockbench_llm_latency_seconds", "LLM call latency.", llm_labels,
+                                     LLM_BUCKETS)
+        self.rate_limit_sleep = Counter("sherlockbench_rate_limit_sleep_seconds",
+                                        "Seconds LLM calls waited for the rate limit or a backoff.",
+                                        ("provider", "model"))
+        self.backoffs = Counter("sherlockbench_backoffs", "LLM calls which were backed off.", ("lane",))
+        self.backoff_seconds = Counter("sherlockbench_backoff_seconds", "Seconds of backoff imposed on lanes.",
+                                       ("lane",))
+        self.server_latency = Histogram("sherlockbench_server_request_latency_seconds",
+                                        "SherlockBench API request latency.", ("path",))
+        self.tool_calls = Counter("sherlockbench_tool_calls", "Calls to the mystery function.", ("error",))
+        self.attempts = Counter("sherlockbench_attempts", "Completed attempts.", ("result",))
+        # by id, so an attempt which ends more than once or after the run failed isn't counted twice
+        self.in_flight_ids = set()
+        self.in_flight = Gauge("sherlockbench_attempts_in_flight", "Attempts started but not completed.",
+                               lambda: len(self.in_flight_ids))
+        self.db_latency = Histogram("sherlockbench_db_write_latency_seconds", "Attempt write latency.",
+                                    ("background",))
+
+        self.metrics = [self.llm_calls, self.llm_latency, self.rate_limit_sleep, self.backoffs,
+                        self.backoff_seconds, self.server_latency, self.tool_calls, self.attempts,
+                        self.in_flight, self.db_latency]
+
+        if writer is not None:
+            self.metrics.append(Gauge("sherlockbench_attempt_writer_queue_depth",
+                                      "Attempts waiting to be written to the db.", writer.queue.qsize))
+
+    @classmethod
+    def for_run(cls, config, provider, writer=None):
+        """The exporter configured by the optional `metrics` config, or None."""
+        options = config.get("metrics")
+        if not options:
+            return None
+
+        options = options if isinstance(options, dict) else {}
+
+        return cls(provider, config["model"],
+                   host=options.get("host", DEFAULT_METRICS_HOST),
+                   port=options.get("port", 9464),
+                   writer=writer)
+
+    def handle(self, event):
+        with self.lock:
+            match event["type"]:
+                case "llm_request":
+                    labels = (event.get("provider") or self.provider, event.get("model") or self.model)
+                    self.rate_limit_sleep.inc(labels, event.get("wait") or 0)
+
+                case "llm_response":
+                    labels = (event.get("provider") or self.provider, event.get("model") or self.model,
+                              event.get("phase") or "")
+                    self.llm_calls.inc(labels)
+                    self.llm_latency.observe(labels, event["latency"])
+
+                case "backoff":
+                    self.backoffs.inc((event["lane"],))
+                    self.backoff_seconds.inc((event["lane"],), event["seconds"])
+
+                case "server_request":
+                    self.server_latency.observe((event["path"],), event["latency"])
+
+                case "tool_call":
+                    self.tool_calls.inc((str(bool(event.get("error"))).lower(),))
+
+                case "attempt_start":
+                    self.in_flight_ids.add(event["attempt_id"])
+
+                case "attempt_done":
+                    self.in_flight_ids.discard(event["attempt_id"])
+                    self.attempts.inc(("pass" if event.get("result") else "fail",))
+
+                case "run_failed":
+                    # the failed attempt, and any others in flight, will never be done
+                    self.in_flight_ids.clear()
+
+                case "db_write":
+                    self.db_latency.observe((str(bool(event.get("background"))).lower(),), event["latency"])
+
+    def render(self):
+        lines = []
+
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+
+        events.subscribe(self.handle)
+        print(f"\n### SYSTEM: serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        events.unsubscribe(self.handle)
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
@@ -0,0 +1,137 @@
+import cProfile
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = "resources/profiles"
+
+PROFILE_MODES = ("sample", "cprofile")
+
+def frame_name(frame):
+    """package/module.py:function, which is distinct across the provider packages."""
+    code = frame.f_code
+    path = Path(code.co_filename)
+    # co_qualname is new in 3.11
+    return f"{path.parent.name}/{path.name}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def collapse(frame):
+    """The stack ending at frame, root first, in the collapsed format used by flamegraph.pl."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+def read_collapsed(path):
+    stacks = Counter()
+    with open(path, "r") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+
+    return stacks
+
+def write_collapsed(path, stacks):
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread which started it every interval seconds.
+
+    Where the thread's CPU clock is available, only samples in which the
+    thread used CPU are counted, weighted by the microseconds it used, so
+    waits on the network don't drown out client-side work. Otherwise every
+    sample counts once.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.target = None
+
+    def thread_cpu_time(self):
+        try:
+            return time.clock_gettime(time.pthread_getcpuclockid(self.target))
+        except (AttributeError, OSError):
+            return None
+
+    def run(self):
+        last_cpu = self.thread_cpu_time()
+
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+
+            cpu = self.thread_cpu_time()
+            if cpu is None:
+                weight = 1
+            else:
+                weight = round((cpu - last_cpu) * 1_000_000)
+                last_cpu = cpu
+
+            if weight > 0:
+                self.stacks[collapse(frame)] += weight
+
+    def start(self):
+        self.target = threading.get_ident()
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def save(self, path):
+        write_collapsed(path, self.stacks)
+
+class DeterministicProfiler:
+    """cProfile, saved as pstats."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+def profile_dir(config, run_id):
+    options = config.get("profiles") or {}
+    return Path(options.get("dir", DEFAULT_PROFILE_DIR)) / str(run_id)
+
+def profiled(executor, config, run_id, mode="sample"):
+    """
+    Wrap an executor so that each attempt is profiled, and saved to
+    <profile dir>/<run id>/<attempt id>.collapsed (sample) or .pstats (cprofile).
+    merge_profiles combines them into one profile for the run.
+    """
+    directory = profile_dir(config, run_id)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def profiled_executor(postfn, completionfn, config, run_id, storage, attempt):
+        if mode == "cprofile":
+            profiler, suffix = DeterministicProfiler(), ".pstats"
+        else:
+            profiler, suffix = SamplingProfiler(), ".collapsed"
+
+        profiler.start()
+        try:
+            return executor(postfn, completionfn, config, run_id, storage, attempt)
+        finally:
+            profiler.stop()
+            profiler.save(directory / (attempt["attempt-id"] + suffix))
+
+    return profiled_executor
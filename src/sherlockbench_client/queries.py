@@ -1,9 +1,171 @@
 from pypika import Query, Table, Field
-from datetime import datetime
+from psycopg2.extras import execute_values
+from datetime import datetime, timedelta
+import io
 import json
+import time
 import uuid
 from pprint import pprint
 
+from .db import PreparedStatement
+from . import events
+from .log_compression import read_log
+
+# The statements run for every attempt, or on every run, are prepared
+# server-side and take their values as parameters. complete_log alone can be
+# many KB, which we'd rather not have pypika render into the SQL text.
+
+# column -> postgres type for the attempt insert
+ATTEMPT_COLUMNS = {"id": "uuid",
+                   "run_id": "uuid",
+                   "function_name": "varchar",
+                   "result": "boolean",
+                   "time_taken": "float8",
+                   "tool_calls": "integer",
+                   "complete_log": "text",
+                   "complete_log_zstd": "bytea",
+                   "log_dictionary_id": "integer",
+                   "api_calls": "integer",
+                   "meta": "jsonb"}
+
+# attempts is partitioned by month on run_started, a copy of the parent run's
+# datetime_start. Per-run queries add this condition (taking the run id) so
+# that only the run's own partition is scanned.
+RUN_PARTITION = "run_started = (SELECT datetime_start FROM runs WHERE id = %s)"
+
+# one array per column, so the same statement inserts a batch of any size
+INSERT_ATTEMPTS = PreparedStatement(
+    "insert_attempts",
+    f"""INSERT INTO attempts ({', '.join(ATTEMPT_COLUMNS)}, run_started)
+        SELECT a.*, (SELECT datetime_start FROM runs WHERE id = a.run_id)
+        FROM unnest({', '.join(['%s'] * len(ATTEMPT_COLUMNS))}) AS a ({', '.join(ATTEMPT_COLUMNS)})
+        ON CONFLICT (id, run_started) DO NOTHING
+        RETURNING id""",
+    *[f"{t}[]" for t in ATTEMPT_COLUMNS.values()])
+
+COMPLETED_ATTEMPTS = PreparedStatement(
+    "completed_attempts",
+    f"SELECT id FROM attempts WHERE run_id = %s AND {RUN_PARTITION}",
+    "uuid", "uuid")
+
+RESULTS_BY_FUNCTION = PreparedStatement(
+    "results_by_function",
+    f"""SELECT function_name, count(*) FILTER (WHERE result), count(*) FILTER (WHERE NOT result)
+        FROM attempts WHERE run_id = %s AND {RUN_PARTITION}
+        GROUP BY function_name ORDER BY function_name""",
+    "uuid", "uuid")
+
+SAVE_RUN_RESULT = PreparedStatement(
+    "save_run_result",
+    "UPDATE runs SET total_run_time = %s, final_score = %s, score_percent = %s, total_api_calls = %s WHERE id = %s",
+    "float8", "jsonb", "float8", "integer", "uuid")
+
+# recount a run's per-function results, once its function names are known
+REFRESH_FUNCTION_RESULTS = PreparedStatement(
+    "refresh_function_results",
+    f"""INSERT INTO function_results (run_id, function_name, success, failure)
+       SELECT run_id, function_name,
+              count(*) FILTER (WHERE result),
+              count(*) FILTER (WHERE NOT result)
+       FROM attempts
+       WHERE run_id = %s AND {RUN_PARTITION} AND function_name IS NOT NULL
+       GROUP BY run_id, function_name
+       ON CONFLICT (run_id, function_name)
+       DO UPDATE SET success = EXCLUDED.success, failure = EXCLUDED.failure""",
+    "uuid", "uuid")
+
+FUNCTION_RESULTS = PreparedStatement(
+    "function_results",
+    "SELECT function_name, success, failure FROM function_results WHERE run_id = %s ORDER BY function_name",
+    "uuid")
+
+SAVE_RUN_FAILURE = PreparedStatement(
+    "save_run_failure",
+    "UPDATE runs SET failure_info = %s WHERE id = %s",
+    "jsonb", "uuid")
+
+
+def attempt_partition_bounds(when):
+    """The first moment of when's month, and of the month after."""
+    start = when.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+
+    return start, end
+
+def attempt_partition_name(when):
+    """The attempts partition holding the attempts of runs started in when's month."""
+    return f"attempts_{when:%Y_%m}"
+
+def attempt_partition_ddl(when):
+    """SQL creating the attempts partition for when's month, if it doesn't exist yet."""
+    start, end = attempt_partition_bounds(when)
+
+    return (f"CREATE TABLE IF NOT EXISTS {attempt_partition_name(when)} PARTITION OF attempts "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+
+class DetachedPartitionError(Exception):
+    """The attempts partition for a month has been detached, so its attempts can't be stored."""
+
+def create_attempt_partition(cursor, when):
+    """
+    Make sure the attempts partition for when's month is there. A detached
+    partition is still a table of the same name, so IF NOT EXISTS alone would
+    leave the month's inserts with no partition to go in.
+    """
+    name = attempt_partition_name(when)
+    cursor.execute("""SELECT to_regclass(%s) IS NOT NULL,
+                             EXISTS (SELECT 1 FROM pg_inherits
+                                     WHERE inhrelid = to_regclass(%s) AND inhparent = 'attempts'::regclass)""",
+                   (name, name))
+    exists, attached = cursor.fetchone()
+
+    if attached:
+        return
+
+    if exists:
+        raise DetachedPartitionError(f"{name} has been detached from attempts. "
+                                     f"Attach it again with: attempt_partitions --attach {when:%Y-%m}")
+
+    cursor.execute(attempt_partition_ddl(when))
+
+def create_run_partition(cursor, run_id):
+    """Make sure the attempts partition for an existing run is there, e.g. when it is resumed."""
+    cursor.execute("SELECT datetime_start FROM runs WHERE id = %s", (str(run_id),))
+    result = cursor.fetchone()
+
+    if result:
+        create_attempt_partition(cursor, result[0])
+
+def list_attempt_partitions(cursor):
+    """
+    The partitions currently attached to attempts.
+
+    Returns:
+        list: (name, partition bound, total size in bytes) tuples, oldest first
+    """
+    cursor.execute("""SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), pg_total_relation_size(c.oid)
+                      FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                      WHERE i.inhparent = 'attempts'::regclass
+                      ORDER BY c.relname""")
+
+    return cursor.fetchall()
+
+def detach_attempt_partition(cursor, when):
+    """
+    Detach the partition for when's month. It is kept as an ordinary table,
+    to be dumped and dropped or attached again later. Its attempts' tool
+    calls stay in attempt_tool_calls.
+    """
+    cursor.execute(f"ALTER TABLE attempts DETACH PARTITION {attempt_partition_name(when)}")
+    cursor.connection.commit()
+
+def attach_attempt_partition(cursor, when):
+    """Attach a partition previously detached with detach_attempt_partition."""
+    start, end = attempt_partition_bounds(when)
+
+    cursor.execute(f"ALTER TABLE attempts ATTACH PARTITION {attempt_partition_name(when)} "
+                   f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+    cursor.connection.commit()
 
 def create_run(cursor, config_non_sensitive, run_id, benchmark_version, labels=None):
     start_time = datetime.now()
@@ -18,6 +180,9 @@ def create_run(cursor, config_non_sensitive, run_id, benchmark_version, labels=N
     if labels:
         run_data["labels"] = labels  # This should be an array already
 
+    # the run's attempts will go in the partition for this month
+    create_attempt_partition(cursor, start_time)
+
     runs = Table("runs")
 
     # We need to use a raw SQL query here since pypika doesn't handle array types well
@@ -90,71 +255,181 @@ def get_completed_attempts(cursor, run_id):
 
     The attempts are only added to the db once completed so this is all of them.
     """
-    attempts = Table("attempts")
-
-    query = (
-        Query.from_(attempts)
-        .select(attempts.id)
-        .where(attempts.run_id == str(run_id))
-    )
-
-    cursor.execute(str(query))
+    COMPLETED_ATTEMPTS.execute(cursor, [str(run_id), str(run_id)])
     results = cursor.fetchall()
 
     # Extract the attempt IDs
     return [str(result[0]) for result in results]
 
-def add_attempt(cursor, run_id, verification_result, time_taken, tool_call_count, printer, completionfn, start_api_calls, attempt_id, meta=None):
+# When set, attempt rows are handed to this AttemptWriter instead of being
+# inserted on the caller's cursor.
+_attempt_writer = None
+
+def use_attempt_writer(writer):
+    """Route add_attempt through a write-behind AttemptWriter, or pass None to stop."""
+    global _attempt_writer
+    _attempt_writer = writer
+
+# When set, attempt logs are stored zstd-compressed by this LogCodec
+_log_codec = None
+
+def use_log_compression(codec):
+    """Compress the logs of inserted attempts with a LogCodec, or pass None to stop."""
+    global _log_codec
+    _log_codec = codec
+
+def insert_attempts(cursor, rows):
+    """
+    Insert attempt rows with a single statement, and their tool calls with
+    COPY. Rows whose id is already in the table are skipped, so a batch can
+    safely be inserted more than once.
+
+    Args:
+        cursor: Database cursor
+        rows: list of dicts mapping column name to value. Missing columns are
+              null. "tool_call_rows" may hold the attempt's recorded tool calls.
+    """
+    def value(row, column):
+        v = row.get(column)
+        # spools and exports from before result was a boolean hold 'true' or 'false'
+        return v.lower() == "true" if column == "result" and isinstance(v, str) else v
+
+    if _log_codec is not None:
+        rows = [_log_codec.compress_row(row) for row in rows]
+
+    INSERT_ATTEMPTS.execute(cursor, [[value(row, column) for row in rows] for column in ATTEMPT_COLUMNS])
+    inserted = {str(result[0]) for result in cursor.fetchall()}
+
+    copy_tool_calls(cursor, [row for row in rows if str(row["id"]) in inserted])
+    cursor.connection.commit()
+
+def copy_field(value):
+    """A value in COPY's text format."""
+    if value is None:
+        return "\\N"
+
+    return (str(value).replace("\\", "\\\\")
+                      .replace("\t", "\\t")
+                      .replace("\n", "\\n")
+                      .replace("\r", "\\r"))
+
+def copy_tool_calls(cursor, rows):
+    """Bulk load the recorded tool calls of attempt rows into attempt_tool_calls."""
+    buffer = io.StringIO()
+
+    for row in rows:
+        for seq, call in enumerate(row.get("tool_call_rows") or [], 1):
+            fields = [row["id"], seq, json.dumps(call["args"]), json.dumps(call["output"]),
+                      call["error"], call["latency"]]
+            buffer.write("\t".join(copy_field(f) for f in fields) + "\n")
+
+    if buffer.tell() == 0:
+        return
+
+    buffer.seek(0)
+    cursor.copy_expert("COPY attempt_tool_calls (attempt_id, seq, args, output, error, latency) FROM STDIN", buffer)
+
+def add_attempt(storage, run_id, verification_result, time_taken, tool_call_count, printer, usage, attempt_id, meta=None):
+    """
+    usage is the AttemptUsage which every completion function in the attempt was bound to.
+    Takes the storage rather than a cursor since attempts may finish on any thread.
+
+    The attempt's timing spans go in meta. Storing the row can't be one of
+    them, so it is emitted as a db_write event instead.
+    """
     attempt_data = {"id": attempt_id,
                     "run_id": run_id,
                     "result": verification_result,
                     "time_taken": time_taken,
                     "tool_calls": tool_call_count,
-                    "complete_log": printer.retrieve(),
-                    "api_calls": completionfn.total_call_count - start_api_calls}
-
-    if meta is not None:
-        attempt_data["meta"] = json.dumps(meta)
+                    "api_calls": usage.call_count}
+
+    meta = (meta or {}) | {"input_tokens": usage.input_tokens,
+                           "output_tokens": usage.output_tokens,
+                           "spans": usage.span_tree()}
+    attempt_data["meta"] = json.dumps(meta)
+    attempt_data["tool_call_rows"] = usage.tool_calls
+
+    events.emit("attempt_done", attempt_id, result=verification_result, time_taken=time_taken,
+                tool_calls=tool_call_count, api_calls=usage.call_count,
+                input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+
+    # with a writer, the db_write event is emitted when its batch is inserted
+    if _attempt_writer is not None:
+        # A log in a file is read by the writer as it inserts the row, so the
+        # spool and queue hold its path rather than the whole log
+        log_file = printer.detach_log()
+        if log_file is not None:
+            attempt_data["log_file"], attempt_data["remove_log_file"] = log_file
+        else:
+            attempt_data["complete_log"] = printer.retrieve()
+
+        _attempt_writer.submit(attempt_data)
+    else:
+        attempt_data["complete_log"] = printer.retrieve()
+        start = time.perf_counter()
+        storage.insert_attempts([attempt_data])
+        events.emit("db_write", attempt_id, rows=1, latency=time.perf_counter() - start, background=False)
 
-    insert_query = Query.into(Table("attempts")).columns(*attempt_data.keys()).insert(*attempt_data.values())
-    cursor.execute(str(insert_query))
-    cursor.connection.commit()
+    # the log is safely spooled or stored, so the printer's copy can go
+    printer.close()
 
 def fail_attempt(cursor, run_id, attempt_id):
     attempt_data = {"id": attempt_id,
                     "run_id": run_id,
                     "result": False}
 
-    insert_query = Query.into(Table("attempts")).columns(*attempt_data.keys()).insert(*attempt_data.values())
-    cursor.execute(str(insert_query))
-    cursor.connection.commit()
+    insert_attempts(cursor, [attempt_data])
 
-def add_problem_names(cursor, problem_names):
-    """problem_names is a list of dicts, each containing 'id' and 'function_name'"""
-    attempts = Table("attempts")
+def add_problem_names(cursor, problem_names, run_id=None):
+    """
+    problem_names is a list of dicts, each containing 'id' and 'function_name'.
+    Set from a VALUES list in a single statement, since a run can have
+    thousands of attempts. Passing the run_id limits the update to the run's
+    partition.
+    """
+    values = [(problem['id'], problem['function_name']) for problem in problem_names]
+    if not values:
+        return
 
-    for problem in problem_names:
-        update_query = (
-            Query.update(attempts)
-            .set(attempts.function_name, problem['function_name'])
-            .where(attempts.id == problem['id'])
-        )
-        cursor.execute(str(update_query))
+    sql = """UPDATE attempts SET function_name = names.function_name
+             FROM (VALUES %s) AS names (id, function_name)
+             WHERE attempts.id = names.id"""
+
+    if run_id is not None:
+        sql += " AND attempts." + cursor.mogrify(RUN_PARTITION, (str(run_id),)).decode()
+
+    execute_values(cursor,
+                   sql,
+                   values,
+                   template="(%s::uuid, %s)",
+                   page_size=len(values))
 
     cursor.connection.commit()
 
-def save_run_result(cursor, run_id, start_time, score, percent, total_call_count):
-    runs = Table("runs")
+def refresh_function_results(cursor, run_id):
+    """Bring the function_results rollup up to date for a run. Call after add_problem_names."""
+    REFRESH_FUNCTION_RESULTS.execute(cursor, [str(run_id), str(run_id)])
+    cursor.connection.commit()
+
+def get_function_results(cursor, run_id):
+    """
+    The per-function results of a run from the function_results rollup.
+
+    Returns:
+        dict: function_name -> (success count, failure count). Empty if the
+              run hasn't been completed.
+    """
+    FUNCTION_RESULTS.execute(cursor, [str(run_id)])
+
+    return {function_name: (success, failure) for function_name, success, failure in cursor.fetchall()}
 
-    update_query = (
-    Query.update(runs)
-         .set(runs.total_run_time, (datetime.now() - start_time).total_seconds())
-         .set(runs.final_score, json.dumps({"numerator": score["numerator"], "denominator": score["denominator"]}))
-         .set(runs.score_percent, percent)
-         .set(runs.total_api_calls, total_call_count)
-         .where(runs.id == run_id)
-)
-    cursor.execute(str(update_query))
+def save_run_result(cursor, run_id, start_time, score, percent, total_call_count):
+    SAVE_RUN_RESULT.execute(cursor, [(datetime.now() - start_time).total_seconds(),
+                                     json.dumps({"numerator": score["numerator"], "denominator": score["denominator"]}),
+                                     percent,
+                                     total_call_count,
+                                     str(run_id)])
     cursor.connection.commit()
 
 def save_run_failure(cursor, run_id, failure_info):
@@ -167,51 +442,51 @@ def save_run_failure(cursor, run_id, failure_info):
         failure_info: Dictionary containing information about the failure
                      (will be stored as JSON in the database)
     """
-    runs = Table("runs")
-
-    update_query = (
-        Query.update(runs)
-        .set(runs.failure_info, json.dumps(failure_info))
-        .where(runs.id == run_id)
-    )
-
-    cursor.execute(str(update_query))
+    SAVE_RUN_FAILURE.execute(cursor, [json.dumps(failure_info), str(run_id)])
     cursor.connection.commit()
 
-def get_attempts_by_function(cursor, run_id):
+def count_results_by_function(cursor, run_id):
     """
-    Get all attempts for a run, grouped by function_name.
+    Count a run's successes and failures per function from the attempts
+    themselves, for runs without a function_results rollup.
 
     Args:
         cursor: Database cursor
         run_id: The UUID of the run
 
     Returns:
-        dict: A dictionary with function_name as keys and lists of attempts as values
+        dict: function_name -> (success count, failure count)
     """
-    attempts = Table("attempts")
+    RESULTS_BY_FUNCTION.execute(cursor, [str(run_id), str(run_id)])
 
-    query = (
-        Query.from_(attempts)
-        .select(
-            attempts.function_name,
-            attempts.result
-        )
-        .where(attempts.run_id == str(run_id))
-        .orderby(attempts.function_name)
-    )
+    return {function_name: (success, failure) for function_name, success, failure in cursor.fetchall()}
 
-    cursor.execute(str(query))
-    results = cursor.fetchall()
+# how many of a model's latest runs duration statistics are taken from
+DURATION_HISTORY_RUNS = 20
+
+def get_duration_history(cursor, model_identifier, runs=DURATION_HISTORY_RUNS):
+    """
+    Summarize how long the model's attempts took in its latest runs, as a
+    prior for estimating how long a new run will take.
 
-    # Group attempts by function_name
-    attempts_by_function = {}
-    for function_name, result in results:
-        if function_name not in attempts_by_function:
-            attempts_by_function[function_name] = []
-        attempts_by_function[function_name].append(result)
+    Args:
+        cursor: Database cursor
+        model_identifier: The model, as stored in runs.model_identifier
+        runs: How many of the latest runs to include
+
+    Returns:
+        tuple: (attempt count, mean seconds, standard deviation), or None with fewer than two attempts
+    """
+    # joining on run_started as well limits each run to its own partition
+    cursor.execute("""SELECT count(a.time_taken), avg(a.time_taken), stddev_samp(a.time_taken)
+                      FROM (SELECT id, datetime_start FROM runs
+                            WHERE model_identifier = %s
+                            ORDER BY datetime_start DESC LIMIT %s) r
+                      JOIN attempts a ON a.run_id = r.id AND a.run_started = r.datetime_start""",
+                   (model_identifier, runs))
+    count, mean, stddev = cursor.fetchone()
 
-    return attempts_by_function
+    return (count, mean, stddev) if count > 1 else None
 
 def calculate_pass_at_k(cursor, run_id):
     """
@@ -224,25 +499,168 @@ def calculate_pass_at_k(cursor, run_id):
     Returns:
         tuple: (pass@k score, k value, problems_passed, total_problems)
     """
-    # Get attempts grouped by function
-    attempts_by_function = get_attempts_by_function(cursor, run_id)
+    # Use the rollup if the run has one, otherwise count the attempts
+    function_results = get_function_results(cursor, run_id)
 
-    if not attempts_by_function:
+    if not function_results:
+        function_results = count_results_by_function(cursor, run_id)
+
+    if not function_results:
         return 0, 0, 0, 0
 
     # Count problems that have at least one successful attempt
-    problems_passed = 0
-    total_problems = len(attempts_by_function)
-
-    for attempts in attempts_by_function.values():
-        # Check if any attempt for this problem succeeded
-        if any(result == "true" for result in attempts):
-            problems_passed += 1
+    total_problems = len(function_results)
+    problems_passed = sum(1 for success, failure in function_results.values() if success > 0)
 
     # k is the number of attempts per problem (assuming all problems have the same number)
-    k = len(next(iter(attempts_by_function.values()))) if attempts_by_function else 0
+    k = sum(next(iter(function_results.values())))
 
     # Calculate pass@k score
     pass_at_k = problems_passed / total_problems if total_problems > 0 else 0
 
     return pass_at_k, k, problems_passed, total_problems
+
+def add_label(cursor, run_id, label_value):
+    """
+    Add a label to the 'labels' array for a run in the database.
+
+    Args:
+        cursor: Database cursor
+        run_id: The UUID of the run to label
+        label_value: String value to add as a label
+
+    Returns:
+        bool: True if the run was found and updated, False otherwise
+    """
+    # First check if the run exists
+    check_query = """
+    SELECT id FROM runs WHERE id = %s
+    """
+    cursor.execute(check_query, (str(run_id),))
+    result = cursor.fetchone()
+
+    if not result:
+        return False
+
+    # Update the labels column by appending the new label
+    # Only append if the label doesn't already exist in the array
+    update_query = """
+    UPDATE runs
+    SET labels =
+        CASE
+            WHEN labels IS NULL THEN ARRAY[%s]
+            WHEN %s = ANY(labels) THEN labels
+            ELSE array_append(labels, %s)
+        END
+    WHERE id = %s
+    """
+    cursor.execute(update_query, (label_value, label_value, label_value, str(run_id)))
+    cursor.connection.commit()
+
+    return True
+
+def remove_label(cursor, run_id, label_value):
+    """
+    Remove a label from the 'labels' array for a run in the database.
+
+    Args:
+        cursor: Database cursor
+        run_id: The UUID of the run to update
+        label_value: String value to remove from labels
+
+    Returns:
+        bool: True if the run was found and updated, False otherwise
+    """
+    # First check if the run exists
+    check_query = """
+    SELECT id FROM runs WHERE id = %s
+    """
+    cursor.execute(check_query, (str(run_id),))
+    result = cursor.fetchone()
+
+    if not result:
+        return False
+
+    # Update the labels column by removing the specified label
+    update_query = """
+    UPDATE runs
+    SET labels = array_remove(labels, %s)
+    WHERE id = %s
+    """
+    cursor.execute(update_query, (label_value, str(run_id)))
+    cursor.connection.commit()
+
+    return True
+
+# the columns which make up a run when it is moved between storage backends
+RUN_COLUMNS = ["id", "model_identifier", "benchmark_version", "config", "datetime_start", "total_run_time",
+               "final_score", "score_percent", "total_api_calls", "labels", "failure_info"]
+
+EXPORTED_ATTEMPT_COLUMNS = ["id", "run_id", "function_name", "result", "time_taken", "tool_calls",
+                            "api_calls", "meta"]
+
+def list_run_ids(cursor):
+    cursor.execute("SELECT id FROM runs ORDER BY datetime_start")
+    return [str(result[0]) for result in cursor.fetchall()]
+
+def export_run(cursor, run_id):
+    """
+    A run, its attempts and their tool calls as plain JSON-compatible data,
+    for storage.import_run on another backend. Returns None if there is no
+    such run.
+    """
+    cursor.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE id = %s", (str(run_id),))
+    result = cursor.fetchone()
+
+    if not result:
+        return None
+
+    run = dict(zip(RUN_COLUMNS, result))
+    run["id"] = str(run["id"])
+    run["datetime_start"] = run["datetime_start"].strftime('%Y-%m-%d %H:%M:%S')
+
+    cursor.execute(f"""SELECT {', '.join(EXPORTED_ATTEMPT_COLUMNS)}, complete_log, complete_log_zstd, log_dictionary_id
+                       FROM attempts WHERE run_id = %s AND {RUN_PARTITION}""", (str(run_id), str(run_id)))
+
+    attempts = []
+    for result in cursor.fetchall():
+        attempt = dict(zip(EXPORTED_ATTEMPT_COLUMNS, result))
+        attempt["id"] = str(attempt["id"])
+        attempt["run_id"] = str(attempt["run_id"])
+        attempt["complete_log"] = read_log(cursor, *result[len(EXPORTED_ATTEMPT_COLUMNS):])
+        attempts.append(attempt)
+
+    cursor.execute(f"""SELECT attempt_id, args, output, error, latency FROM attempt_tool_calls
+                      WHERE attempt_id IN (SELECT id FROM attempts WHERE run_id = %s AND {RUN_PARTITION})
+                      ORDER BY attempt_id, seq""", (str(run_id), str(run_id)))
+
+    tool_calls = {}
+    for attempt_id, args, output, error, latency in cursor.fetchall():
+        tool_calls.setdefault(str(attempt_id), []).append(
+            {"args": args, "output": output, "error": error, "latency": latency})
+
+    for attempt in attempts:
+        attempt["tool_call_rows"] = tool_calls.get(attempt["id"], [])
+
+    return {"run": run, "attempts": attempts}
+
+def import_run(cursor, data):
+    """
+    Insert a run exported by export_run. A run which is already present is
+    left as it is, but any attempts it is missing are added.
+    """
+    run = data["run"]
+    values = [json.dumps(run[c]) if c in ("config", "final_score", "failure_info") and run[c] is not None else run[c]
+              for c in RUN_COLUMNS]
+
+    create_attempt_partition(cursor, datetime.strptime(run["datetime_start"], '%Y-%m-%d %H:%M:%S'))
+
+    cursor.execute(f"""INSERT INTO runs ({', '.join(RUN_COLUMNS)})
+                       VALUES ({', '.join(['%s'] * len(RUN_COLUMNS))})
+                       ON CONFLICT (id) DO NOTHING""", values)
+
+    rows = [attempt | {"meta": json.dumps(attempt["meta"]) if attempt.get("meta") is not None else None}
+            for attempt in data["attempts"]]
+    insert_attempts(cursor, rows)
+
+    refresh_function_results(cursor, run["id"])
@@ -1,9 +1,16 @@
 import os
-from .main import load_config, load_provider_config, destructure, post
+from .main import load_config, load_provider_config, destructure, post, decision_call_count, set_headless, use_eta_estimator
 from . import queries as q
+from .attempt_writer import AttemptWriter, AttemptWriteError, replay_spools
+from .events import EventStream, use_event_stream, emit, subscribe, unsubscribe
+from .dashboard import Dashboard
+from .eta import EtaEstimator
+from .metrics import MetricsExporter
+from .profiling import PROFILE_MODES, profiled
+from .storage import open_storage
+from .log_compression import DEFAULT_LEVEL
 from datetime import datetime
 import argparse
-import psycopg2
 import re
 import traceback
 import sys
@@ -27,6 +34,9 @@ def set_current_attempt(attempt):
     global _current_attempt
     _current_attempt = attempt
 
+    if attempt is not None:
+        emit("attempt_start", attempt["attempt-id"])
+
 def get_current_attempt():
     """Get the current attempt being processed"""
     global _current_attempt
@@ -48,7 +58,7 @@ def is_valid_uuid(uuid_string):
 def start_run(provider):
     """Various things to get the run started:
        - parse the args
-       - establish db connection
+       - open the storage
        - contact the server to start the run
        - add the run info to the db
        - handle resuming from interrupted runs
@@ -60,16 +70,21 @@ def start_run(provider):
     parser.add_argument("--attempts-per-problem", type=int, help="Number of attempts per problem")
     parser.add_argument("--resume", choices=["skip", "retry"], help="How to handle resuming from a failed run: 'skip' the failed attempt, or 'retry' it")
     parser.add_argument("--labels", nargs="+", help="Optional labels for this run (e.g., 'baseline', 'experiment', 'keeper')")
+    parser.add_argument("--headless", action="store_true", help="Don't print transcripts, show a live progress dashboard instead")
+    parser.add_argument("--profile", nargs="?", const="sample", choices=PROFILE_MODES,
+                        help="Profile each attempt: 'sample' the client's CPU use (the default), or 'cprofile' every call")
 
     args = parser.parse_args()
 
     # Read config
     config_non_sensitive, config = load_provider_config(provider, args.model_name)
 
-    # Connect to postgresql
-    db_conn = psycopg2.connect(config["postgres-url"])
-    db_conn.autocommit = True
-    cursor = db_conn.cursor()
+    # Postgres, or a local SQLite file
+    storage = open_storage(config)
+
+    # Attempts from a crashed run may only have made it to the local spool.
+    # This must happen before resuming, which relies on the completed attempts.
+    replay_spools(storage, config)
 
     # Check if this is an existing run ID
     is_uuid = is_valid_uuid(args.arg)
@@ -78,43 +93,45 @@ def start_run(provider):
     # Handle resuming a failed run or starting a new one
     if is_uuid and args.resume:
         # Resuming a failed run
-        run_id, run_type, benchmark_version, attempts = resume_failed_run(config, cursor, run_id, args)
+        run_id, run_type, benchmark_version, attempts = resume_failed_run(config, storage, run_id, args)
     else:
         # Starting a new run
-        run_id, run_type, benchmark_version, attempts = start_new_run(config_non_sensitive, cursor, args, provider, is_uuid, run_id)
+        run_id, run_type, benchmark_version, attempts = start_new_run(config_non_sensitive, storage, args, provider, is_uuid, run_id)
 
     # Update config with important run metadata
     config["run_type"] = run_type
     config["benchmark_version"] = benchmark_version
+    config["headless"] = args.headless
+    config["profile"] = args.profile
 
     # Return unified result regardless of path
-    return (config, args.model_name, db_conn, cursor, run_id, attempts, datetime.now())
+    return (config, args.model_name, storage, run_id, attempts, datetime.now())
+
+def complete_run(postfn, storage, run_id, start_time, total_call_count, config, writer):
+    # every attempt must be in the db before we add the problem names. If some
+    # are only in the spool, the run is saved as failed so it can be resumed
+    # once the spool has been replayed.
+    if not writer.close():
+        raise AttemptWriteError(f"some attempts were not written to the db, they are kept in {writer.spool_file}")
 
-def complete_run(postfn, db_conn, cursor, run_id, start_time, total_call_count, config):
     run_time, score, percent, problem_names = destructure(postfn("complete-run", {}), "run-time", "score", "percent", "problem-names")
 
     # we have the problem names now so we can add that into the db
-    q.add_problem_names(cursor, problem_names)
+    storage.add_problem_names(run_id, problem_names)
 
     # save the results to the db
-    q.save_run_result(cursor, run_id, start_time, score, percent, total_call_count)
+    storage.save_run_result(run_id, start_time, score, percent, total_call_count)
+
+    pass_at_k, k, problems_passed, total_problems = storage.calculate_pass_at_k(run_id)
 
     # print the results
     print(f"\n### SYSTEM: run complete for model `{config['model']}`.")
     print(f"\nRun id: {run_id}")
     print(f"\nFinal score: {score['numerator']}/{score['denominator']} ({percent / 100:.0%})")
 
-    # Calculate and display pass@k if we have multiple attempts per problem
-    pass_at_k, k, problems_passed, total_problems = q.calculate_pass_at_k(cursor, run_id)
-
     if k > 1:  # Only display pass@k if we have multiple attempts per problem
         print(f"\nPass@{k} score: {problems_passed}/{total_problems} ({pass_at_k:.0%})")
 
-    # Why do database libraries require so much boilerplate?
-    db_conn.commit()
-    cursor.close()
-    db_conn.close()
-
 def run_with_error_handling(provider, main_function, ex_spec):
     """
     Run a provider's main function with centralized error handling.
@@ -128,7 +145,7 @@ def run_with_error_handling(provider, main_function, ex_spec):
     Args:
         provider: String identifying the provider (e.g., "openai", "anthropic")
         main_function: Function that implements the provider's benchmark logic.
-                       It should take (config, db_conn, cursor, run_id, attempts, start_time)
+                       It should take (executor, config, storage, run_id, attempts, start_time)
                        and return (postfn, total_call_count, config) for run completion.
     """
 
@@ -143,16 +160,53 @@ def run_with_error_handling(provider, main_function, ex_spec):
 
     with lock:
         # Start the run
-        config, model_name, db_conn, cursor, run_id, attempts, start_time = start_run(provider)
+        config, model_name, storage, run_id, attempts, start_time = start_run(provider)
 
         executor = pick_executor(config, ex_spec)
 
+        if config["profile"]:
+            executor = profiled(executor, config, run_id, config["profile"])
+
+        if config.get("log-compression"):
+            options = config["log-compression"] if isinstance(config["log-compression"], dict) else {}
+            storage.enable_log_compression(options.get("level", DEFAULT_LEVEL))
+
+        # attempt rows are written in the background so the run never waits on the db
+        writer = AttemptWriter.for_run(config, run_id, storage)
+        q.use_attempt_writer(writer)
+
+        # typed events alongside the human-readable logs, for analytics and replay
+        event_stream = EventStream.for_run(config, run_id)
+        use_event_stream(event_stream)
+
+        # the model's earlier runs give an estimate before any attempt has finished
+        estimator = EtaEstimator(len(attempts), storage.duration_history(config["model"]))
+        subscribe(estimator.handle)
+        use_eta_estimator(estimator)
+
+        # for scraping by Prometheus, if configured
+        exporter = MetricsExporter.for_run(config, provider, writer)
+        if exporter:
+            exporter.start()
+
+        dashboard = None
+        if config["headless"]:
+            set_headless(True)
+            dashboard = Dashboard(len(attempts), estimator=estimator)
+            dashboard.start()
+
         try:
             # Call the provider's main function, which should return info needed for completion
-            postfn, total_call_count, _ = main_function(executor, config, db_conn, cursor, run_id, attempts, start_time)
+            postfn, total_call_count, _ = main_function(executor, config, storage, run_id, attempts, start_time)
+
+            # Complete the run. Decision and verification calls go through the
+            # run-wide decision engine rather than the provider's limiter.
+            total_call_count += decision_call_count()
+
+            if dashboard:
+                dashboard.stop()
 
-            # Complete the run
-            complete_run(postfn, db_conn, cursor, run_id, start_time, total_call_count, config)
+            complete_run(postfn, storage, run_id, start_time, total_call_count, config, writer)
 
         except Exception as e:
             # Capture error information
@@ -160,10 +214,19 @@ def run_with_error_handling(provider, main_function, ex_spec):
             error_message = str(e)
             trace_info = traceback.format_exc()
 
+            if dashboard:
+                dashboard.stop()
+
             print(f"\n### SYSTEM ERROR: {error_type}: {error_message}")
 
+            current_attempt = get_current_attempt()
+            emit("run_failed", current_attempt["attempt-id"] if current_attempt else None, error_type=error_type)
+
+            # the completed attempts must be in the db for the run to be resumable
+            writer.close()
+
             # Save error information to database if we have a connection
-            if db_conn and cursor and run_id:
+            if run_id:
                 print("attempts: ", attempts)
 
                 error_info = {
@@ -176,8 +239,7 @@ def run_with_error_handling(provider, main_function, ex_spec):
                     # Get the current attempt from our global tracker
                     current_attempt = get_current_attempt()
 
-                    save_run_failure(cursor, run_id, attempts, current_attempt, error_info)
-                    db_conn.commit()
+                    save_run_failure(storage, run_id, attempts, current_attempt, error_info)
 
                     # Provide resumption instructions to the user
                     script_name = sys.argv[0].rsplit('/', 1)[-1]
@@ -187,12 +249,23 @@ def run_with_error_handling(provider, main_function, ex_spec):
 
                 except Exception as save_error:
                     print(f"\n### SYSTEM ERROR: Failed to save error information: {save_error}")
-                finally:
-                    try:
-                        cursor.close()
-                        db_conn.close()
-                    except:
-                        pass
 
             # Re-raise the exception to exit with error
             raise
+
+        finally:
+            # also covers KeyboardInterrupt, which the spool replay would otherwise pick up next run
+            writer.close()
+            q.use_attempt_writer(None)
+            if dashboard:
+                dashboard.stop()
+            set_headless(False)
+
+            if exporter:
+                exporter.stop()
+
+            use_eta_estimator(None)
+            unsubscribe(estimator.handle)
+            use_event_stream(None)
+            event_stream.close()
+            storage.close()
@@ -4,12 +4,11 @@ from datetime import datetime
 from pprint import pprint
 
 from .main import destructure, post
-from . import queries as q
 
-def resume_failed_run(config, cursor, run_id, args):
+def resume_failed_run(config, storage, run_id, args):
     """Resume a previously failed run."""
     # Get the failed run info from the database
-    failed_run = q.get_failed_run(cursor, run_id)
+    failed_run = storage.get_failed_run(run_id)
     assert failed_run
 
     failure_info, benchmark_version, run_config = destructure(
@@ -42,19 +41,19 @@ def resume_failed_run(config, cursor, run_id, args):
     elif args.resume == "skip":
         print(f"\n### SYSTEM: Will skip failed attempt: {attempt_id}")
 
-        q.fail_attempt(cursor, run_id, attempt_id)
+        storage.fail_attempt(run_id, attempt_id)
 
     # Get and process remaining attempts
-    attempts = process_remaining_attempts(cursor, run_id, failure_info, failed_attempt, args.resume)
+    attempts = process_remaining_attempts(storage, run_id, failure_info, failed_attempt, args.resume)
 
     print(f"Resuming {run_type} benchmark with run-id: {run_id}")
 
     return run_id, run_type, benchmark_version, attempts
 
-def process_remaining_attempts(cursor, run_id, failure_info, failed_attempt, resume_mode):
+def process_remaining_attempts(storage, run_id, failure_info, failed_attempt, resume_mode):
     """Process the list of attempts and filter out completed or skipped ones."""
     # Get a list of already completed attempts
-    completed_attempts = q.get_completed_attempts(cursor, run_id)
+    completed_attempts = storage.get_completed_attempts(run_id)
 
     all_attempts = failure_info["all_attempts"]
 
@@ -79,7 +78,7 @@ def process_remaining_attempts(cursor, run_id, failure_info, failed_attempt, res
 
     return attempts
 
-def start_new_run(config_non_sensitive, cursor, args, provider, is_uuid, run_id):
+def start_new_run(config_non_sensitive, storage, args, provider, is_uuid, run_id):
     """Start a new benchmark run."""
     subset = config_non_sensitive.get("subset")  # none if key is missing
     model = config_non_sensitive['model']
@@ -112,16 +111,16 @@ def start_new_run(config_non_sensitive, cursor, args, provider, is_uuid, run_id)
         print(f"This run will have labels: {', '.join(labels)}")
 
     # Create the run table entry (only for new runs, not resuming)
-    q.create_run(cursor, config_non_sensitive, run_id, benchmark_version, labels)
+    storage.create_run(config_non_sensitive, run_id, benchmark_version, labels)
 
     return run_id, run_type, benchmark_version, attempts
 
-def save_run_failure(cursor, run_id, all_attempts, current_attempt, error_info):
+def save_run_failure(storage, run_id, all_attempts, current_attempt, error_info):
     """
     Save information about a run failure to the database.
 
     Args:
-        cursor: Database cursor
+        storage: The Storage the run is kept in
         run_id: The ID of the run that failed
         current_attempt: Information about the attempt that was in progress during failure,
                         or None if no attempt was in progress
@@ -138,7 +137,7 @@ def save_run_failure(cursor, run_id, all_attempts, current_attempt, error_info):
     }
 
     # Save the failure info to the database
-    q.save_run_failure(cursor, run_id, failure_info)
+    storage.save_run_failure(run_id, failure_info)
 
     # Print error information
     print("\n### SYSTEM ERROR: An uncaught exception occurred")
@@ -0,0 +1,266 @@
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from . import queries as q
+from .storage import Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    model_identifier TEXT NOT NULL,
+    benchmark_version TEXT NOT NULL,
+    config TEXT NOT NULL,
+    datetime_start TEXT NOT NULL,
+    total_run_time REAL,
+    final_score TEXT,
+    score_percent REAL,
+    total_api_calls INTEGER,
+    labels TEXT,
+    failure_info TEXT
+);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    function_name TEXT,
+    result BOOLEAN NOT NULL,
+    time_taken REAL,
+    api_calls INTEGER,
+    tool_calls INTEGER,
+    complete_log TEXT,
+    meta TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_attempts_run_id_function_name ON attempts (run_id, function_name);
+
+CREATE TABLE IF NOT EXISTS attempt_tool_calls (
+    attempt_id TEXT NOT NULL REFERENCES attempts (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    args TEXT NOT NULL,
+    output TEXT,
+    error INTEGER NOT NULL,
+    latency REAL,
+    PRIMARY KEY (attempt_id, seq)
+);
+"""
+
+ATTEMPT_COLUMNS = ["id", "run_id", "function_name", "result", "time_taken", "tool_calls",
+                   "complete_log", "api_calls", "meta"]
+
+RUN_COLUMNS = ["id", "model_identifier", "benchmark_version", "config", "datetime_start", "total_run_time",
+               "final_score", "score_percent", "total_api_calls", "labels", "failure_info"]
+
+# stored as JSON text, since SQLite has no JSON or array column types
+JSON_RUN_COLUMNS = ("config", "final_score", "labels", "failure_info")
+
+def loads(value):
+    return json.loads(value) if value is not None else None
+
+def dumps(value):
+    return json.dumps(value) if value is not None else None
+
+def attempt_value(row, column):
+    value = row.get(column)
+
+    # ids may arrive as UUID objects
+    if column in ("id", "run_id"):
+        return str(value)
+
+    # spools and exports from before result was a boolean hold 'true' or 'false'
+    if column == "result" and isinstance(value, str):
+        return value.lower() == "true"
+
+    return value
+
+class SQLiteStorage(Storage):
+    """
+    Runs and attempts in a local SQLite file, for benchmarking without a
+    database server. The schema is created when the file is opened.
+
+    Logs are stored uncompressed and there is no function_results rollup;
+    use `transfer_runs` to move runs into Postgres for analysis.
+    """
+
+    errors = (sqlite3.OperationalError,)
+
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # one connection shared between threads, one statement at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.lock = threading.Lock()
+
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.executescript(SCHEMA)
+
+    def execute(self, sql, params=()):
+        with self.lock, self.conn:
+            return self.conn.execute(sql, params).fetchall()
+
+    def create_run(self, config_non_sensitive, run_id, benchmark_version, labels=None):
+        self.execute("""INSERT INTO runs (id, model_identifier, benchmark_version, config, datetime_start, labels)
+                        VALUES (?, ?, ?, ?, ?, ?)""",
+                     (run_id,
+                      config_non_sensitive["model"],
+                      benchmark_version.split('.', 1)[0],
+                      json.dumps(config_non_sensitive),
+                      datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                      dumps(labels or None)))
+
+    def get_failed_run(self, run_id):
+        results = self.execute("""SELECT id, model_identifier, benchmark_version, config, failure_info FROM runs
+                                  WHERE id = ? AND failure_info IS NOT NULL""", (str(run_id),))
+        if not results:
+            return None
+
+        run_id, model_identifier, benchmark_version, config_json, failure_info_json = results[0]
+
+        return {
+            "id": run_id,
+            "model_identifier": model_identifier,
+            "benchmark_version": benchmark_version,
+            "config": loads(config_json),
+            "failure_info": loads(failure_info_json)
+        }
+
+    def get_completed_attempts(self, run_id):
+        return [result[0] for result in self.execute("SELECT id FROM attempts WHERE run_id = ?", (str(run_id),))]
+
+    def insert_attempts(self, rows):
+        with self.lock, self.conn:
+            for row in rows:
+                cursor = self.conn.execute(f"""INSERT INTO attempts ({', '.join(ATTEMPT_COLUMNS)})
+                                               VALUES ({', '.join(['?'] * len(ATTEMPT_COLUMNS))})
+                                               ON CONFLICT (id) DO NOTHING""",
+                                           [attempt_value(row, c) for c in ATTEMPT_COLUMNS])
+
+                # as with Postgres, tool calls are only added along with their attempt
+                if cursor.rowcount:
+                    self.conn.executemany("""INSERT INTO attempt_tool_calls (attempt_id, seq, args, output, error, latency)
+                                             VALUES (?, ?, ?, ?, ?, ?)""",
+                                          [(str(row["id"]), seq, json.dumps(call["args"]), json.dumps(call["output"]),
+                                            bool(call["error"]), call["latency"])
+                                           for seq, call in enumerate(row.get("tool_call_rows") or [], 1)])
+
+    def fail_attempt(self, run_id, attempt_id):
+        self.insert_attempts([{"id": attempt_id, "run_id": run_id, "result": False}])
+
+    def add_problem_names(self, run_id, problem_names):
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE attempts SET function_name = ? WHERE id = ?",
+                                  [(problem['function_name'], str(problem['id'])) for problem in problem_names])
+
+    def save_run_result(self, run_id, start_time, score, percent, total_call_count):
+        self.execute("""UPDATE runs SET total_run_time = ?, final_score = ?, score_percent = ?, total_api_calls = ?
+                        WHERE id = ?""",
+                     ((datetime.now() - start_time).total_seconds(),
+                      json.dumps({"numerator": score["numerator"], "denominator": score["denominator"]}),
+                      percent,
+                      total_call_count,
+                      str(run_id)))
+
+    def save_run_failure(self, run_id, failure_info):
+        self.execute("UPDATE runs SET failure_info = ? WHERE id = ?", (json.dumps(failure_info), str(run_id)))
+
+    def calculate_pass_at_k(self, run_id):
+        results = self.execute("""SELECT function_name,
+                                         sum(result),
+                                         sum(NOT result)
+                                  FROM attempts WHERE run_id = ?
+                                  GROUP BY function_name ORDER BY function_name""", (str(run_id),))
+        if not results:
+            return 0, 0, 0, 0
+
+        total_problems = len(results)
+        problems_passed = sum(1 for _, success, _ in results if success > 0)
+
+        # k is the number of attempts per problem (assuming all problems have the same number)
+        k = results[0][1] + results[0][2]
+
+        return problems_passed / total_problems, k, problems_passed, total_problems
+
+    def duration_history(self, model_identifier):
+        # SQLite has no stddev, so work it out from the mean of the squares
+        (count, mean, mean_square), = self.execute(
+            """SELECT count(a.time_taken), avg(a.time_taken), avg(a.time_taken * a.time_taken)
+               FROM (SELECT id FROM runs WHERE model_identifier = ?
+                     ORDER BY datetime_start DESC LIMIT ?) r
+               JOIN attempts a ON a.run_id = r.id""", (model_identifier, q.DURATION_HISTORY_RUNS))
+        if count < 2:
+            return None
+
+        variance = max(mean_square - mean * mean, 0) * count / (count - 1)
+        return count, mean, math.sqrt(variance)
+
+    def get_labels(self, run_id):
+        results = self.execute("SELECT labels FROM runs WHERE id = ?", (str(run_id),))
+        return (loads(results[0][0]) or []) if results else None
+
+    def set_labels(self, run_id, labels):
+        self.execute("UPDATE runs SET labels = ? WHERE id = ?", (json.dumps(labels), str(run_id)))
+
+    def add_label(self, run_id, label_value):
+        labels = self.get_labels(run_id)
+        if labels is None:
+            return False
+
+        if label_value not in labels:
+            self.set_labels(run_id, labels + [label_value])
+
+        return True
+
+    def remove_label(self, run_id, label_value):
+        labels = self.get_labels(run_id)
+        if labels is None:
+            return False
+
+        self.set_labels(run_id, [label for label in labels if label != label_value])
+        return True
+
+    def list_run_ids(self):
+        return [result[0] for result in self.execute("SELECT id FROM runs ORDER BY datetime_start")]
+
+    def export_run(self, run_id):
+        results = self.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE id = ?", (str(run_id),))
+        if not results:
+            return None
+
+        run = dict(zip(RUN_COLUMNS, results[0]))
+        for c in JSON_RUN_COLUMNS:
+            run[c] = loads(run[c])
+
+        attempts = []
+        for result in self.execute(f"SELECT {', '.join(ATTEMPT_COLUMNS)} FROM attempts WHERE run_id = ?", (str(run_id),)):
+            attempt = dict(zip(ATTEMPT_COLUMNS, result))
+            attempt["result"] = bool(attempt["result"])
+            attempt["meta"] = loads(attempt["meta"])
+            attempt["tool_call_rows"] = [
+                {"args": loads(args), "output": loads(output), "error": bool(error), "latency": latency}
+                for args, output, error, latency in self.execute(
+                    "SELECT args, output, error, latency FROM attempt_tool_calls WHERE attempt_id = ? ORDER BY seq",
+                    (attempt["id"],))]
+            attempts.append(attempt)
+
+        return {"run": run, "attempts": attempts}
+
+    def import_run(self, data):
+        run = data["run"]
+        self.execute(f"""INSERT INTO runs ({', '.join(RUN_COLUMNS)})
+                         VALUES ({', '.join(['?'] * len(RUN_COLUMNS))})
+                         ON CONFLICT (id) DO NOTHING""",
+                     [dumps(run[c]) if c in JSON_RUN_COLUMNS else run[c] for c in RUN_COLUMNS])
+
+        self.insert_attempts([attempt | {"meta": dumps(attempt.get("meta"))} for attempt in data["attempts"]])
+
+    def enable_log_compression(self, level):
+        print("\n### SYSTEM: log-compression is only supported with Postgres, storing logs uncompressed")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
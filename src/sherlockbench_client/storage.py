@@ -0,0 +1,183 @@
+from abc import ABC, abstractmethod
+
+import psycopg2
+
+from . import queries as q
+from .db import get_pool, release_pool
+from .log_compression import latest_codec
+
+class Storage(ABC):
+    """
+    Where runs and attempts are kept. The run engine, the attempt writer and
+    the commands only talk to this interface, so a run can be stored in
+    Postgres or in a local SQLite file.
+
+    Rows are plain dicts, the same ones queries.add_attempt builds.
+    """
+
+    # exceptions after which a write may be retried
+    errors = ()
+
+    @abstractmethod
+    def create_run(self, config_non_sensitive, run_id, benchmark_version, labels=None):
+        ...
+
+    @abstractmethod
+    def get_failed_run(self, run_id):
+        """The run's id, model_identifier, benchmark_version, config and failure_info, or None."""
+
+    @abstractmethod
+    def get_completed_attempts(self, run_id):
+        ...
+
+    @abstractmethod
+    def insert_attempts(self, rows):
+        """Insert attempt rows, skipping any which are already stored."""
+
+    @abstractmethod
+    def fail_attempt(self, run_id, attempt_id):
+        ...
+
+    @abstractmethod
+    def add_problem_names(self, run_id, problem_names):
+        ...
+
+    @abstractmethod
+    def save_run_result(self, run_id, start_time, score, percent, total_call_count):
+        ...
+
+    @abstractmethod
+    def save_run_failure(self, run_id, failure_info):
+        ...
+
+    @abstractmethod
+    def calculate_pass_at_k(self, run_id):
+        """(pass@k score, k, problems_passed, total_problems), as queries.calculate_pass_at_k."""
+
+    @abstractmethod
+    def duration_history(self, model_identifier):
+        """(count, mean, stddev) of the model's recent attempt durations, as queries.get_duration_history."""
+
+    @abstractmethod
+    def add_label(self, run_id, label_value):
+        ...
+
+    @abstractmethod
+    def remove_label(self, run_id, label_value):
+        ...
+
+    @abstractmethod
+    def list_run_ids(self):
+        ...
+
+    @abstractmethod
+    def export_run(self, run_id):
+        """A run with its attempts and tool calls as JSON-compatible data, or None."""
+
+    @abstractmethod
+    def import_run(self, data):
+        """Store a run from export_run. Attempts already stored are skipped."""
+
+    @abstractmethod
+    def enable_log_compression(self, level):
+        ...
+
+    def close(self):
+        pass
+
+class PostgresStorage(Storage):
+    """The queries module on a shared ConnectionPool."""
+
+    errors = (psycopg2.Error,)
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+
+    def create_run(self, config_non_sensitive, run_id, benchmark_version, labels=None):
+        with self.db_pool.cursor() as cursor:
+            q.create_run(cursor, config_non_sensitive, run_id, benchmark_version, labels)
+
+    def get_failed_run(self, run_id):
+        with self.db_pool.cursor() as cursor:
+            failed_run = q.get_failed_run(cursor, run_id)
+
+            # the run is about to be resumed, so its month's partition must be attached
+            if failed_run:
+                q.create_run_partition(cursor, run_id)
+
+        return failed_run
+
+    def get_completed_attempts(self, run_id):
+        return self.db_pool.run(q.get_completed_attempts, run_id)
+
+    def insert_attempts(self, rows):
+        self.db_pool.run(q.insert_attempts, rows)
+
+    def fail_attempt(self, run_id, attempt_id):
+        self.db_pool.run(q.fail_attempt, run_id, attempt_id)
+
+    def add_problem_names(self, run_id, problem_names):
+        with self.db_pool.cursor() as cursor:
+            q.add_problem_names(cursor, problem_names, run_id)
+            q.refresh_function_results(cursor, run_id)
+
+    def save_run_result(self, run_id, start_time, score, percent, total_call_count):
+        with self.db_pool.cursor() as cursor:
+            q.save_run_result(cursor, run_id, start_time, score, percent, total_call_count)
+
+    def save_run_failure(self, run_id, failure_info):
+        with self.db_pool.cursor() as cursor:
+            q.save_run_failure(cursor, run_id, failure_info)
+
+    def calculate_pass_at_k(self, run_id):
+        return self.db_pool.run(q.calculate_pass_at_k, run_id)
+
+    def duration_history(self, model_identifier):
+        return self.db_pool.run(q.get_duration_history, model_identifier)
+
+    def add_label(self, run_id, label_value):
+        with self.db_pool.cursor() as cursor:
+            return q.add_label(cursor, run_id, label_value)
+
+    def remove_label(self, run_id, label_value):
+        with self.db_pool.cursor() as cursor:
+            return q.remove_label(cursor, run_id, label_value)
+
+    def list_run_ids(self):
+        return self.db_pool.run(q.list_run_ids)
+
+    def export_run(self, run_id):
+        return self.db_pool.run(q.export_run, run_id)
+
+    def import_run(self, data):
+        with self.db_pool.cursor() as cursor:
+            q.import_run(cursor, data)
+
+    def enable_log_compression(self, level):
+        with self.db_pool.cursor() as cursor:
+            q.use_log_compression(latest_codec(cursor, level))
+
+    def close(self):
+        q.use_log_compression(None)
+
+        # other storages in the process may share the pool
+        release_pool(self.db_pool)
+
+def open_storage(config):
+    """
+    The storage configured in credentials.yaml: a local SQLite file if
+    `sqlite-path` is set, otherwise the Postgres db at `postgres-url`.
+    """
+    if config.get("sqlite-path"):
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(config["sqlite-path"])
+
+    return PostgresStorage(get_pool(config))
+
+def open_storage_spec(config, spec):
+    """A storage from a command-line spec: "postgres", or the path of a SQLite file."""
+    if spec == "postgres":
+        return PostgresStorage(get_pool(config))
+
+    from .sqlite_storage import SQLiteStorage
+    return SQLiteStorage(spec)
@@ -0,0 +1,156 @@
+import ast
+import json
+import re
+from functools import cache
+
+from pydantic import BaseModel
+
+TYPE_MAPPING = {
+    "string": str,
+    "integer": int,
+    "boolean": bool,
+    "float": float
+}
+
+class StructuredOutputError(ValueError):
+    """When no usable JSON object can be recovered from an LLM response."""
+    pass
+
+@cache
+def make_schema(output_type):
+    """The pydantic model for a prediction. Built once per output type."""
+
+    class Prediction(BaseModel):
+        """Prediction of the function output."""
+
+        thoughts: str
+        expected_output: TYPE_MAPPING.get(output_type)
+
+    return Prediction
+
+@cache
+def make_json_schema(output_type):
+    """The JSON schema for a prediction, for providers which take a plain dict."""
+    return make_schema(output_type).model_json_schema()
+
+# precompile the schemas for the output types the server uses
+for _output_type in TYPE_MAPPING:
+    make_json_schema(_output_type)
+
+STRUCTURAL_CHARS = re.compile(r'[{}"\\]')
+
+def scan_json_object(text):
+    """
+    Find the last top-level brace-enclosed block in a single pass over text.
+    Quotes are only tracked inside a block so apostrophes in the surrounding
+    prose don't confuse it.
+
+    Returns:
+        tuple: (candidate, closers) where closers is the string needed to close
+               a block which was cut off (e.g. by max_tokens), otherwise "".
+               candidate is None if there are no braces at all.
+    """
+    depth = 0
+    start = None
+    in_string = False
+    escaped = -1
+    last_block = None
+
+    # only the structural characters matter, so let the regex engine skip the rest
+    for m in STRUCTURAL_CHARS.finditer(text):
+        i = m.start()
+        c = text[i]
+
+        if in_string:
+            if i == escaped:
+                continue
+            elif c == '\\':
+                escaped = i + 1
+            elif c == '"':
+                in_string = False
+        elif c == '"' and depth > 0:
+            in_string = True
+        elif c == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                last_block = (start, i + 1)
+
+    # an unterminated block after the last complete one means the response was truncated
+    if depth > 0 and (last_block is None or start >= last_block[1]):
+        return text[start:], ('"' if in_string else "") + "}" * depth
+
+    if last_block:
+        return text[last_block[0]:last_block[1]], ""
+
+    return None, ""
+
+def remove_trailing_commas(s):
+    return re.sub(r",\s*([}\]])", r"\1", s)
+
+def quote_bare_keys(s):
+    return re.sub(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:', r'\1"\2":', s)
+
+def python_literal(s):
+    """Models sometimes answer with a Python dict: single quotes, True/False/None."""
+    value = ast.literal_eval(s)
+    if not isinstance(value, dict):
+        raise ValueError("not a dict")
+    return value
+
+def loads_lenient(s):
+    # strict=False allows raw newlines and tabs inside strings
+    return json.loads(s, strict=False)
+
+REPAIRS = [
+    loads_lenient,
+    lambda s: loads_lenient(remove_trailing_commas(s)),
+    lambda s: loads_lenient(quote_bare_keys(remove_trailing_commas(s))),
+    python_literal,
+]
+
+def extract_json(text):
+    """
+    Recover a JSON object from an LLM response: bare JSON, JSON wrapped in
+    prose or code fences, and the common syntax slips (raw newlines in strings,
+    trailing commas, bare keys, Python literals, truncated output).
+
+    Raises:
+        StructuredOutputError: if nothing can be recovered, so the caller can
+                               decide whether another LLM call is worth it.
+    """
+    if not text:
+        raise StructuredOutputError("empty response")
+
+    # fast path for well-behaved providers
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            return value
+    except json.JSONDecodeError:
+        pass
+
+    candidate, closers = scan_json_object(text)
+    if candidate is None:
+        raise StructuredOutputError("no JSON object in response")
+
+    for repair in REPAIRS:
+        for attempt in (candidate, candidate + closers) if closers else (candidate,):
+            try:
+                return repair(attempt)
+            except (ValueError, SyntaxError):
+                continue
+
+    raise StructuredOutputError(f"could not repair JSON: {candidate[:200]}")
+
+def parse_prediction(text):
+    """Return (thoughts, expected_output) from a verification response."""
+    value = extract_json(text)
+
+    if "expected_output" not in value:
+        raise StructuredOutputError("response has no expected_output")
+
+    return value.get("thoughts", ""), value["expected_output"]
@@ -0,0 +1,47 @@
+import argparse
+import sys
+from datetime import datetime
+
+from sherlockbench_client.main import load_config
+from sherlockbench_client.db import get_pool, close_pools
+from sherlockbench_client import queries as q
+
+
+def month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a month as YYYY-MM, got '{value}'")
+
+def main():
+    parser = argparse.ArgumentParser(description="List, detach or re-attach the monthly partitions of the attempts table.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--detach", type=month, metavar="YYYY-MM", help="Detach a month's partition, e.g. to archive it")
+    group.add_argument("--attach", type=month, metavar="YYYY-MM", help="Attach a previously detached partition again")
+    args = parser.parse_args()
+
+    try:
+        config = load_config("resources/credentials.yaml")
+
+        with get_pool(config).cursor() as cursor:
+            if args.detach:
+                q.detach_attempt_partition(cursor, args.detach)
+                print(f"Detached {q.attempt_partition_name(args.detach)}. It can now be dumped with pg_dump and dropped.")
+
+            elif args.attach:
+                q.attach_attempt_partition(cursor, args.attach)
+                print(f"Attached {q.attempt_partition_name(args.attach)}.")
+
+            else:
+                for name, bound, size in q.list_attempt_partitions(cursor):
+                    print(f"{name:<20} {size / 1024 ** 2:10.1f} MB  {bound}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,9 @@
 import argparse
 import sys
 
-import psycopg2
-from pypika import Query, Table
-
 from sherlockbench_client.main import load_config
 from sherlockbench_client.run_api import is_valid_uuid
-
-
-def add_label(cursor, run_id, label_value):
-    """
-    Add a label to the 'labels' array for a run in the database.
-
-    Args:
-        cursor: Database cursor
-        run_id: The UUID of the run to label
-        label_value: String value to add as a label
-
-    Returns:
-        bool: True if the run was found and updated, False otherwise
-    """
-    # First check if the run exists
-    check_query = """
-    SELECT id FROM runs WHERE id = %s
-    """
-    cursor.execute(check_query, (str(run_id),))
-    result = cursor.fetchone()
-
-    if not result:
-        return False
-
-    # Update the labels column by appending the new label
-    # Only append if the label doesn't already exist in the array
-    update_query = """
-    UPDATE runs
-    SET labels =
-        CASE
-            WHEN labels IS NULL THEN ARRAY[%s]
-            WHEN %s = ANY(labels) THEN labels
-            ELSE array_append(labels, %s)
-        END
-    WHERE id = %s
-    """
-    cursor.execute(update_query, (label_value, label_value, label_value, str(run_id)))
-    cursor.connection.commit()
-
-    return True
-
-
-def remove_label(cursor, run_id, label_value):
-    """
-    Remove a label from the 'labels' array for a run in the database.
-
-    Args:
-        cursor: Database cursor
-        run_id: The UUID of the run to update
-        label_value: String value to remove from labels
-
-    Returns:
-        bool: True if the run was found and updated, False otherwise
-    """
-    # First check if the run exists
-    check_query = """
-    SELECT id FROM runs WHERE id = %s
-    """
-    cursor.execute(check_query, (str(run_id),))
-    result = cursor.fetchone()
-
-    if not result:
-        return False
-
-    # Update the labels column by removing the specified label
-    update_query = """
-    UPDATE runs
-    SET labels = array_remove(labels, %s)
-    WHERE id = %s
-    """
-    cursor.execute(update_query, (label_value, str(run_id)))
-    cursor.connection.commit()
-
-    return True
+from sherlockbench_client.storage import open_storage
 
 
 def main():
@@ -116,15 +40,13 @@ def main():
         # Load configuration to get database connection info
         config = load_config("resources/credentials.yaml")
 
-        # Connect to postgresql
-        db_conn = psycopg2.connect(config["postgres-url"])
-        cursor = db_conn.cursor()
+        storage = open_storage(config)
 
         # Process each run ID
         for run_id in run_ids:
             if add_label_value:
                 # Add the label
-                success = add_label(cursor, run_id, add_label_value)
+                success = storage.add_label(run_id, add_label_value)
                 if success:
                     print(f"Added label '{add_label_value}' to run '{run_id}'")
                     success_count += 1
@@ -133,7 +55,7 @@ def main():
                     not_found_count += 1
             elif remove_label_value:
                 # Remove the label
-                success = remove_label(cursor, run_id, remove_label_value)
+                success = storage.remove_label(run_id, remove_label_value)
                 if success:
                     print(f"Removed label '{remove_label_value}' from run '{run_id}'")
                     success_count += 1
@@ -149,10 +71,8 @@ def main():
         print(f"Error: {str(e)}")
         sys.exit(1)
     finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
-        if 'db_conn' in locals() and db_conn:
-            db_conn.close()
+        if 'storage' in locals():
+            storage.close()
 
 
 if __name__ == "__main__":
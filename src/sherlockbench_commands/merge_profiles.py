@@ -0,0 +1,49 @@
+import argparse
+import pstats
+import sys
+from collections import Counter
+
+from sherlockbench_client.main import load_config
+from sherlockbench_client.profiling import profile_dir, read_collapsed, write_collapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the per-attempt profiles of a run made with --profile.")
+    parser.add_argument("run_id", help="The run whose profiles to merge")
+    parser.add_argument("--dir", help="Where the run's profiles were saved (default: profiles.dir in config.yaml)")
+    parser.add_argument("--top", type=int, default=20, help="How many functions to list from cProfile profiles")
+    args = parser.parse_args()
+
+    # the same dir the run saved them to, unless told otherwise
+    config = load_config("resources/config.yaml") if args.dir is None else {"profiles": {"dir": args.dir}}
+    run_dir = profile_dir(config, args.run_id)
+    collapsed = sorted(run_dir.glob("*.collapsed"))
+    stats = sorted(run_dir.glob("*.pstats"))
+
+    if not collapsed and not stats:
+        print(f"Error: no profiles in {run_dir}")
+        sys.exit(1)
+
+    if collapsed:
+        stacks = Counter()
+        for path in collapsed:
+            stacks.update(read_collapsed(path))
+
+        output = run_dir.parent / f"{args.run_id}.collapsed"
+        write_collapsed(output, stacks)
+
+        print(f"Merged {len(collapsed)} sampled attempts into {output}")
+        print(f"Render it with e.g. `flamegraph.pl {output} > {args.run_id}.svg`, or open it in speedscope.")
+
+    if stats:
+        merged = pstats.Stats(*(str(path) for path in stats))
+
+        output = run_dir.parent / f"{args.run_id}.pstats"
+        merged.dump_stats(output)
+
+        print(f"Merged {len(stats)} cProfile attempts into {output}")
+        merged.sort_stats("tottime").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,64 @@
 import argparse
+import json
 import re
 import sys
 
-import psycopg2
-
 from sherlockbench_client.main import load_config
 from sherlockbench_client.run_api import is_valid_uuid
+from sherlockbench_client.db import get_pool, close_pools
+from sherlockbench_client.log_compression import read_log
+from sherlockbench_client.queries import RUN_PARTITION
 
 
-def get_attempt_log(cursor, attempt_id):
+def get_attempt_log(cursor, attempt_id, run_id=None):
     """
     Retrieves the complete_log for a specified attempt ID.
 
     Args:
         cursor: Database cursor
         attempt_id: The UUID of the attempt
+        run_id: The UUID of the attempt's run, if known. Only the run's own
+                partition is read then, rather than probing every month's.
 
     Returns:
         tuple: (log, function_name) where log is the complete_log text and function_name is the name of the function
                Returns (None, None) if attempt not found
     """
     query = """
-    SELECT complete_log, function_name FROM attempts WHERE id = %s
+    SELECT complete_log, complete_log_zstd, log_dictionary_id, function_name FROM attempts WHERE id = %s
     """
-    cursor.execute(query, (str(attempt_id),))
+    params = (str(attempt_id),)
+
+    if run_id is not None:
+        query += f" AND run_id = %s AND {RUN_PARTITION}"
+        params += (str(run_id), str(run_id))
+
+    cursor.execute(query, params)
     result = cursor.fetchone()
 
     if not result:
         return None, None
 
-    return result[0], result[1]
+    complete_log, complete_log_zstd, log_dictionary_id, function_name = result
+
+    return read_log(cursor, complete_log, complete_log_zstd, log_dictionary_id), function_name
+
+def get_tool_calls(cursor, attempt_id):
+    """
+    The tool calls recorded for an attempt in attempt_tool_calls, formatted one per line.
+    Attempts from before the table existed have none.
+    """
+    query = """
+    SELECT args, output, error FROM attempt_tool_calls WHERE attempt_id = %s ORDER BY seq
+    """
+    cursor.execute(query, (str(attempt_id),))
+
+    calls = []
+    for args, output, error in cursor.fetchall():
+        args_str = ", ".join(json.dumps(a) for a in args) if isinstance(args, list) else json.dumps(args)
+        calls.append(f"({args_str}) → {'ERROR: ' if error else ''}{json.dumps(output)}")
+
+    return calls
 
 def parse_tool_calls(log_text):
     # Split the log by "### SYSTEM: calling tool" marker
@@ -51,34 +80,34 @@ def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Print the complete log for a specific attempt.")
     parser.add_argument("attempt_id", help="UUID of the attempt to print the log for")
+    parser.add_argument("--run-id", help="UUID of the attempt's run, so that only its month's partition is read")
 
     args = parser.parse_args()
     attempt_id = args.attempt_id
 
     assert is_valid_uuid(attempt_id)
+    assert args.run_id is None or is_valid_uuid(args.run_id)
 
     # Load configuration to get database connection info
     config = load_config("resources/credentials.yaml")
 
-    # Connect to postgresql
-    db_conn = psycopg2.connect(config["postgres-url"])
-    cursor = db_conn.cursor()
-
     # Get the attempt log
-    log, function_name = get_attempt_log(cursor, attempt_id)
+    with get_pool(config).cursor() as cursor:
+        log, function_name = get_attempt_log(cursor, attempt_id, args.run_id)
+        calls = get_tool_calls(cursor, attempt_id)
+
+    close_pools()
 
     assert log, "Failed to get a log for this attempt id."
 
     print(f"=== Log for attempt '{attempt_id}' (function: {function_name}) ===\n")
 
-    # Print the log
-    calls = parse_tool_calls(log)
+    # Older attempts only have their tool calls in the log
+    if not calls:
+        calls = parse_tool_calls(log)
 
     for call in calls:
         print(call)
 
-    cursor.close()
-    db_conn.close()
-
 if __name__ == "__main__":
     main()
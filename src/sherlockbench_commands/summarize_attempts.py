@@ -4,11 +4,11 @@ import io
 import sys
 from collections import defaultdict
 
-import psycopg2
-from pypika import Query, Table, functions
+from pypika import Query, Table
 
 from sherlockbench_client.main import load_config
 from sherlockbench_client.run_api import is_valid_uuid
+from sherlockbench_client.db import get_pool, close_pools
 
 def are_totals_equal(data):
     """
@@ -32,6 +32,10 @@ def get_attempt_summary(cursor, run_ids):
     """
     Get a summary of attempts grouped by function name for specified runs.
 
+    Completed runs are read from the function_results rollup. Runs which
+    haven't completed yet have no function names, so their attempts are
+    counted directly and reported under "Unknown".
+
     Args:
         cursor: Database cursor
         run_ids: List of UUIDs of the runs to summarize
@@ -39,41 +43,45 @@ def get_attempt_summary(cursor, run_ids):
     Returns:
         dict: A dictionary where keys are function names and values are dicts with 'success' and 'failure' counts
     """
-    attempts = Table("attempts")
-
     # Convert list of UUIDs to strings
     run_id_strings = [str(run_id) for run_id in run_ids]
 
-    # Query the database
-    query = (
-        Query.from_(attempts)
-        .select(
-            attempts.function_name,
-            attempts.result,
-            functions.Count(attempts.id).as_("count")
-        )
-        .where(attempts.run_id.isin(run_id_strings))
-        .groupby(
-            attempts.function_name,
-            attempts.result
-        )
-        .orderby(attempts.function_name)
-    )
+    summary = defaultdict(lambda: {"success": 0, "failure": 0})
 
-    cursor.execute(str(query))
-    results = cursor.fetchall()
+    cursor.execute("""
+    SELECT run_id, function_name, success, failure FROM function_results
+    WHERE run_id = ANY(%s::uuid[])
+    """, (run_id_strings,))
+
+    rolled_up = set()
+    for run_id, function_name, success, failure in cursor.fetchall():
+        rolled_up.add(str(run_id))
+        summary[function_name]["success"] += success
+        summary[function_name]["failure"] += failure
+
+    remaining = [run_id for run_id in run_id_strings if run_id not in rolled_up]
+    if remaining:
+        for function_name, counts in count_attempts(cursor, remaining).items():
+            summary[function_name]["success"] += counts["success"]
+            summary[function_name]["failure"] += counts["failure"]
+
+    return dict(sorted(summary.items()))
+
+def count_attempts(cursor, run_ids):
+    """The same summary as get_attempt_summary, aggregated from the attempts themselves."""
+    cursor.execute("""
+    SELECT a.function_name, count(*) FILTER (WHERE a.result), count(*) FILTER (WHERE NOT a.result)
+    FROM runs r
+    JOIN attempts a ON a.run_id = r.id AND a.run_started = r.datetime_start
+    WHERE r.id = ANY(%s::uuid[])
+    GROUP BY a.function_name
+    ORDER BY a.function_name
+    """, (run_ids,))
 
     # Process the results
-    summary = defaultdict(lambda: {"success": 0, "failure": 0})
-    for row in results:
-        function_name, result, count = row
-        if function_name is None:
-            function_name = "Unknown"
-
-        if result.lower() == "true":
-            summary[function_name]["success"] += count
-        else:
-            summary[function_name]["failure"] += count
+    summary = {}
+    for function_name, success, failure in cursor.fetchall():
+        summary[function_name or "Unknown"] = {"success": success, "failure": failure}
 
     return summary
 
@@ -92,13 +100,14 @@ def get_run_ids_by_label(cursor, labels):
     run_ids = []
 
     # Use native SQL query with array overlap operator for better compatibility
-    # The && operator checks if there's any overlap between the labels arrays
+    # The && operator checks if there's any overlap between the labels arrays.
+    # The labels are passed as a parameter, never formatted into the SQL.
     query_str = """
     SELECT id FROM runs
-    WHERE labels && ARRAY[{}]
-    """.format(', '.join([f"'{label}'" for label in labels]))
+    WHERE labels && %s::text[]
+    """
 
-    cursor.execute(query_str)
+    cursor.execute(query_str, (list(labels),))
     results = cursor.fetchall()
 
     for result in results:
@@ -176,34 +185,32 @@ def main():
         # Load configuration to get database connection info
         config = load_config("resources/credentials.yaml")
 
-        # Connect to postgresql
-        db_conn = psycopg2.connect(config["postgres-url"])
-        cursor = db_conn.cursor()
-
-        # Determine run IDs based on input
-        if labels:
-            # Get run IDs that match the specified labels
-            run_ids = get_run_ids_by_label(cursor, labels)
-            if not run_ids:
-                label_list = ', '.join(f"'{label}'" for label in labels)
-                print(f"Error: No runs found with label(s) {label_list}")
+        # Query postgresql
+        with get_pool(config).cursor() as cursor:
+            # Determine run IDs based on input
+            if labels:
+                # Get run IDs that match the specified labels
+                run_ids = get_run_ids_by_label(cursor, labels)
+                if not run_ids:
+                    label_list = ', '.join(f"'{label}'" for label in labels)
+                    print(f"Error: No runs found with label(s) {label_list}")
+                    sys.exit(1)
+                print(f"Found {len(run_ids)} runs with the specified label(s)")
+
+            # Check which runs exist in the database
+            existing_ids, missing_ids = check_runs_exist(cursor, run_ids)
+
+            # Exit if any specified run IDs are missing
+            if missing_ids:
+                print(f"Error: The following run IDs were not found in the database: {', '.join(missing_ids)}")
                 sys.exit(1)
-            print(f"Found {len(run_ids)} runs with the specified label(s)")
 
-        # Check which runs exist in the database
-        existing_ids, missing_ids = check_runs_exist(cursor, run_ids)
-
-        # Exit if any specified run IDs are missing
-        if missing_ids:
-            print(f"Error: The following run IDs were not found in the database: {', '.join(missing_ids)}")
-            sys.exit(1)
-
-        if not existing_ids:
-            print("Error: No run IDs were found in the database.")
-            sys.exit(1)
+            if not existing_ids:
+                print("Error: No run IDs were found in the database.")
+                sys.exit(1)
 
-        # Get attempt summary for existing runs
-        summary = get_attempt_summary(cursor, existing_ids)
+            # Get attempt summary for existing runs
+            summary = get_attempt_summary(cursor, existing_ids)
 
         # Output header
         if labels:
@@ -310,10 +317,7 @@ def main():
         print(f"Error: {str(e)}")
         sys.exit(1)
     finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
-        if 'db_conn' in locals() and db_conn:
-            db_conn.close()
+        close_pools()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import argparse
+import sys
+
+from psycopg2 import Binary
+
+from sherlockbench_client.main import load_config
+from sherlockbench_client.db import get_pool, close_pools
+from sherlockbench_client.log_compression import LogCodec, train_dictionary, read_log, DICTIONARY_SIZE, DEFAULT_LEVEL
+
+
+def sample_logs(cursor, sample_size):
+    """A random sample of attempt logs, decompressed if need be."""
+    query = """
+    SELECT complete_log, complete_log_zstd, log_dictionary_id FROM attempts
+    WHERE complete_log IS NOT NULL OR complete_log_zstd IS NOT NULL
+    ORDER BY random() LIMIT %s
+    """
+    cursor.execute(query, (sample_size,))
+
+    return [read_log(cursor, *row) for row in cursor.fetchall()]
+
+def recompress_logs(pool, codec, batch_size=500):
+    """
+    Move uncompressed logs into complete_log_zstd, committing each batch so
+    an interrupted run can simply be started again. Returns the number moved.
+    """
+    count = 0
+    while True:
+        with pool.cursor() as cursor:
+            cursor.execute("SELECT id, run_started, complete_log FROM attempts WHERE complete_log IS NOT NULL LIMIT %s",
+                           (batch_size,))
+            rows = cursor.fetchall()
+
+            if not rows:
+                return count
+
+            # run_started limits each update to the attempt's own partition
+            cursor.executemany(
+                """UPDATE attempts SET complete_log = NULL, complete_log_zstd = %s, log_dictionary_id = %s
+                   WHERE id = %s AND run_started = %s""",
+                [(Binary(codec.compress(log)), codec.dictionary_id, id, run_started) for id, run_started, log in rows])
+
+        count += len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a new zstd dictionary for compressing attempt logs.")
+    parser.add_argument("--samples", type=int, default=2000, help="Number of attempt logs to train on")
+    parser.add_argument("--size", type=int, default=DICTIONARY_SIZE, help="Dictionary size in bytes")
+    parser.add_argument("--recompress", action="store_true",
+                        help="Also compress the logs stored uncompressed, e.g. from before log-compression was enabled")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="zstd level for --recompress")
+    args = parser.parse_args()
+
+    try:
+        config = load_config("resources/credentials.yaml")
+
+        with get_pool(config).cursor() as cursor:
+            samples = sample_logs(cursor, args.samples)
+
+            if not samples:
+                print("Error: there are no attempt logs to train on")
+                sys.exit(1)
+
+            dictionary = train_dictionary(samples, args.size)
+
+            cursor.execute("INSERT INTO log_dictionaries (dictionary) VALUES (%s) RETURNING id", (Binary(dictionary),))
+            dictionary_id = cursor.fetchone()[0]
+
+        print(f"Trained dictionary {dictionary_id} ({len(dictionary)} bytes) from {len(samples)} logs.")
+        print("New runs with log-compression enabled will use it.")
+
+        if args.recompress:
+            codec = LogCodec(dictionary_id, dictionary, args.level)
+            count = recompress_logs(get_pool(config), codec)
+            print(f"Recompressed {count} logs. Run VACUUM FULL attempts to return the space to the OS.")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import sys
+
+from sherlockbench_client.main import load_config
+from sherlockbench_client.run_api import is_valid_uuid
+from sherlockbench_client.storage import open_storage_spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy runs between storages, e.g. from a local SQLite file into Postgres.")
+    parser.add_argument("source", help="'postgres', or the path of a SQLite file")
+    parser.add_argument("destination", help="'postgres', or the path of a SQLite file")
+    parser.add_argument("run_ids", nargs="*", help="UUID(s) of the run(s) to copy (default: all runs)")
+    args = parser.parse_args()
+
+    invalid_uuids = [run_id for run_id in args.run_ids if not is_valid_uuid(run_id)]
+    if invalid_uuids:
+        print(f"Error: The following IDs are not valid UUIDs: {', '.join(invalid_uuids)}")
+        sys.exit(1)
+
+    if args.source == args.destination:
+        print("Error: the source and destination are the same")
+        sys.exit(1)
+
+    source = destination = None
+
+    try:
+        config = load_config("resources/credentials.yaml")
+
+        source = open_storage_spec(config, args.source)
+        destination = open_storage_spec(config, args.destination)
+
+        for run_id in args.run_ids or source.list_run_ids():
+            data = source.export_run(run_id)
+            if data is None:
+                print(f"Warning: Run '{run_id}' not found in {args.source}")
+                continue
+
+            # runs and attempts which are already there are skipped, so this can be re-run
+            destination.import_run(data)
+            print(f"Copied run '{run_id}' ({len(data['attempts'])} attempts)")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        for storage in (source, destination):
+            if storage is not None:
+                storage.close()
+
+
+if __name__ == "__main__":
+    main()
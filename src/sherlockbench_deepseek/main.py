@@ -2,9 +2,9 @@ from datetime import datetime
 from functools import partial
 from pprint import pprint
 
-from openai import OpenAI, APITimeoutError
+from openai import OpenAI, APITimeoutError, APIConnectionError, RateLimitError
 
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
+from sherlockbench_client import destructure, post, load_endpoints, Lane, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
 from sherlockbench_client import run_with_error_handling, set_current_attempt
 
 from .investigate_decide_verify import investigate_decide_verify
@@ -18,30 +18,41 @@ def create_completion(client, **kwargs):
         **kwargs
     )
 
-def run_benchmark(executor, config, db_conn, cursor, run_id, attempts, start_time):
+def run_benchmark(executor, config, storage, run_id, attempts, start_time):
     """
     Run the OpenAI benchmark with the given parameters.
     This function is called by run_with_error_handling.
     """
-    client = OpenAI(api_key=config['api-keys']['deepseek'],
-                    base_url="https://api.deepseek.com")
-
     postfn = lambda *args: post(config["base-url"], run_id, *args)
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def lane_for_endpoint(endpoint):
+        client = OpenAI(api_key=endpoint["api-key"],
+                        base_url=endpoint["base-url"])
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            if "reasoning_effort" in config:
+                kwargs["reasoning_effort"] = config['reasoning_effort']
+
+            return create_completion(client, model=endpoint['model'], **kwargs)
 
-        if "reasoning_effort" in config:
-            kwargs["reasoning_effort"] = config['reasoning_effort']
+        # only worth probing when there are endpoints to choose between
+        health_check = None
+        if "endpoints" in config:
+            health_check = lambda: client.with_options(timeout=10, max_retries=0).models.list()
 
-        return create_completion(client, model=config['model'], **kwargs)
+        return Lane(endpoint["name"], completionfn, endpoint["rate-limit"],
+                    weight=endpoint["weight"],
+                    health_check=health_check)
 
     completionfn = LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                                  llmfn=completionfn,
-                                  backoff_exceptions=[(APITimeoutError, 300)])
+                                  llmfn=[lane_for_endpoint(e) for e in load_endpoints(config, "deepseek", "https://api.deepseek.com")],
+                                  backoff_exceptions=[(RateLimitError, 60), (APITimeoutError, 300), (APIConnectionError, 60)],
+                                  hedging=config.get("hedging"))
 
-    executor_p = partial(executor, postfn, completionfn, config, run_id, cursor)
+    executor_p = partial(executor, postfn, completionfn, config, run_id, storage)
 
     for i, attempt in enumerate(attempts, 1):
         print_progress_with_estimate(i, len(attempts), start_time)
@@ -1,10 +1,9 @@
 import json
-from datetime import datetime
 from functools import partial
 
 from openai import BadRequestError
 from pydantic import BaseModel
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, make_completionfn
+from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, get_decision_completionfn, AttemptUsage
 
 from .investigate_verify import list_to_map, normalize_args, format_tool_call, format_inputs, remove_think_blocks
 from .prompts import make_initial_messages
@@ -121,33 +120,37 @@ def investigate(config, postfn, completionfn, messages, printer, attempt_id, arg
 
     raise MsgLimitException("Investigation loop overrun.")
 
-def investigate_decide_verify(postfn, completionfn, config, run_id, cursor, attempt):
+def investigate_decide_verify(postfn, completionfn, config, run_id, storage, attempt):
     attempt_id, arg_spec, output_type, test_limit = destructure(attempt, "attempt-id", "arg-spec", "output-type", "test-limit")
 
-    start_time = datetime.now()
-    start_api_calls = completionfn.total_call_count
+    usage = AttemptUsage(attempt_id)
+    postfn = usage.record_tool_calls(postfn)
+    investigatefn = completionfn.for_attempt(usage, "investigation")
 
     # setup the printer
-    printer = AccumulatingPrinter()
+    printer = AccumulatingPrinter.for_attempt(config, attempt_id)
 
     printer.print("\n### SYSTEM: interrogating function with args", arg_spec)
 
     messages = make_initial_messages(test_limit)
-    tool_calls, tool_call_count = investigate(config, postfn, completionfn, messages,
-                                              printer, attempt_id, arg_spec, output_type, test_limit)
+    with usage.span("investigate"):
+        tool_calls, tool_call_count = investigate(config, postfn, investigatefn, messages,
+                                                  printer, attempt_id, arg_spec, output_type, test_limit)
 
     printer.print("\n### SYSTEM: making decision based on tool calls", arg_spec)
     printer.print(tool_calls)
 
-    completionfn = make_completionfn()
+    decisionfn = get_decision_completionfn()
 
     messages = make_decision_messages(tool_calls)
-    messages = decision(completionfn, messages, printer)
+    with usage.span("decision"):
+        messages = decision(decisionfn.for_attempt(usage, "decision"), messages, printer)
 
     printer.print("\n### SYSTEM: verifying function with args", arg_spec)
-    verification_result = verify(config, postfn, completionfn, messages, printer, attempt_id, partial(format_inputs, arg_spec), make_3p_verification_message)
+    with usage.span("verify"):
+        verification_result = verify(config, postfn, decisionfn.for_attempt(usage, "verification"), messages, printer, attempt_id, partial(format_inputs, arg_spec), make_3p_verification_message)
 
-    time_taken = (datetime.now() - start_time).total_seconds()
-    q.add_attempt(cursor, run_id, verification_result, time_taken, tool_call_count, printer, completionfn, start_api_calls, attempt_id)
+    time_taken = usage.elapsed()
+    q.add_attempt(storage, run_id, verification_result, time_taken, tool_call_count, printer, usage, attempt_id)
 
     return verification_result
@@ -1,11 +1,10 @@
 import json
-from datetime import datetime
 from functools import partial
 import re
 
 from openai import BadRequestError
 from pydantic import BaseModel
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, value_list_to_map
+from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, value_list_to_map, AttemptUsage, compact_for_verification
 
 from .prompts import make_initial_messages, make_2p_verification_message
 from .verify import verify
@@ -155,25 +154,31 @@ def investigate(config, postfn, completionfn, messages, printer, attempt_id, arg
     raise MsgLimitException("Investigation loop overrun.")
 
 
-def investigate_verify(postfn, completionfn, config, run_id, cursor, attempt):
+def investigate_verify(postfn, completionfn, config, run_id, storage, attempt):
     attempt_id, arg_spec, output_type, test_limit = destructure(attempt, "attempt-id", "arg-spec", "output-type", "test-limit")
 
-    start_time = datetime.now()
-    start_api_calls = completionfn.total_call_count
+    usage = AttemptUsage(attempt_id)
+    postfn = usage.record_tool_calls(postfn)
+    investigatefn = completionfn.for_attempt(usage, "investigation")
 
     # setup the printer
-    printer = AccumulatingPrinter()
+    printer = AccumulatingPrinter.for_attempt(config, attempt_id)
 
     printer.print("\n### SYSTEM: interrogating function with args", arg_spec)
 
     messages = make_initial_messages(test_limit)
-    messages, tool_call_count = investigate(config, postfn, completionfn, messages,
-                                            printer, attempt_id, arg_spec, output_type, test_limit)
+    with usage.span("investigate"):
+        messages, tool_call_count = investigate(config, postfn, investigatefn, messages,
+                                                printer, attempt_id, arg_spec, output_type, test_limit)
+
+    with usage.span("compaction"):
+        messages, meta = compact_for_verification(config, messages, printer)
 
     printer.print("\n### SYSTEM: verifying function with args", arg_spec)
-    verification_result = verify(config, postfn, completionfn, messages, printer, attempt_id, value_list_to_map, make_2p_verification_message)
+    with usage.span("verify"):
+        verification_result = verify(config, postfn, completionfn.for_attempt(usage, "verification"), messages, printer, attempt_id, value_list_to_map, make_2p_verification_message)
 
-    time_taken = (datetime.now() - start_time).total_seconds()
-    q.add_attempt(cursor, run_id, verification_result, time_taken, tool_call_count, printer, completionfn, start_api_calls, attempt_id)
+    time_taken = usage.elapsed()
+    q.add_attempt(storage, run_id, verification_result, time_taken, tool_call_count, printer, usage, attempt_id, meta)
 
     return verification_result
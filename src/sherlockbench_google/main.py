@@ -5,7 +5,7 @@ from pprint import pprint
 from google import genai
 from google.genai import types, errors
 
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
+from sherlockbench_client import destructure, post, api_keys, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
 from sherlockbench_client import run_with_error_handling, set_current_attempt
 
 from .investigate_decide_verify import investigate_decide_verify
@@ -38,26 +38,30 @@ def create_completion(client, tools=None, schema=None, temperature=None, **kwarg
         **kwargs
     )
 
-def run_benchmark(executor, config, db_conn, cursor, run_id, attempts, start_time):
+def run_benchmark(executor, config, storage, run_id, attempts, start_time):
     """
     Run the Google benchmark with the given parameters.
     This function is called by run_with_error_handling.
     """
-    client = genai.Client(api_key=config['api-keys']['google'])
-
     postfn = lambda *args: post(config["base-url"], run_id, *args)
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def completionfn_for_key(api_key):
+        client = genai.Client(api_key=api_key)
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            return create_completion(client, model=config['model'], **kwargs)
 
-        return create_completion(client, model=config['model'], **kwargs)
+        return completionfn
 
     completionfn = LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                                  llmfn=completionfn,
-                                  backoff_exceptions=[(errors.ServerError, 300), (errors.ClientError, 900)])
+                                  llmfn=[completionfn_for_key(key) for key in api_keys(config, "google")],
+                                  backoff_exceptions=[(errors.ServerError, 300), (errors.ClientError, 900)],
+                                  hedging=config.get("hedging"))
 
-    executor_p = partial(executor, postfn, completionfn, config, run_id, cursor)
+    executor_p = partial(executor, postfn, completionfn, config, run_id, storage)
 
     for i, attempt in enumerate(attempts, 1):
         print_progress_with_estimate(i, len(attempts), start_time)
@@ -2,9 +2,9 @@ from datetime import datetime
 from functools import partial
 from pprint import pprint
 
-from openai import OpenAI, APITimeoutError, InternalServerError, BadRequestError
+from openai import OpenAI, APITimeoutError, InternalServerError, BadRequestError, RateLimitError
 
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
+from sherlockbench_client import destructure, post, api_keys, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
 from sherlockbench_client import run_with_error_handling, set_current_attempt
 
 from .investigate_decide_verify import investigate_decide_verify
@@ -18,35 +18,40 @@ def create_completion(client, **kwargs):
         **kwargs
     )
 
-def run_benchmark(executor, config, db_conn, cursor, run_id, attempts, start_time):
+def run_benchmark(executor, config, storage, run_id, attempts, start_time):
     """
     Run the OpenAI benchmark with the given parameters.
     This function is called by run_with_error_handling.
     """
-    client = OpenAI(api_key=config['api-keys']['openai'],
-                    timeout=900.0)
-
     postfn = lambda *args: post(config["base-url"], run_id, *args)
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def completionfn_for_key(api_key):
+        client = OpenAI(api_key=api_key,
+                        timeout=900.0)
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            if "reasoning_effort" in config:
+                kwargs["reasoning_effort"] = config['reasoning_effort']
 
-        if "reasoning_effort" in config:
-            kwargs["reasoning_effort"] = config['reasoning_effort']
+            if "service_tier" in config:
+                kwargs["service_tier"] = config['service_tier']
 
-        if "service_tier" in config:
-            kwargs["service_tier"] = config['service_tier']
+            return create_completion(client, model=config['model'], **kwargs)
 
-        return create_completion(client, model=config['model'], **kwargs)
+        return completionfn
 
     completionfn = LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                                  llmfn=completionfn,
-                                  backoff_exceptions=[(APITimeoutError, 300),
+                                  llmfn=[completionfn_for_key(key) for key in api_keys(config, "openai")],
+                                  backoff_exceptions=[(RateLimitError, 60),
+                                                      (APITimeoutError, 300),
                                                       (InternalServerError, 60),
-                                                      (BadRequestError, 60)])
+                                                      (BadRequestError, 60)],
+                                  hedging=config.get("hedging"))
 
-    executor_p = partial(executor, postfn, completionfn, config, run_id, cursor)
+    executor_p = partial(executor, postfn, completionfn, config, run_id, storage)
 
     for i, attempt in enumerate(attempts, 1):
         print_progress_with_estimate(i, len(attempts), start_time)
@@ -1,7 +1,7 @@
 import json
 from openai import LengthFinishReasonError
 from pydantic import BaseModel
-from sherlockbench_client import destructure, make_schema
+from sherlockbench_client import destructure, make_schema, parse_prediction
 
 def verify(config, postfn, completionfn, messages, printer, attempt_id, v_formatter, make_verification_message):
     # for each verification
@@ -28,7 +28,7 @@ def verify(config, postfn, completionfn, messages, printer, attempt_id, v_format
 
         response = completion.choices[0]
 
-        thoughts, expected_output = destructure(json.loads(response.message.content), "thoughts", "expected_output")
+        thoughts, expected_output = parse_prediction(response.message.content)
 
         printer.print("\n--- LLM ---")
         printer.indented_print(thoughts, "\n")
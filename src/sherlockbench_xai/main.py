@@ -1,9 +1,9 @@
 from datetime import datetime
 from functools import partial
 
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 
-from sherlockbench_client import destructure, post, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
+from sherlockbench_client import destructure, post, api_keys, AccumulatingPrinter, LLMRateLimiter, q, print_progress_with_estimate
 from sherlockbench_client import run_with_error_handling, set_current_attempt
 
 from .investigate_decide_verify import investigate_decide_verify
@@ -16,30 +16,34 @@ def create_completion(client, **kwargs):
         **kwargs
     )
 
-def run_benchmark(executor, config, db_conn, cursor, run_id, attempts, start_time):
+def run_benchmark(executor, config, storage, run_id, attempts, start_time):
     """
     Run the XAI benchmark with the given parameters.
     This function is called by run_with_error_handling.
     """
-    client = OpenAI(base_url="https://api.x.ai/v1",
-                    api_key=config['api-keys']['xai'])
-
     postfn = lambda *args: post(config["base-url"], run_id, *args)
 
-    def completionfn(**kwargs):
-        if "temperature" in config:
-            kwargs["temperature"] = config['temperature']
+    def completionfn_for_key(api_key):
+        client = OpenAI(base_url="https://api.x.ai/v1",
+                        api_key=api_key)
+
+        def completionfn(**kwargs):
+            if "temperature" in config:
+                kwargs["temperature"] = config['temperature']
+
+            if "reasoning_effort" in config:
+                kwargs["reasoning_effort"] = config['reasoning_effort']
 
-        if "reasoning_effort" in config:
-            kwargs["reasoning_effort"] = config['reasoning_effort']
+            return create_completion(client, model=config['model'], **kwargs)
 
-        return create_completion(client, model=config['model'], **kwargs)
+        return completionfn
 
     completionfn = LLMRateLimiter(rate_limit_seconds=config['rate-limit'],
-                                  llmfn=completionfn,
-                                  backoff_exceptions=[])
+                                  llmfn=[completionfn_for_key(key) for key in api_keys(config, "xai")],
+                                  backoff_exceptions=[(RateLimitError, 60)],
+                                  hedging=config.get("hedging"))
 
-    executor_p = partial(executor, postfn, completionfn, config, run_id, cursor)
+    executor_p = partial(executor, postfn, completionfn, config, run_id, storage)
 
     for i, attempt in enumerate(attempts, 1):
         print_progress_with_estimate(i, len(attempts), start_time)
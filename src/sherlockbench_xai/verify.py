@@ -1,7 +1,7 @@
 import json
 from openai import LengthFinishReasonError
 from pydantic import BaseModel
-from sherlockbench_client import destructure, make_schema
+from sherlockbench_client import destructure, make_json_schema, parse_prediction, StructuredOutputError
 
 def verify(config, postfn, completionfn, messages, printer, attempt_id, v_formatter, make_verification_message):
     # for each verification
@@ -19,7 +19,7 @@ def verify(config, postfn, completionfn, messages, printer, attempt_id, v_format
         try:
             completion = completionfn(messages=vmessages,
                                       response_format={"type": "json_object",
-                                                       "schema": make_schema(output_type).model_json_schema()})
+                                                       "schema": make_json_schema(output_type)})
         except LengthFinishReasonError as e:
             print("Caught a LengthFinishReasonError!")
             print("Completion:", e.completion)
@@ -30,9 +30,9 @@ def verify(config, postfn, completionfn, messages, printer, attempt_id, v_format
         try:
             response = completion.choices[0]
 
-            thoughts, expected_output = destructure(json.loads(response.message.content), "thoughts", "expected_output")
+            thoughts, expected_output = parse_prediction(response.message.content)
 
-        except json.decoder.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print("Failed to decode JSON")
             print("Error:", e)
 
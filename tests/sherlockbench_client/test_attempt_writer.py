@@ -0,0 +1,137 @@
+import json
+import pytest
+from sherlockbench_client.attempt_writer import AttemptWriter, read_spool, replay_spools, spool_path, spool_lock
+
+class ListStorage:
+    errors = ()
+
+    def __init__(self):
+        self.inserted = []
+
+    def insert_attempts(self, rows):
+        self.inserted.extend(rows)
+
+class BrokenStorage(ListStorage):
+    def insert_attempts(self, rows):
+        raise ValueError("not a db error")
+
+class FlakyStorage(ListStorage):
+    errors = (OSError,)
+
+    def insert_attempts(self, rows):
+        raise OSError("db went away")
+
+def test_read_spool_ignores_torn_line(tmp_path):
+    path = spool_path(tmp_path, "run")
+    path.write_text(json.dumps({"id": "a"}) + "\n" + json.dumps({"id": "b"}) + "\n" + '{"id": "c", "res')
+
+    assert read_spool(path) == [{"id": "a"}, {"id": "b"}]
+
+def test_replay_spools(tmp_path):
+    storage = ListStorage()
+    spool_path(tmp_path, "run").write_text(json.dumps({"id": "a", "result": True}) + "\n")
+
+    replay_spools(storage, {"attempt-writer": {"spool-dir": str(tmp_path)}})
+
+    assert storage.inserted == [{"id": "a", "result": True}]
+    assert not spool_path(tmp_path, "run").exists()
+
+def test_replay_skips_spool_of_live_writer(tmp_path):
+    writer = AttemptWriter(BrokenStorage(), spool_path(tmp_path, "live"), flush_interval=0.01)
+    writer.submit({"id": "a"})
+    writer.flush()
+
+    storage = ListStorage()
+    replay_spools(storage, {"attempt-writer": {"spool-dir": str(tmp_path)}})
+
+    assert storage.inserted == []
+    assert spool_path(tmp_path, "live").exists()
+    writer.close()
+
+def test_replay_keeps_spool_when_insert_fails(tmp_path):
+    spool_path(tmp_path, "run").write_text(json.dumps({"id": "a"}) + "\n")
+
+    replay_spools(FlakyStorage(), {"attempt-writer": {"spool-dir": str(tmp_path)}})
+
+    assert spool_path(tmp_path, "run").exists()
+
+def test_writer_batches_and_removes_spool(tmp_path):
+    storage = ListStorage()
+    writer = AttemptWriter(storage, spool_path(tmp_path, "run"), batch_size=2, flush_interval=0.01)
+
+    for id in "abc":
+        writer.submit({"id": id})
+    writer.close()
+
+    assert [row["id"] for row in storage.inserted] == ["a", "b", "c"]
+    assert not spool_path(tmp_path, "run").exists()
+
+def test_writer_keeps_spool_when_insert_raises(tmp_path):
+    writer = AttemptWriter(BrokenStorage(), spool_path(tmp_path, "run"), batch_size=2, flush_interval=0.01)
+
+    for id in "abc":
+        writer.submit({"id": id})
+    writer.flush()
+    writer.close()
+
+    assert writer.failed
+    assert [row["id"] for row in read_spool(spool_path(tmp_path, "run"))] == ["a", "b", "c"]
+
+def test_close_reports_failure(tmp_path):
+    writer = AttemptWriter(BrokenStorage(), spool_path(tmp_path, "run"), flush_interval=0.01)
+    writer.submit({"id": "a"})
+
+    assert writer.close() is False
+    assert writer.close() is False
+
+    writer = AttemptWriter(ListStorage(), spool_path(tmp_path, "ok"), flush_interval=0.01)
+    writer.submit({"id": "a"})
+
+    assert writer.close() is True
+
+def test_writer_reads_log_files_at_insert(tmp_path):
+    (tmp_path / "a.log").write_text("log a\n")
+    (tmp_path / "b.log").write_text("log b\n")
+
+    storage = ListStorage()
+    writer = AttemptWriter(storage, spool_path(tmp_path, "run"), flush_interval=0.01)
+    writer.submit({"id": "a", "log_file": str(tmp_path / "a.log"), "remove_log_file": True})
+    writer.submit({"id": "b", "log_file": str(tmp_path / "b.log"), "remove_log_file": False})
+
+    # only the paths are spooled
+    assert "log a" not in spool_path(tmp_path, "run").read_text()
+    writer.close()
+
+    assert [row["complete_log"] for row in storage.inserted] == ["log a\n", "log b\n"]
+    assert not (tmp_path / "a.log").exists()
+    assert (tmp_path / "b.log").exists()
+
+def test_resumed_run_keeps_spool_whose_replay_failed(tmp_path):
+    config = {"attempt-writer": {"spool-dir": str(tmp_path), "flush-interval": 0.01}}
+    spool_path(tmp_path, "run").write_text(json.dumps({"id": "a"}) + "\n")
+
+    replay_spools(FlakyStorage(), config)
+
+    storage = ListStorage()
+    writer = AttemptWriter.for_run(config, "run", storage)
+    writer.submit({"id": "b"})
+    assert writer.close()
+
+    assert [row["id"] for row in storage.inserted] == ["b"]
+    assert [row["id"] for row in read_spool(spool_path(tmp_path, "run"))] == ["a"]
+    assert not writer.spool_file.exists()
+
+    replay_spools(storage, config)
+    assert [row["id"] for row in storage.inserted] == ["b", "a"]
+    assert not spool_path(tmp_path, "run").exists()
+
+def test_writer_refuses_existing_spool(tmp_path):
+    spool_path(tmp_path, "run").write_text(json.dumps({"id": "a"}) + "\n")
+
+    with pytest.raises(FileExistsError):
+        AttemptWriter(ListStorage(), spool_path(tmp_path, "run"))
+
+    # the lock was let go, so the spool can still be replayed
+    lock = spool_lock(spool_path(tmp_path, "run"))
+    lock.acquire(timeout=0)
+    lock.release()
@@ -0,0 +1,31 @@
+import pytest
+from sherlockbench_client.compaction import compact_transcript, estimate_tokens
+
+def make_transcript():
+    return [
+        {"role": "developer", "content": "system prompt"},
+        {"role": "user", "content": "initial prompt"},
+        {"role": "assistant", "content": "<think>hmm</think>Let me test.",
+         "tool_calls": [{"id": "c1", "function": {"name": "mystery_function", "arguments": '{"b": 2, "a": 1}'}}]},
+        {"role": "tool", "content": "3", "tool_call_id": "c1"},
+        {"role": "assistant", "content": "Another one.",
+         "tool_calls": [{"id": "c2", "function": {"name": "mystery_function", "arguments": '{"a": 5, "b": 5}'}}]},
+        {"role": "tool", "content": "10", "tool_call_id": "c2"},
+        {"role": "assistant", "content": "<think>sure</think>It adds the numbers."},
+    ]
+
+def test_drop_thinking():
+    compacted = compact_transcript({"drop-thinking": True}, make_transcript())
+    assert compacted[2]["content"] == "Let me test."
+    assert compacted[-1]["content"] == "It adds the numbers."
+
+def test_tool_table():
+    compacted = compact_transcript({"tool-table": True}, make_transcript())
+    assert [m["role"] for m in compacted] == ["developer", "user", "user", "assistant"]
+    assert compacted[2]["content"].endswith("(1, 2) → 3\n(5, 5) → 10")
+
+def test_max_tokens():
+    transcript = make_transcript()
+    compacted = compact_transcript({"max-tokens": 1}, transcript)
+    assert compacted == [transcript[0], transcript[1], transcript[-1]]
+    assert estimate_tokens(compacted) < estimate_tokens(transcript)
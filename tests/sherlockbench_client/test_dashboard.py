@@ -0,0 +1,40 @@
+import io
+
+from sherlockbench_client.dashboard import Dashboard
+from sherlockbench_client.eta import EtaEstimator
+from sherlockbench_client.events import make_event, emit
+
+def test_dashboard_render():
+    dashboard = Dashboard(4)
+
+    for event in [make_event("attempt_start", "a"),
+                  make_event("llm_request", "a", phase="investigation"),
+                  make_event("attempt_start", "b"),
+                  make_event("llm_request", "b", phase="verification"),
+                  make_event("backoff", "b", lane="key-2", seconds=300),
+                  make_event("attempt_done", "b", result=True)]:
+        dashboard.handle(event)
+
+    status, in_flight, calls, throttled, eta = dashboard.render()
+
+    assert status == "### SYSTEM: 1/4 attempts complete, 1 passed (100%)"
+    assert in_flight == "in flight: investigation 1"
+    assert calls == "LLM calls/sec: 2.00"
+    assert throttled.startswith("throttled: key-2 (")
+    assert "remaining" in eta and "--:--:--" not in eta
+
+def test_dashboard_follows_events():
+    out = io.StringIO()
+    dashboard = Dashboard(1, out=out)
+    dashboard.start()
+
+    emit("attempt_start", "a")
+    emit("attempt_done", "a", result=False)
+    dashboard.stop()
+
+    assert out.getvalue().splitlines()[-5] == "### SYSTEM: 1/1 attempts complete, 0 passed (0%)"
+
+def test_dashboard_shows_estimate_band():
+    dashboard = Dashboard(4, estimator=EtaEstimator(4, (50, 60.0, 10.0)))
+
+    assert dashboard.render()[-1].endswith("est. 00:04:00 (90% 00:03:15-00:04:44) remaining")
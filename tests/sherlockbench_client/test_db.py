@@ -0,0 +1,132 @@
+import psycopg2
+import pytest
+from types import SimpleNamespace
+from sherlockbench_client import db
+
+class FakeConnection:
+    def __init__(self, fail_ping=False):
+        self.closed = 0
+        self.fail_ping = fail_ping
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if conn.fail_ping:
+                    raise psycopg2.OperationalError("server closed the connection")
+
+        return Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class FakePool:
+    def __init__(self, minconn, maxconn, url, **kwargs):
+        self.idle = []
+        self.discarded = []
+
+    def getconn(self):
+        return self.idle.pop() if self.idle else FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(db, "ThreadedConnectionPool", FakePool)
+    return db.ConnectionPool("postgresql://test", health_check_interval=0)
+
+def test_dropped_connection_is_replaced(pool):
+    dropped = FakeConnection(fail_ping=True)
+    pool.pool.idle.append(dropped)
+    pool.last_used[id(dropped)] = 0
+
+    with pool.connection() as conn:
+        assert conn is not dropped
+
+    assert pool.pool.discarded == [dropped]
+    assert conn.commits == 1
+
+def test_error_rolls_back_and_returns_connection(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError("bad query")
+
+    assert conn.rollbacks == 1
+    assert pool.pool.idle == [conn]
+
+def test_run_retries_on_lost_connection(pool):
+    calls = []
+
+    def query(cursor):
+        calls.append(cursor)
+        if len(calls) == 1:
+            raise psycopg2.OperationalError("connection lost")
+        return "ok"
+
+    assert pool.run(query) == "ok"
+    assert len(calls) == 2
+    assert len(pool.pool.discarded) == 1
+
+class RecordingCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+def test_released_pool_stays_open_for_other_holders(monkeypatch):
+    monkeypatch.setattr(db, "ThreadedConnectionPool", FakePool)
+    config = {"postgres-url": "postgresql://shared"}
+
+    first = db.get_pool(config)
+    second = db.get_pool(config)
+    assert first is second
+
+    db.release_pool(first)
+    assert not hasattr(first.pool, "closed")
+
+    db.release_pool(second)
+    assert first.pool.closed
+    assert db.get_pool(config) is not first
+    db.close_pools()
+
+def test_prepared_statement_is_prepared_once_per_connection():
+    statement = db.PreparedStatement("save_failure", "UPDATE runs SET failure_info = %s WHERE id = %s", "jsonb", "uuid")
+    cursor = RecordingCursor(SimpleNamespace(prepared=set()))
+
+    statement.execute(cursor, ["{}", "run-1"])
+    statement.execute(cursor, ["{}", "run-2"])
+
+    assert cursor.executed == [
+        ("PREPARE save_failure (jsonb, uuid) AS UPDATE runs SET failure_info = $1 WHERE id = $2", None),
+        ("EXECUTE save_failure (%s::jsonb, %s::uuid)", ["{}", "run-1"]),
+        ("EXECUTE save_failure (%s::jsonb, %s::uuid)", ["{}", "run-2"]),
+    ]
+
+def test_prepared_statement_on_plain_connection():
+    statement = db.PreparedStatement("save_failure", "UPDATE runs SET failure_info = %s WHERE id = %s", "jsonb", "uuid")
+    cursor = RecordingCursor(SimpleNamespace())
+
+    statement.execute(cursor, ["{}", "run-1"])
+
+    assert cursor.executed == [("UPDATE runs SET failure_info = %s::jsonb WHERE id = %s::uuid", ["{}", "run-1"])]
@@ -0,0 +1,45 @@
+import pytest
+
+from sherlockbench_client.eta import EtaEstimator
+from sherlockbench_client.events import make_event
+
+def test_no_estimate_without_data():
+    assert EtaEstimator(10).estimate() is None
+
+def test_history_gives_an_estimate_up_front():
+    expected, low, high = EtaEstimator(10, (100, 60.0, 20.0)).estimate()
+
+    assert expected == pytest.approx(600)
+    assert low < expected < high
+
+def test_live_durations_take_over():
+    estimator = EtaEstimator(20, (100, 60.0, 20.0))
+    for _ in range(10):
+        estimator.handle(make_event("attempt_done", "a", result=True, time_taken=30.0))
+
+    expected, low, high = estimator.estimate()
+
+    # 5 attempts' worth of history at 60s against 10 at 30s
+    assert expected == pytest.approx(10 * 40)
+    assert high - low < 2 * EtaEstimator.Z * 20 * 10
+
+def test_workers_share_the_remaining_attempts():
+    estimator = EtaEstimator(10)
+    estimator.record(10.0)
+    estimator.record(20.0)
+
+    assert estimator.estimate(workers=4)[0] == pytest.approx(estimator.estimate()[0] / 4)
+
+def test_workers_default_to_attempts_in_flight():
+    estimator = EtaEstimator(10)
+    estimator.record(10.0)
+    estimator.record(20.0)
+
+    for event in [make_event("attempt_start", "a"), make_event("attempt_start", "b"),
+                  make_event("attempt_start", "c"), make_event("attempt_done", "c", result=True)]:
+        estimator.handle(event)
+
+    assert estimator.estimate() == estimator.estimate(workers=2)
+
+    estimator.handle(make_event("run_failed", "a", error_type="ValueError"))
+    assert estimator.estimate() == estimator.estimate(workers=1)
@@ -0,0 +1,56 @@
+from sherlockbench_client import events
+from sherlockbench_client.events import EventStream, read_events, use_event_stream
+from sherlockbench_client.main import AttemptUsage
+
+def test_event_stream(tmp_path):
+    stream = EventStream.for_run({"events": {"dir": str(tmp_path)}}, "run")
+    stream.emit("backoff", "a", lane="key-1", seconds=30)
+    stream.close()
+
+    with open(tmp_path / "run.jsonl", "a") as f:
+        f.write('{"type": "tool_c')
+
+    run_start, backoff = read_events(tmp_path / "run.jsonl")
+    assert run_start["type"] == "run_start" and run_start["attempt_id"] is None
+    assert {k: backoff[k] for k in ("type", "attempt_id", "lane", "seconds")} == {
+        "type": "backoff", "attempt_id": "a", "lane": "key-1", "seconds": 30}
+    assert backoff["t"] >= run_start["t"]
+
+def test_attempt_usage_emits_events(tmp_path):
+    stream = EventStream(tmp_path / "run.jsonl", "run")
+    use_event_stream(stream)
+
+    def postfn(path, data):
+        return {"output": 4} if path == "test-function" else {"status": "done"}
+
+    try:
+        recording_postfn = AttemptUsage("a").record_tool_calls(postfn)
+        recording_postfn("test-function", {"args": [2]})
+        recording_postfn("attempt-verification", {"prediction": 9})
+        recording_postfn("next-verification", {})
+    finally:
+        use_event_stream(None)
+        stream.close()
+
+    emitted = [(e["type"], e["attempt_id"]) for e in read_events(tmp_path / "run.jsonl")]
+    assert emitted == [("run_start", None), ("tool_call", "a"), ("verification", "a")]
+
+def test_emit_without_stream():
+    events.emit("attempt_done", "a", result=True)
+
+def test_failing_listener_is_unsubscribed():
+    received = []
+
+    def broken(event):
+        raise KeyError("oops")
+
+    events.subscribe(broken)
+    events.subscribe(received.append)
+    try:
+        events.emit("attempt_done", "a", result=True)
+        events.emit("attempt_done", "b", result=False)
+    finally:
+        events.unsubscribe(received.append)
+
+    assert broken not in events._listeners
+    assert [e["attempt_id"] for e in received] == ["a", "b"]
@@ -0,0 +1,101 @@
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from sherlockbench_client.hedging import Hedger, LatencyTracker
+from sherlockbench_client.main import LLMRateLimiter
+
+def test_latency_percentile():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile("investigation", 90, min_samples=1) is None
+
+    for seconds in range(1, 11):
+        tracker.record("investigation", seconds)
+
+    assert tracker.percentile("investigation", 90, min_samples=5) == 9
+    assert tracker.percentile("verification", 90, min_samples=5) is None
+
+def test_hedge_takes_first_result():
+    hedger = Hedger({"percentile": 50, "min-samples": 3, "max-extra-fraction": 1.0})
+    abandoned = []
+
+    for _ in range(3):
+        hedger.call("decision", lambda: "fast", lambda: "hedge", abandoned.append)
+
+    def slow():
+        time.sleep(0.2)
+        return "slow"
+
+    assert hedger.call("decision", slow, lambda: "hedge", abandoned.append) == "hedge"
+    assert hedger.hedge_count == 1
+
+    time.sleep(0.3)
+    assert abandoned == ["slow"]
+
+def test_hedge_budget():
+    hedger = Hedger({"percentile": 50, "min-samples": 1, "max-extra-fraction": 0.0})
+    hedger.call("decision", lambda: "fast", lambda: "hedge", print)
+
+    def slow():
+        time.sleep(0.05)
+        return "slow"
+
+    assert hedger.call("decision", slow, lambda: "hedge", print) == "slow"
+    assert hedger.hedge_count == 0
+
+def test_hung_requests_dont_block_later_calls():
+    hedger = Hedger({"percentile": 50, "min-samples": 3, "max-extra-fraction": 1.0})
+    hung = threading.Event()
+
+    for _ in range(3):
+        hedger.call("decision", lambda: "fast", lambda: "hedge", print)
+
+    def hang():
+        hung.wait()
+        return "hung"
+
+    # more hung losers than the old pool had threads
+    for _ in range(20):
+        assert hedger.call("decision", hang, lambda: "hedge", lambda result: None) == "hedge"
+
+    assert hedger.call("decision", lambda: "fast", lambda: "hedge", print) == "fast"
+    hung.set()
+
+def test_hedge_latency_excludes_rate_limit_wait():
+    hedger = Hedger({"percentile": 50, "min-samples": 3, "max-extra-fraction": 1.0, "window": 4})
+
+    for _ in range(3):
+        hedger.call("decision", lambda: "fast", lambda: "hedge", print)
+
+    def slow():
+        time.sleep(0.2)
+        return "slow"
+
+    hedger.call("decision", slow, lambda lane: lane, print, prepare_hedge=lambda: time.sleep(0.3) or "lane")
+    time.sleep(0.4)
+
+    assert len(hedger.tracker.latencies["decision"]) == 4
+    assert max(hedger.tracker.latencies["decision"]) < 0.25
+
+def test_lane_held_until_abandoned_request_finishes():
+    completion = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1))
+    calls = []
+
+    def first_key(**kwargs):
+        calls.append(1)
+        if len(calls) > 3:
+            time.sleep(0.3)
+        return completion
+
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=[first_key, lambda **kwargs: completion],
+                             backoff_exceptions=[],
+                             hedging={"percentile": 50, "min-samples": 3, "max-extra-fraction": 1.0})
+
+    for _ in range(4):
+        limiter(messages=[])
+
+    first, second = limiter.lanes
+    assert (first.outstanding, second.outstanding) == (1, 0)
+
+    time.sleep(0.4)
+    assert first.outstanding == 0
@@ -0,0 +1,22 @@
+from sherlockbench_client.log_compression import LogCodec, train_dictionary, decompress_log, read_log
+import zstandard as zstd
+
+def make_log(i):
+    calls = "".join(f"\n### SYSTEM: calling tool\nmystery_function({i}, {j}) → {i * j}\n" for j in range(20))
+    return f"\n### SYSTEM: interrogating function with args ['integer', 'integer']\n--- LLM ---\n  Let me try #{i}.{calls}"
+
+def test_round_trip_with_dictionary():
+    dictionary = train_dictionary([make_log(i) for i in range(300)], size=8 * 1024)
+    codec = LogCodec(7, dictionary)
+
+    log = make_log(1000)
+    row = codec.compress_row({"id": "a", "complete_log": log})
+
+    assert row["complete_log"] is None
+    assert row["log_dictionary_id"] == 7
+    assert len(row["complete_log_zstd"].adapted) < len(log)
+    assert decompress_log(row["complete_log_zstd"].adapted, zstd.ZstdCompressionDict(dictionary)) == log
+
+def test_read_log_passes_through_uncompressed():
+    assert read_log(None, "plain log", None, None) == "plain log"
+    assert read_log(None, None, LogCodec().compress("squashed"), None) == "squashed"
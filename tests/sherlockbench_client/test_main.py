@@ -1,5 +1,8 @@
+import httpx
+import openai
 import pytest
-from sherlockbench_client.main import destructure, value_list_to_map
+from types import SimpleNamespace
+from sherlockbench_client.main import destructure, value_list_to_map, LLMRateLimiter, AttemptUsage, Lane, load_endpoints, AccumulatingPrinter, FileLogSink, set_headless
 
 def test_destructure():
     data = {'a': 1, 'b': 2, 'c': 3}
@@ -18,3 +21,234 @@ def test_value_list_to_map():
         'b': 3,
         'c': 5
     }
+
+def test_rate_limiter_attempt_usage():
+    completion = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3))
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=lambda **kwargs: completion, backoff_exceptions=[])
+
+    usage_a = AttemptUsage()
+    usage_b = AttemptUsage()
+    limiter.for_attempt(usage_a)(messages=[])
+    limiter.for_attempt(usage_a)(messages=[])
+    limiter.for_attempt(usage_b)(messages=[])
+
+    assert usage_a.as_dict() == {"api_calls": 2, "input_tokens": 20, "output_tokens": 6}
+    assert usage_b.call_count == 1
+    assert limiter.total_call_count == 3
+    assert limiter.total_input_tokens == 30
+
+def test_rate_limiter_key_pool():
+    class Throttled(Exception):
+        pass
+
+    calls = []
+
+    def make_llmfn(key):
+        def llmfn(**kwargs):
+            calls.append(key)
+            if key == "a" and calls.count("a") == 1:
+                raise Throttled()
+            return SimpleNamespace()
+        return llmfn
+
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=[make_llmfn("a"), make_llmfn("b")],
+                             backoff_exceptions=[(Throttled, 60)])
+
+    # the first call is throttled on key a and retried on key b straight away
+    limiter(messages=[])
+    assert calls == ["a", "b"]
+
+    # key a stays out of rotation while it backs off
+    limiter(messages=[])
+    limiter(messages=[])
+    assert calls == ["a", "b", "b", "b"]
+    assert limiter.lanes[0].throttle_count == 1
+
+def test_rate_limit_error_moves_traffic_to_other_key():
+    calls = []
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+    def make_llmfn(key):
+        def llmfn(**kwargs):
+            calls.append(key)
+            if key == "a":
+                raise openai.RateLimitError("rate limited", response=response, body=None)
+            return SimpleNamespace()
+        return llmfn
+
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=[make_llmfn("a"), make_llmfn("b")],
+                             backoff_exceptions=[(openai.RateLimitError, 60)])
+
+    limiter(messages=[])
+    limiter(messages=[])
+    assert calls == ["a", "b", "b"]
+    assert limiter.lanes[0].throttle_count == 1
+
+def test_backoff_predicate():
+    class StatusError(Exception):
+        def __init__(self, code):
+            self.code = code
+
+    def llmfn(**kwargs):
+        raise StatusError(400)
+
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=llmfn,
+                             backoff_exceptions=[(lambda e: isinstance(e, StatusError) and e.code == 429, 60)])
+
+    # only the status code the predicate picks out is backed off
+    with pytest.raises(StatusError):
+        limiter(messages=[])
+    assert limiter.lanes[0].throttle_count == 0
+
+def test_rate_limiter_weighted_endpoints():
+    big = Lane("big", None, 0, weight=2)
+    small = Lane("small", None, 0, weight=1)
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=[big, small], backoff_exceptions=[])
+
+    # least outstanding requests relative to weight
+    assert [limiter.wait_for_lane().name for _ in range(3)] == ["big", "big", "small"]
+
+    # unhealthy endpoints are skipped
+    big.healthy = False
+    assert limiter.wait_for_lane() is small
+
+def test_load_endpoints():
+    config = {"model": "m", "rate-limit": 5,
+              "api-keys": {"fireworks": ["k1", "k2"], "local": "none"},
+              "endpoints": [{"base-url": "https://a/v1", "weight": 3},
+                            {"base-url": "http://localhost:8000/v1", "credentials": "local", "model": "local-m"}]}
+
+    endpoints = load_endpoints(config, "fireworks", "https://default/v1")
+    assert [(e["name"], e["api-key"], e["weight"], e["model"]) for e in endpoints] == [
+        ("https://a/v1 (key 1/2)", "k1", 3, "m"),
+        ("https://a/v1 (key 2/2)", "k2", 3, "m"),
+        ("http://localhost:8000/v1", "none", 1, "local-m"),
+    ]
+
+    del config["endpoints"]
+    assert [e["base-url"] for e in load_endpoints(config, "fireworks", "https://default/v1")] == ["https://default/v1"] * 2
+
+def test_attempt_usage_records_tool_calls():
+    usage = AttemptUsage()
+    responses = {"test-function": {"output": 3, "error": False}, "next-attempt": {"status": "ok"}}
+    postfn = usage.record_tool_calls(lambda path, data: responses[path])
+
+    assert postfn("test-function", {"attempt-id": "a", "args": [1, 2]}) == {"output": 3, "error": False}
+    postfn("next-attempt", {})
+
+    assert len(usage.tool_calls) == 1
+    assert usage.tool_calls[0]["args"] == [1, 2]
+    assert usage.tool_calls[0]["output"] == 3
+    assert usage.tool_calls[0]["error"] is False
+
+def span_names(span):
+    return [span["name"], [span_names(child) for child in span.get("spans", [])]]
+
+def test_attempt_usage_spans():
+    completion = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3))
+    limiter = LLMRateLimiter(rate_limit_seconds=0, llmfn=lambda **kwargs: completion, backoff_exceptions=[])
+
+    usage = AttemptUsage()
+    responses = {"test-function": {"output": 3, "error": False},
+                 "next-verification": {"next-verification": [1]},
+                 "attempt-verification": {"status": "done"}}
+    postfn = usage.record_tool_calls(lambda path, data: responses[path])
+
+    with usage.span("investigate"):
+        limiter.for_attempt(usage, "investigation")(messages=[])
+        postfn("test-function", {"args": [1]})
+
+    with usage.span("verify"):
+        postfn("next-verification", {})
+        limiter.for_attempt(usage, "verification")(messages=[])
+        postfn("attempt-verification", {"prediction": 2})
+
+    with pytest.raises(ValueError):
+        with usage.span("decision"):
+            raise ValueError
+
+    tree = usage.span_tree()
+    llm = ["llm", [["wait", []], ["request", []]]]
+    assert span_names(tree) == ["attempt", [
+        ["investigate", [llm, ["tool_call", []]]],
+        ["verify", [["server", []], ["verification", [llm, ["server", []]]]]],
+        ["decision", []]]]
+
+    investigate = tree["spans"][0]
+    assert investigate["spans"][0]["phase"] == "investigation"
+    assert 0 <= investigate["start"] <= investigate["spans"][0]["start"]
+    assert tree["spans"][2]["error"] == "ValueError"
+    assert all("duration" in span for span in tree["spans"])
+
+def test_end_span_ignores_name_not_open():
+    usage = AttemptUsage()
+
+    usage.begin_span("verify")
+    usage.begin_span("verification")
+    usage.end_span("decision")
+
+    assert [span["name"] for span in usage.open_spans] == ["verify", "verification"]
+
+    usage.end_span("verify")
+    assert usage.open_spans == []
+
+def test_span_tree_is_a_snapshot():
+    usage = AttemptUsage()
+
+    with usage.span("investigate"):
+        tree = usage.span_tree()
+
+    assert "duration" not in tree["spans"][0]
+    assert "duration" in usage.span_tree()["spans"][0]
+
+def test_accumulating_printer(capsys):
+    printer = AccumulatingPrinter()
+    printer.print("a", 1)
+    printer.indented_print("b\nc")
+
+    assert printer.retrieve() == "a 1\n  b\n  c\n"
+
+    printer.print("d")
+    assert printer.retrieve() == "a 1\n  b\n  c\nd\n"
+    assert capsys.readouterr().out == "a 1\n  b\n  c\nd\n"
+
+def test_file_log_sink(tmp_path, capsys):
+    printer = AccumulatingPrinter.for_attempt({"attempt-logs": {"dir": str(tmp_path)}}, "attempt")
+    printer.print("a")
+    printer.indented_print("b")
+
+    # written through as it goes, so a crash leaves the partial log
+    assert (tmp_path / "attempt.log").read_text() == "a\n  b\n"
+    assert printer.retrieve() == "a\n  b\n"
+
+    printer.close()
+    assert not (tmp_path / "attempt.log").exists()
+
+def test_file_log_sink_keeps_interrupted_log(tmp_path):
+    (tmp_path / "attempt.log").write_text("partial\n")
+
+    sink = FileLogSink(tmp_path / "attempt.log", keep=True)
+    sink.write("retry\n")
+    sink.close()
+
+    assert (tmp_path / "attempt.interrupted.log").read_text() == "partial\n"
+    assert (tmp_path / "attempt.log").read_text() == "retry\n"
+
+def test_headless_printer(capsys):
+    printer = AccumulatingPrinter()
+    printer.print("a")
+    printer.indented_print("a long line which is wrapped " * 10)
+    log = printer.retrieve()
+    capsys.readouterr()
+
+    set_headless(True)
+    try:
+        printer = AccumulatingPrinter()
+    finally:
+        set_headless(False)
+
+    printer.print("a")
+    printer.indented_print("a long line which is wrapped " * 10)
+
+    assert capsys.readouterr().out == ""
+    assert printer.retrieve() == log
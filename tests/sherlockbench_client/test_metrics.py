@@ -0,0 +1,100 @@
+import queue
+import urllib.request
+from types import SimpleNamespace
+
+from sherlockbench_client import events
+from sherlockbench_client.attempt_writer import AttemptWriter, spool_path
+from sherlockbench_client.events import make_event, emit
+from sherlockbench_client.metrics import MetricsExporter, Histogram
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("path",), buckets=(1, 5))
+    histogram.observe(("a",), 0.5)
+    histogram.observe(("a",), 3)
+
+    assert list(histogram.samples()) == [
+        'latency_seconds_bucket{path="a",le="1.0"} 1.0',
+        'latency_seconds_bucket{path="a",le="5.0"} 2.0',
+        'latency_seconds_bucket{path="a",le="+Inf"} 2.0',
+        'latency_seconds_sum{path="a"} 3.5',
+        'latency_seconds_count{path="a"} 2.0',
+    ]
+
+def test_exporter_follows_events():
+    writer = SimpleNamespace(queue=queue.Queue())
+    writer.queue.put("row")
+    exporter = MetricsExporter("anthropic", "claude", writer=writer)
+
+    for event in [make_event("attempt_start", "a"),
+                  make_event("llm_request", "a", phase="investigation", wait=1.5),
+                  make_event("llm_response", "a", phase="investigation", latency=2.0),
+                  make_event("llm_response", "a", phase="decision", latency=1.0, provider="openai", model="o4-mini"),
+                  make_event("backoff", "a", lane="key 1/1", seconds=300),
+                  make_event("tool_call", "a", error=False, latency=0.1),
+                  make_event("server_request", "a", path="test-function", latency=0.1),
+                  make_event("attempt_start", "b"),
+                  make_event("attempt_done", "b", result=True)]:
+        exporter.handle(event)
+
+    text = exporter.render()
+
+    assert 'sherlockbench_llm_calls_total{provider="anthropic",model="claude",phase="investigation"} 1.0' in text
+    assert 'sherlockbench_llm_calls_total{provider="openai",model="o4-mini",phase="decision"} 1.0' in text
+    assert 'sherlockbench_rate_limit_sleep_seconds_total{provider="anthropic",model="claude"} 1.5' in text
+    assert 'sherlockbench_backoff_seconds_total{lane="key 1/1"} 300.0' in text
+    assert 'sherlockbench_server_request_latency_seconds_count{path="test-function"} 1.0' in text
+    assert 'sherlockbench_tool_calls_total{error="false"} 1.0' in text
+    assert 'sherlockbench_attempts_total{result="pass"} 1.0' in text
+    assert "sherlockbench_attempts_in_flight 1.0" in text
+    assert "sherlockbench_attempt_writer_queue_depth 1.0" in text
+    assert "# TYPE sherlockbench_llm_latency_seconds histogram" in text
+
+def test_failed_run_clears_attempts_in_flight():
+    exporter = MetricsExporter("anthropic", "claude")
+
+    for event in [make_event("attempt_start", "a"),
+                  make_event("attempt_start", "b"),
+                  make_event("run_failed", "a", error_type="ValueError")]:
+        exporter.handle(event)
+
+    assert "sherlockbench_attempts_in_flight 0.0" in exporter.render()
+
+    # an attempt which was still running finishes after the failure
+    exporter.handle(make_event("attempt_done", "b", result=True))
+    assert "sherlockbench_attempts_in_flight 0.0" in exporter.render()
+
+class ListStorage:
+    errors = ()
+
+    def insert_attempts(self, rows):
+        pass
+
+def test_exporter_counts_background_writes(tmp_path):
+    exporter = MetricsExporter("anthropic", "claude")
+    events.subscribe(exporter.handle)
+
+    try:
+        writer = AttemptWriter(ListStorage(), spool_path(tmp_path, "run"), batch_size=2, flush_interval=0.01)
+        for id in "ab":
+            writer.submit({"id": id})
+        writer.close()
+    finally:
+        events.unsubscribe(exporter.handle)
+
+    text = exporter.render()
+    assert 'sherlockbench_db_write_latency_seconds_count{background="true"} 1.0' in text
+    assert 'background="false"' not in text
+
+def test_exporter_serves_metrics():
+    assert MetricsExporter.for_run({"model": "m"}, "openai") is None
+
+    exporter = MetricsExporter.for_run({"model": "m", "metrics": {"port": 0}}, "openai")
+    exporter.start()
+    try:
+        emit("attempt_start", "a")
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "sherlockbench_attempts_in_flight 1.0" in response.read().decode()
+    finally:
+        exporter.stop()
@@ -0,0 +1,32 @@
+import pstats
+
+from sherlockbench_client.profiling import profiled, read_collapsed, write_collapsed
+
+def busy_executor(postfn, completionfn, config, run_id, storage, attempt):
+    total = 0
+    for i in range(2_000_000):
+        total += i * i
+
+    return total
+
+def test_sampled_attempt(tmp_path):
+    config = {"profiles": {"dir": str(tmp_path)}}
+    executor = profiled(busy_executor, config, "run", "sample")
+
+    assert executor(None, None, config, "run", None, {"attempt-id": "a"}) == busy_executor(None, None, None, None, None, None)
+
+    stacks = read_collapsed(tmp_path / "run" / "a.collapsed")
+    assert any(stack.endswith("test_profiling.py:busy_executor") for stack in stacks)
+
+def test_cprofile_attempt(tmp_path):
+    config = {"profiles": {"dir": str(tmp_path)}}
+    profiled(busy_executor, config, "run", "cprofile")(None, None, config, "run", None, {"attempt-id": "a"})
+
+    functions = [name for _, _, name in pstats.Stats(str(tmp_path / "run" / "a.pstats")).stats]
+    assert "busy_executor" in functions
+
+def test_collapsed_round_trip(tmp_path):
+    stacks = {"a.py:main;b.py:f": 3, "a.py:main": 1}
+    write_collapsed(tmp_path / "p.collapsed", stacks)
+
+    assert read_collapsed(tmp_path / "p.collapsed") == stacks
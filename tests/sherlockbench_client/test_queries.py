@@ -0,0 +1,101 @@
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from sherlockbench_client.queries import copy_tool_calls, calculate_pass_at_k, attempt_partition_ddl, insert_attempts, ATTEMPT_COLUMNS
+from sherlockbench_client.queries import create_attempt_partition, DetachedPartitionError
+
+class CopyCursor:
+    def __init__(self):
+        self.copied = None
+
+    def copy_expert(self, sql, buffer):
+        self.copied = buffer.read()
+
+def test_copy_tool_calls_escapes_text_format():
+    cursor = CopyCursor()
+    rows = [{"id": "a", "tool_call_rows": [{"args": ["x\ty"], "output": "line\nbreak", "error": False, "latency": 0.5},
+                                           {"args": [1], "output": None, "error": True, "latency": None}]},
+            {"id": "b"}]
+
+    copy_tool_calls(cursor, rows)
+
+    assert cursor.copied.split("\n") == ['a\t1\t["x\\\\ty"]\t"line\\\\nbreak"\tFalse\t0.5',
+                                         'a\t2\t[1]\tnull\tTrue\t\\N',
+                                         '']
+
+def test_copy_tool_calls_skips_empty():
+    cursor = CopyCursor()
+    copy_tool_calls(cursor, [{"id": "a", "tool_call_rows": []}])
+    assert cursor.copied is None
+
+class ResultCursor:
+    """Returns the given result sets, one per execute."""
+    def __init__(self, *results):
+        self.connection = SimpleNamespace()
+        self.results = list(results)
+
+    def execute(self, sql, params=None):
+        self.current = self.results.pop(0)
+
+    def fetchall(self):
+        return self.current
+
+def test_pass_at_k_from_rollup():
+    cursor = ResultCursor([("add", 2, 1), ("sort", 0, 3), ("xor", 1, 2)])
+    assert calculate_pass_at_k(cursor, "run") == (2 / 3, 3, 2, 3)
+
+def test_pass_at_k_without_rollup():
+    cursor = ResultCursor([], [("add", 1, 1), ("sort", 0, 2)])
+    assert calculate_pass_at_k(cursor, "run") == (0.5, 2, 1, 2)
+
+def test_attempt_partition_spans_the_month():
+    assert attempt_partition_ddl(datetime(2025, 12, 31, 23, 59)) == (
+        "CREATE TABLE IF NOT EXISTS attempts_2025_12 PARTITION OF attempts "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')")
+
+class PartitionCursor:
+    """Answers the partition check with (exists, attached) and records the statements."""
+    def __init__(self, exists, attached):
+        self.state = (exists, attached)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return self.state
+
+def test_create_attempt_partition():
+    cursor = PartitionCursor(False, False)
+    create_attempt_partition(cursor, datetime(2025, 12, 31))
+    assert cursor.statements[-1] == attempt_partition_ddl(datetime(2025, 12, 31))
+
+    cursor = PartitionCursor(True, True)
+    create_attempt_partition(cursor, datetime(2025, 12, 31))
+    assert len(cursor.statements) == 1
+
+def test_create_attempt_partition_refuses_detached_month():
+    cursor = PartitionCursor(True, False)
+
+    with pytest.raises(DetachedPartitionError, match="--attach 2025-12"):
+        create_attempt_partition(cursor, datetime(2025, 12, 31))
+
+    assert len(cursor.statements) == 1
+
+class InsertCursor:
+    """Records the parameters of each statement; nothing is inserted."""
+    def __init__(self):
+        self.connection = SimpleNamespace(commit=lambda: None)
+        self.params = []
+
+    def execute(self, sql, params=None):
+        self.params.append(params)
+
+    def fetchall(self):
+        return []
+
+def test_insert_attempts_reads_legacy_text_results():
+    cursor = InsertCursor()
+    insert_attempts(cursor, [{"id": "a", "result": "true"}, {"id": "b", "result": "False"}, {"id": "c", "result": True}])
+
+    assert cursor.params[0][list(ATTEMPT_COLUMNS).index("result")] == [True, False, True]
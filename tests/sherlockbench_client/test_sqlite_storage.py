@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from sherlockbench_client.sqlite_storage import SQLiteStorage
+
+RUN_ID = "00000000-0000-0000-0000-000000000001"
+
+def attempt(id, result, function_name=None):
+    return {"id": id, "run_id": RUN_ID, "function_name": function_name, "result": result,
+            "time_taken": 1.5, "tool_calls": 1, "complete_log": "log", "api_calls": 2,
+            "meta": '{"input_tokens": 10}',
+            "tool_call_rows": [{"args": [1], "output": 2, "error": False, "latency": 0.1}]}
+
+def make_storage(tmp_path, name="runs.db"):
+    storage = SQLiteStorage(str(tmp_path / name))
+    storage.create_run({"model": "m", "run_type": "test"}, RUN_ID, "1.2.3", ["baseline"])
+    return storage
+
+def test_insert_is_idempotent(tmp_path):
+    storage = make_storage(tmp_path)
+
+    storage.insert_attempts([attempt("a", True)])
+    storage.insert_attempts([attempt("a", True), attempt("b", False)])
+
+    assert sorted(storage.get_completed_attempts(RUN_ID)) == ["a", "b"]
+    assert storage.execute("SELECT count(*) FROM attempt_tool_calls") == [(2,)]
+
+def test_failed_run_round_trip(tmp_path):
+    storage = make_storage(tmp_path)
+    assert storage.get_failed_run(RUN_ID) is None
+
+    storage.save_run_failure(RUN_ID, {"current_attempt": {"attempt-id": "a"}})
+    storage.fail_attempt(RUN_ID, "a")
+
+    failed_run = storage.get_failed_run(RUN_ID)
+    assert failed_run["config"] == {"model": "m", "run_type": "test"}
+    assert failed_run["failure_info"]["current_attempt"] == {"attempt-id": "a"}
+    assert storage.get_completed_attempts(RUN_ID) == ["a"]
+
+def test_pass_at_k(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.insert_attempts([attempt("a", True), attempt("b", False), attempt("c", False), attempt("d", False)])
+    storage.add_problem_names(RUN_ID, [{"id": "a", "function_name": "f"}, {"id": "b", "function_name": "f"},
+                                       {"id": "c", "function_name": "g"}, {"id": "d", "function_name": "g"}])
+
+    assert storage.calculate_pass_at_k(RUN_ID) == (0.5, 2, 1, 2)
+
+def test_labels(tmp_path):
+    storage = make_storage(tmp_path)
+
+    assert storage.add_label(RUN_ID, "keeper")
+    assert storage.add_label(RUN_ID, "keeper")
+    assert storage.remove_label(RUN_ID, "baseline")
+    assert storage.get_labels(RUN_ID) == ["keeper"]
+    assert not storage.add_label("00000000-0000-0000-0000-000000000002", "keeper")
+
+def test_export_import(tmp_path):
+    source = make_storage(tmp_path)
+    source.insert_attempts([attempt("a", True, "f")])
+    source.save_run_result(RUN_ID, datetime.now(), {"numerator": 1, "denominator": 1}, 100, 2)
+
+    data = source.export_run(RUN_ID)
+    destination = SQLiteStorage(str(tmp_path / "copy.db"))
+    destination.import_run(data)
+    destination.import_run(data)
+
+    assert destination.export_run(RUN_ID) == data
+    assert data["run"]["final_score"] == {"numerator": 1, "denominator": 1}
+    assert data["attempts"][0]["meta"] == {"input_tokens": 10}
+    assert data["attempts"][0]["tool_call_rows"] == [{"args": [1], "output": 2, "error": False, "latency": 0.1}]
+
+def test_duration_history(tmp_path):
+    storage = make_storage(tmp_path)
+    assert storage.duration_history("m") is None
+
+    storage.insert_attempts([attempt("a", True) | {"time_taken": 2.0}, attempt("b", False) | {"time_taken": 4.0}])
+
+    assert storage.duration_history("m") == (2, 3.0, 2 ** 0.5)
+    assert storage.duration_history("other") is None
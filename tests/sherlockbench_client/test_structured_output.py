@@ -0,0 +1,23 @@
+import pytest
+from sherlockbench_client.structured_output import extract_json, parse_prediction, make_schema, StructuredOutputError
+
+def test_extract_json():
+    assert extract_json('{"a": 1}') == {"a": 1}
+    assert extract_json('some text before { "key": "value" } some text after') == {"key": "value"}
+    assert extract_json('example {"a": 1} then the answer {"b": 2}') == {"b": 2}
+    assert extract_json("I'm sure: {\"a\": \"x}y\"}") == {"a": "x}y"}
+    assert extract_json('{"a": 1,}') == {"a": 1}
+    assert extract_json("{'a': True}") == {"a": True}
+    assert extract_json('{"a": 1, "b": "cut o') == {"a": 1, "b": "cut o"}
+
+    with pytest.raises(StructuredOutputError):
+        extract_json("no json here")
+
+def test_parse_prediction():
+    assert parse_prediction('Answer:\n```json\n{"thoughts": "sum", "expected_output": 3}\n```') == ("sum", 3)
+
+    with pytest.raises(StructuredOutputError):
+        parse_prediction('{"thoughts": "forgot the answer"}')
+
+def test_make_schema_is_cached():
+    assert make_schema("integer") is make_schema("integer")